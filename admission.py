@@ -0,0 +1,296 @@
+"""
+Admission control for generation requests.
+
+Every request is given a cost from the size of its document and the number of
+questions asked for. It runs only once capacity for that cost is free, both
+for its language and overall; otherwise it waits a bounded time and is then
+rejected with 429 and ``Retry-After``. Each client (API key or session) may
+have a limited number of requests in flight, so one client cannot fill the
+queue. Waiting requests queue per pool: only the head of the queue takes
+units, so cheap requests arriving later cannot starve an expensive one.
+
+Capacity is shared by all gunicorn workers: each unit is a lock file in
+``Config.ADMISSION_DIR`` held with ``flock``. Locks are released by the
+kernel if a worker dies, so crashed requests never leak capacity.
+"""
+import os
+import time
+import random
+import hashlib
+import logging
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+from config import Config
+from metrics import ADMISSION_DECISIONS, ADMISSION_WAIT
+
+logger = logging.getLogger(__name__)
+
+# Client slots are spread over a fixed number of buckets, so the lock files do
+# not grow with the number of clients; two clients share a bucket with a
+# probability of about one in CLIENT_BUCKETS
+CLIENT_BUCKETS = 16384
+POLL_INTERVAL = 0.05
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request cannot be admitted."""
+    
+    def __init__(self, reason: str, retry_after: int):
+        """
+        Initialize the rejection.
+        
+        Args:
+            reason: ``client`` (too many requests in flight for the client) or
+                ``capacity`` (no capacity freed up within the wait limit)
+            retry_after: Seconds the client should wait before retrying
+        """
+        super().__init__(f"Request rejected ({reason}); retry after {retry_after}s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class SlotPool:
+    """A fixed number of capacity units shared between processes."""
+    
+    def __init__(self, directory: str, name: str, capacity: int):
+        """
+        Initialize the pool.
+        
+        Args:
+            directory: Directory holding the lock files
+            name: Pool name, used as the lock file prefix
+            capacity: Number of units
+        """
+        self.directory = directory
+        self.name = name
+        self.capacity = capacity
+    
+    def try_acquire(self, units: int) -> Optional[List[int]]:
+        """
+        Take ``units`` free units without blocking.
+        
+        Args:
+            units: Units to take
+        
+        Returns:
+            Optional[List[int]]: Locked file descriptors to pass to ``release``,
+            or None if not enough units are free (nothing is held then)
+        """
+        held = []
+        for slot in range(self.capacity):
+            if len(held) == units:
+                break
+            fd = os.open(os.path.join(self.directory, f"{self.name}-{slot}.lock"), os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                os.close(fd)
+                continue
+            held.append(fd)
+        if len(held) < units:
+            self.release(held)
+            return None
+        return held
+    
+    @staticmethod
+    def release(fds: List[int]) -> None:
+        """
+        Give back units taken with ``try_acquire``.
+        
+        Args:
+            fds: File descriptors returned by ``try_acquire``
+        """
+        for fd in fds:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
+
+def count_pages(pdf_path: str) -> int:
+    """
+    Count the pages of a PDF without extracting any text.
+    
+    Args:
+        pdf_path: Path to the PDF file
+    
+    Returns:
+        int: Number of pages, or 0 if the file cannot be opened
+    """
+    try:
+        import fitz  # PyMuPDF
+        
+        with fitz.open(pdf_path) as pdf:
+            return pdf.page_count
+    except Exception as e:
+        logger.warning(f"Could not count pages of {pdf_path}: {str(e)}")
+        return 0
+
+
+class AdmissionController:
+    """Limits concurrent generation work per language, overall and per client."""
+    
+    def __init__(
+        self,
+        root: str = None,
+        global_capacity: int = None,
+        language_capacity: Dict[str, int] = None,
+        client_concurrency: int = None,
+        max_wait: float = None,
+        retry_after: int = None,
+        enabled: bool = None
+    ):
+        """
+        Initialize the controller; unset arguments come from Config.ADMISSION_*.
+        
+        Args:
+            root: Directory holding the lock files
+            global_capacity: Cost units available to all languages together
+            language_capacity: Cost units per language (defaults to the global capacity)
+            client_concurrency: Requests a client may have in flight (0 = unlimited)
+            max_wait: Seconds a request waits for capacity before being rejected
+            retry_after: ``Retry-After`` seconds sent with rejections
+            enabled: Whether requests are limited at all
+        """
+        self.root = root or Config.ADMISSION_DIR
+        self.global_capacity = global_capacity or Config.ADMISSION_GLOBAL_CAPACITY
+        self.language_capacity = Config.ADMISSION_LANGUAGE_CAPACITY if language_capacity is None else language_capacity
+        self.client_concurrency = Config.ADMISSION_CLIENT_CONCURRENCY if client_concurrency is None else client_concurrency
+        self.max_wait = Config.ADMISSION_MAX_WAIT if max_wait is None else max_wait
+        self.retry_after = retry_after or Config.ADMISSION_RETRY_AFTER
+        self.enabled = Config.ADMISSION_ENABLED if enabled is None else enabled
+        if self.enabled and fcntl is None:
+            logger.warning("Admission control needs fcntl; requests are not limited on this platform")
+            self.enabled = False
+    
+    def estimate_cost(
+        self,
+        pdf_path: Optional[str],
+        total_questions: int,
+        pages: Sequence[int] = None
+    ) -> int:
+        """
+        Estimate the cost of a request in capacity units.
+        
+        Args:
+            pdf_path: Document to process, or None if no PDF is read (corpora)
+            total_questions: Questions requested
+            pages: Pages selected for processing (defaults to the whole document)
+        
+        Returns:
+            int: One unit plus one per started ADMISSION_PAGES_PER_UNIT pages
+            and per started ADMISSION_QUESTIONS_PER_UNIT questions
+        """
+        if pages is not None:
+            page_count = len(pages)
+        else:
+            page_count = count_pages(pdf_path) if pdf_path else 0
+        page_units = -(-page_count // Config.ADMISSION_PAGES_PER_UNIT)
+        question_units = -(-max(total_questions, 0) // Config.ADMISSION_QUESTIONS_PER_UNIT)
+        return 1 + page_units + question_units
+    
+    def _pool(self, name: str, capacity: int) -> SlotPool:
+        os.makedirs(self.root, exist_ok=True)
+        return SlotPool(self.root, name, capacity)
+    
+    def _client_pool(self, client: str) -> SlotPool:
+        bucket = int(hashlib.sha256(client.encode('utf-8')).hexdigest(), 16) % CLIENT_BUCKETS
+        directory = os.path.join(self.root, 'clients')
+        os.makedirs(directory, exist_ok=True)
+        return SlotPool(directory, f"client-{bucket}", self.client_concurrency)
+    
+    @staticmethod
+    def _acquire_in_turn(pool: SlotPool, gate: SlotPool, units: int, deadline: float) -> Optional[List[int]]:
+        """
+        Take units from a pool once this request is the head of its queue.
+        
+        Only the holder of the pool's single-unit gate tries to take units, so
+        units freed while an expensive request waits are not taken by cheaper
+        requests that arrived later.
+        
+        Args:
+            pool: Pool to take units from
+            gate: Single-unit pool marking the head of the queue
+            units: Units to take
+            deadline: ``time.perf_counter()`` value after which to give up
+        
+        Returns:
+            Optional[List[int]]: File descriptors of the units, or None if the
+            deadline passed first
+        """
+        turn = None
+        try:
+            while True:
+                if turn is None:
+                    turn = gate.try_acquire(1)
+                if turn is not None:
+                    held = pool.try_acquire(units)
+                    if held is not None:
+                        return held
+                if time.perf_counter() >= deadline:
+                    return None
+                time.sleep(POLL_INTERVAL * (0.5 + random.random()))
+        finally:
+            if turn is not None:
+                SlotPool.release(turn)
+    
+    @contextmanager
+    def admit(self, language: str, client: Optional[str], cost: int) -> Iterator[None]:
+        """
+        Hold capacity for a request while the ``with`` block runs.
+        
+        Args:
+            language: Language of the request
+            client: Client identifier (API key or session id), or None
+            cost: Cost from ``estimate_cost``; clamped to the capacity so that
+                a large request can still run on its own
+        
+        Raises:
+            AdmissionRejected: If the client has too many requests in flight or
+                no capacity frees up within ``max_wait`` seconds
+        """
+        if not self.enabled:
+            yield
+            return
+        
+        held: List[int] = []
+        try:
+            if client and self.client_concurrency > 0:
+                client_slot = self._client_pool(client).try_acquire(1)
+                if client_slot is None:
+                    ADMISSION_DECISIONS.labels(language=language, outcome='rejected_client').inc()
+                    raise AdmissionRejected('client', self.retry_after)
+                held.extend(client_slot)
+            
+            started = time.perf_counter()
+            deadline = started + self.max_wait
+            # Always language before global, so queue heads never wait on
+            # each other in a cycle
+            for name, capacity in (
+                (f"language-{language}", self.language_capacity.get(language, self.global_capacity)),
+                ('global', self.global_capacity)
+            ):
+                pool = self._pool(name, capacity)
+                units = self._acquire_in_turn(pool, self._pool(f"queue-{name}", 1), min(cost, capacity), deadline)
+                if units is None:
+                    ADMISSION_WAIT.labels(language=language).observe(time.perf_counter() - started)
+                    ADMISSION_DECISIONS.labels(language=language, outcome='rejected_capacity').inc()
+                    raise AdmissionRejected('capacity', self.retry_after)
+                held.extend(units)
+            
+            waited = time.perf_counter() - started
+            ADMISSION_WAIT.labels(language=language).observe(waited)
+            ADMISSION_DECISIONS.labels(language=language, outcome='admitted').inc()
+            if waited > POLL_INTERVAL:
+                logger.info(f"Admitted {language} request of cost {cost} after waiting {waited:.2f}s")
+            yield
+        finally:
+            SlotPool.release(held)
+
+
+# Global instance for shared use
+admission_controller = AdmissionController()
@@ -2,16 +2,28 @@
 Multi-Lingual Question Generation Flask Application.
 """
 import os
+import hmac
+import secrets
 import logging
-from typing import Optional, List
-from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify
+from functools import wraps
+from typing import List, Optional
+from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify, Response, stream_with_context
 from werkzeug.exceptions import RequestEntityTooLarge
 
 from config import config
-from utils import secure_file_upload, validate_language
-from languages.english import EnglishQuestionGenerator
-from languages.hindi import HindiQuestionGenerator
-from languages.sanskrit import SanskritQuestionGenerator
+from utils import secure_file_upload, validate_language, file_sha256
+from metrics import REQUEST_DURATION, generate_metrics
+from profiling import RequestProfiler, should_profile
+from memory import RequestMemory
+from models import effective_cpu_policy
+import lifecycle
+import documents
+from admission import AdmissionRejected, admission_controller
+from corpus import get_corpus, validate_corpus_name
+from pdf_processor import pdf_processor
+from ocr import has_text_layer, ocr_available
+from question_bank import question_bank, recording_sources, stream_csv, stream_json
+from languages import available_languages, get_language_generator, get_language_spec
 
 # Initialize Flask app
 app = Flask(__name__)
@@ -27,18 +39,54 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Initialize language generators
-language_generators = {
-    'english': EnglishQuestionGenerator(),
-    'hindi': HindiQuestionGenerator(),
-    'sanskrit': SanskritQuestionGenerator()
-}
+def preload_languages() -> List[str]:
+    """
+    Get the languages to load before serving.
+    
+    Returns:
+        List[str]: Languages in ``PRELOAD_LANGUAGES`` this deployment serves
+    """
+    enabled = available_languages()
+    return [language for language in app.config['PRELOAD_LANGUAGES'] if language in enabled]
+
+def load_models() -> None:
+    """
+    Load the models of every enabled language in ``PRELOAD_LANGUAGES``.
+    
+    Called in the gunicorn master when preloading, so weights are shared
+    copy-on-write by the workers.
+    """
+    for language in preload_languages():
+        generator = get_language_generator(language)
+        load = getattr(generator, 'load', None)
+        if load is not None:
+            load()
+    lifecycle.mark_models_loaded()
+
+def warm_up_models() -> bool:
+    """
+    Load and warm up the preloaded languages and mark this process ready.
+    
+    Called from the gunicorn ``post_worker_init`` hook and before the
+    development server starts.
+    
+    Returns:
+        bool: True if the process is ready
+    """
+    try:
+        load_models()
+    except Exception as e:
+        logger.error(f"Failed to load models: {str(e)}")
+    return lifecycle.warm_up({
+        language: get_language_generator(language)
+        for language in preload_languages()
+    })
 
 @app.route('/')
 def index():
     """Render the main page for language selection."""
     try:
-        return render_template('index.html')
+        return render_template('index.html', languages=available_languages().values())
     except Exception as e:
         logger.error(f"Error rendering index page: {str(e)}")
         return "Internal server error", 500
@@ -63,6 +111,50 @@ def upload():
         flash('An error occurred. Please try again.', 'error')
         return redirect(url_for('index'))
 
+@app.route('/documents', methods=['POST'])
+def upload_document():
+    """Store an uploaded PDF and start preparing it in the background."""
+    try:
+        language = request.form.get('language', session.get('language', '')).lower()
+        if not validate_language(language):
+            return jsonify(error='Invalid language selected.'), 400
+        
+        pdf_file = request.files.get('file')
+        if not pdf_file or pdf_file.filename == '':
+            return jsonify(error='No file selected.'), 400
+        
+        file_path = secure_file_upload(pdf_file)
+        if not file_path:
+            return jsonify(error='Invalid file type. Please upload a PDF file.'), 400
+        
+        documents.expire_documents()
+        document_id = documents.store_upload(file_path)
+        documents.prepare_in_background(document_id, language, get_language_generator(language))
+        logger.info(f"Uploaded document {document_id[:12]} for {language}")
+        return jsonify(documents.document_status(document_id)), 202
+        
+    except RequestEntityTooLarge:
+        return jsonify(error='File too large. Please upload a smaller PDF file.'), 413
+    except Exception as e:
+        logger.error(f"Error uploading document: {str(e)}")
+        return jsonify(error='An error occurred while uploading the document.'), 500
+
+@app.route('/documents/<document_id>', methods=['GET'])
+def document_status(document_id):
+    """Report whether an uploaded document has been prepared."""
+    status = documents.document_status(document_id)
+    if status is None:
+        return jsonify(error='Document not found.'), 404
+    return jsonify(status), 200
+
+@app.route('/documents/<document_id>/outline', methods=['GET'])
+def document_outline(document_id):
+    """List the chapters of an uploaded document's outline for page selection."""
+    file_path = documents.document_path(document_id)
+    if file_path is None:
+        return jsonify(error='Document not found.'), 404
+    return jsonify(document_id=document_id, chapters=pdf_processor.extract_outline(file_path)), 200
+
 @app.route('/process', methods=['POST'])
 def process():
     """Process PDF upload and generate questions."""
@@ -81,39 +173,92 @@ def process():
             flash('Invalid language selected.', 'error')
             return redirect(url_for('index'))
         
-        # Handle file upload
-        if 'file' not in request.files:
-            flash('No file uploaded.', 'error')
-            return redirect(url_for('index'))
+        documents.expire_documents()
+        document_id = request.form.get('document_id', '').strip()
+        if document_id:
+            # The PDF was uploaded earlier and prepared in the background
+            file_path = documents.document_path(document_id)
+            if not file_path:
+                flash('Uploaded document not found. Please upload it again.', 'error')
+                return redirect(url_for('index'))
+            documents.touch_document(document_id)
+            if not documents.wait_until_prepared(document_id):
+                logger.warning(f"Preparation of {document_id[:12]} still running; continuing without it")
+        else:
+            # Handle file upload
+            if 'file' not in request.files:
+                flash('No file uploaded.', 'error')
+                return redirect(url_for('index'))
+            
+            pdf_file = request.files['file']
+            if not pdf_file or pdf_file.filename == '':
+                flash('No file selected.', 'error')
+                return redirect(url_for('index'))
+            
+            # Secure file upload
+            file_path = secure_file_upload(pdf_file)
+            if not file_path:
+                flash('Invalid file type. Please upload a PDF file.', 'error')
+                return redirect(url_for('index'))
         
-        pdf_file = request.files['file']
-        if not pdf_file or pdf_file.filename == '':
-            flash('No file selected.', 'error')
-            return redirect(url_for('index'))
+        logger.info(f"Processing PDF: {file_path} for language: {language}")
         
-        # Secure file upload
-        file_path = secure_file_upload(pdf_file)
-        if not file_path:
-            flash('Invalid file type. Please upload a PDF file.', 'error')
+        # Optionally restrict the work to a page range or an outline chapter
+        pages, error = _selected_pages(language, file_path)
+        if error:
+            if not document_id:
+                _remove_upload(file_path)
+            flash(error, 'error')
             return redirect(url_for('index'))
         
-        logger.info(f"Processing PDF: {file_path} for language: {language}")
-        
-        # Generate questions based on language
-        questions = generate_questions_for_language(
-            language, file_path, prompt, total_questions
-        )
+        # Questions generated before for this document and a similar prompt
+        # are served from the question bank without running the model
+        document_hash = file_sha256(file_path)
+        questions = question_bank.find(document_hash, language, prompt, total_questions, pages=pages)
+        if questions is None:
+            # Generate questions based on language, once there is capacity for it
+            cost = admission_controller.estimate_cost(file_path, total_questions, pages=pages)
+            profiler = RequestProfiler(enabled=should_profile(request.headers))
+            try:
+                with admission_controller.admit(language, _client_id(), cost):
+                    with REQUEST_DURATION.labels(language=language).time(), profiler, RequestMemory(language), \
+                            recording_sources() as sources:
+                        questions = generate_questions_for_language(
+                            language, file_path, prompt, total_questions, pages=pages
+                        )
+            except AdmissionRejected as e:
+                if not document_id:
+                    _remove_upload(file_path)
+                return _too_busy(e)
+            
+            if profiler.enabled:
+                profiler.save(
+                    document_hash=document_hash,
+                    language=language,
+                    prompt=prompt,
+                    total_questions=total_questions,
+                    questions_generated=len(questions)
+                )
+            
+            if questions:
+                question_bank.store(document_hash, language, prompt, questions, pages=pages, offsets=sources)
         
         if not questions:
-            flash('No questions could be generated. Please try with different content or settings.', 'warning')
+            if not ocr_available() and not has_text_layer(file_path):
+                flash(
+                    'This PDF looks scanned: it has no text layer and OCR is not available. '
+                    'Install Tesseract with Hindi, Sanskrit and English language data to read scanned books.',
+                    'warning'
+                )
+            else:
+                flash('No questions could be generated. Please try with different content or settings.', 'warning')
+            if not document_id:
+                _remove_upload(file_path)
             return redirect(url_for('index'))
         
-        # Clean up uploaded file
-        try:
-            os.remove(file_path)
-            logger.info(f"Cleaned up uploaded file: {file_path}")
-        except Exception as e:
-            logger.warning(f"Failed to clean up file {file_path}: {str(e)}")
+        # Clean up a one-shot upload; stored documents are expired by TTL
+        if not document_id:
+            _remove_upload(file_path)
         
         logger.info(f"Generated {len(questions)} questions for {language}")
         return render_template('result.html', questions=questions, language=language)
@@ -129,11 +274,227 @@ def process():
         flash('An error occurred while processing your request. Please try again.', 'error')
         return redirect(url_for('index'))
 
+def _remove_upload(file_path: str) -> None:
+    """Delete a one-shot upload once its request is done."""
+    try:
+        os.remove(file_path)
+        logger.info(f"Cleaned up uploaded file: {file_path}")
+    except Exception as e:
+        logger.warning(f"Failed to clean up file {file_path}: {str(e)}")
+
+def _selected_pages(language: str, file_path: str):
+    """Resolve the ``pages``/``chapter`` form fields to pages, or an error message."""
+    page_ranges = request.form.get('pages', '').strip()
+    chapter = request.form.get('chapter', '').strip()
+    if not page_ranges and not chapter:
+        return None, None
+    if 'pages' not in get_language_spec(language).capabilities:
+        return None, 'Page selection is not supported for this language.'
+    try:
+        pages = pdf_processor.select_pages(
+            file_path,
+            page_ranges=page_ranges or None,
+            chapter=int(chapter) if chapter else None
+        )
+    except ValueError as e:
+        return None, f'Invalid page selection: {str(e)}'
+    logger.info(f"Processing {len(pages)} selected pages")
+    return pages, None
+
+def _client_id() -> str:
+    """Identify the client for admission control: its API key, else its session."""
+    api_key = request.headers.get(app.config['API_KEY_HEADER'])
+    if api_key:
+        return f"key:{api_key}"
+    if 'client_id' not in session:
+        session['client_id'] = secrets.token_hex(8)
+    return f"session:{session['client_id']}"
+
+def _too_busy(rejection: AdmissionRejected):
+    """Answer a request that was not admitted with 429 and Retry-After."""
+    logger.warning(str(rejection))
+    if rejection.reason == 'client':
+        message = "You already have a request in progress. Please wait for it to finish."
+    else:
+        message = "The server is busy. Please try again shortly."
+    response = render_template('error.html', error_code=429, message=message)
+    return response, 429, {'Retry-After': str(rejection.retry_after)}
+
+def admin_required(view):
+    """Allow a route only for requests carrying ``ADMIN_TOKEN`` in the admin header."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        token = app.config['ADMIN_TOKEN']
+        supplied = request.headers.get(app.config['ADMIN_HEADER'])
+        if not token or not supplied or not hmac.compare_digest(supplied, token):
+            logger.warning(f"Rejected unauthorized request to {request.path}")
+            return jsonify(error='Admin token required.'), 403
+        return view(*args, **kwargs)
+    return wrapper
+
+def _open_corpus(name: str):
+    """Get a corpus by name, or a 400 JSON response if the name is invalid."""
+    if not validate_corpus_name(name):
+        return None, (jsonify(error='Invalid corpus name.'), 400)
+    return get_corpus(name), None
+
+@app.route('/corpus/<name>', methods=['GET'])
+def corpus_manifest(name):
+    """List the documents registered in a corpus."""
+    corpus, error = _open_corpus(name)
+    if error:
+        return error
+    return jsonify(name=name, documents=corpus.documents()), 200
+
+@app.route('/corpus/<name>/documents', methods=['POST'])
+@admin_required
+def corpus_add_document(name):
+    """Register an uploaded PDF in a corpus; it is extracted (by the generator of
+    the form's ``language``, English by default) and indexed once."""
+    corpus, error = _open_corpus(name)
+    if error:
+        return error
+    
+    language = request.form.get('language', 'english').lower()
+    if not validate_language(language):
+        return jsonify(error='Invalid language selected.'), 400
+    
+    pdf_file = request.files.get('file')
+    if not pdf_file or pdf_file.filename == '':
+        return jsonify(error='No file selected.'), 400
+    
+    file_path = secure_file_upload(pdf_file)
+    if not file_path:
+        return jsonify(error='Invalid file type. Please upload a PDF file.'), 400
+    
+    try:
+        entry = corpus.add_document(file_path, filename=pdf_file.filename, language=language)
+    except Exception as e:
+        logger.error(f"Error adding document to corpus {name}: {str(e)}")
+        entry = None
+    finally:
+        _remove_upload(file_path)
+    
+    if entry is None:
+        return jsonify(error='No text could be extracted from the PDF.'), 422
+    return jsonify(entry), 201
+
+@app.route('/corpus/<name>/documents/<document_id>', methods=['DELETE'])
+@admin_required
+def corpus_remove_document(name, document_id):
+    """Remove a document from a corpus."""
+    corpus, error = _open_corpus(name)
+    if error:
+        return error
+    if not corpus.remove_document(document_id):
+        return jsonify(error='Document not found in corpus.'), 404
+    return jsonify(removed=document_id), 200
+
+@app.route('/corpus/<name>/process', methods=['POST'])
+def corpus_process(name):
+    """Generate questions from the chunks most relevant to a prompt across a corpus."""
+    try:
+        prompt = request.form.get('prompt', '').strip()
+        language = request.form.get('language', session.get('language', '')).lower()
+        total_questions = int(request.form.get('total_questions', 15))
+        
+        if not prompt:
+            flash('Please provide a prompt for question generation.', 'error')
+            return redirect(url_for('index'))
+        
+        if not validate_language(language):
+            flash('Invalid language selected.', 'error')
+            return redirect(url_for('index'))
+        
+        corpus, error = _open_corpus(name)
+        if error:
+            flash('Invalid corpus name.', 'error')
+            return redirect(url_for('index'))
+        
+        cost = admission_controller.estimate_cost(None, total_questions)
+        with admission_controller.admit(language, _client_id(), cost), \
+                REQUEST_DURATION.labels(language=language).time(), RequestMemory(language):
+            hits = corpus.search(prompt, top_n=app.config['DEFAULT_TOP_N_CHUNKS'])
+            relevant_chunks = [text for _, _, text in hits]
+            questions = []
+            if relevant_chunks:
+                generator = get_language_generator(language)
+                questions = generator.generate_questions_from_chunks(
+                    relevant_chunks,
+                    total_questions=total_questions
+                )
+        
+        if not questions:
+            flash('No questions could be generated. Please try with different content or settings.', 'warning')
+            return redirect(url_for('index'))
+        
+        logger.info(f"Generated {len(questions)} questions for {language} from corpus {name}")
+        return render_template('result.html', questions=questions, language=language)
+    
+    except AdmissionRejected as e:
+        return _too_busy(e)
+    except ValueError:
+        flash('Invalid number of questions specified.', 'error')
+        return redirect(url_for('index'))
+    except Exception as e:
+        logger.error(f"Error processing corpus request: {str(e)}")
+        flash('An error occurred while processing your request. Please try again.', 'error')
+        return redirect(url_for('index'))
+
+@app.route('/bank/documents/<document_hash>', methods=['GET'])
+@admin_required
+def bank_document(document_hash):
+    """List the generations stored in the question bank for a document."""
+    return jsonify(document_hash=document_hash, generations=question_bank.generations(document_hash)), 200
+
+@app.route('/bank/export', methods=['GET'])
+@admin_required
+def bank_export():
+    """Stream stored questions as JSON or CSV, optionally for one document or language."""
+    export_format = request.args.get('format', 'json').lower()
+    if export_format not in ('json', 'csv'):
+        return jsonify(error='Unsupported format; use json or csv.'), 400
+    
+    rows = question_bank.iter_questions(
+        document_hash=request.args.get('document') or None,
+        language=(request.args.get('language') or '').lower() or None
+    )
+    if export_format == 'csv':
+        body, mimetype = stream_csv(rows), 'text/csv'
+    else:
+        body, mimetype = stream_json(rows), 'application/json'
+    return Response(
+        stream_with_context(body),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename=questions.{export_format}'}
+    )
+
+@app.route('/healthz/live')
+def healthz_live():
+    """Liveness probe: the process is up and serving HTTP."""
+    return jsonify(status='alive'), 200
+
+@app.route('/healthz/ready')
+def healthz_ready():
+    """Readiness probe: models are loaded and a warm-up generation has run."""
+    state = lifecycle.readiness()
+    state['cpu_threads'] = effective_cpu_policy()
+    return jsonify(state), 200 if lifecycle.is_ready() else 503
+
+@app.route('/metrics')
+def metrics():
+    """Expose pipeline metrics in the Prometheus text format."""
+    if not app.config['METRICS_ENABLED']:
+        return "Not found", 404
+    body, content_type = generate_metrics()
+    return Response(body, content_type=content_type)
+
 def generate_questions_for_language(
     language: str, 
     pdf_path: str, 
     prompt: str, 
-    total_questions: int
+    total_questions: int,
+    pages: Optional[List[int]] = None
 ) -> List[str]:
     """
     Generate questions for a specific language.
@@ -143,38 +504,26 @@ def generate_questions_for_language(
         pdf_path: Path to the PDF file
         prompt: User prompt for question generation
         total_questions: Number of questions to generate
+        pages: Zero-based pages to use (defaults to the whole document); only
+            passed to languages with the ``pages`` capability
         
     Returns:
         List[str]: Generated questions
     """
     try:
-        generator = language_generators.get(language)
+        generator = get_language_generator(language)
         if not generator:
             logger.error(f"No generator found for language: {language}")
             return []
         
-        if language == 'english':
-            return generator.generate_questions_from_pdf(
-                pdf_path=pdf_path,
-                prompt=prompt,
-                total_questions=total_questions
-            )
-        elif language == 'hindi':
-            return generator.generate_questions_from_pdf(
-                pdf_path=pdf_path,
-                prompt=prompt,
-                total_questions=total_questions
-            )
-        elif language == 'sanskrit':
-            return generator.generate_questions_from_pdf(
-                pdf_path=pdf_path,
-                prompt=prompt,
-                total_questions=total_questions
-            )
-        else:
-            logger.error(f"Unsupported language: {language}")
-            return []
-            
+        options = {} if pages is None else {'pages': pages}
+        return generator.generate_questions_from_pdf(
+            pdf_path=pdf_path,
+            prompt=prompt,
+            total_questions=total_questions,
+            **options
+        )
+    
     except Exception as e:
         logger.error(f"Error generating questions for {language}: {str(e)}")
         return []
@@ -201,6 +550,7 @@ if __name__ == '__main__':
     os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
     
     logger.info("Starting Multi-Lingual Question Generator application")
+    warm_up_models()
     app.run(
         host='0.0.0.0',
         port=int(os.getenv('PORT', 5000)),
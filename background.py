@@ -0,0 +1,83 @@
+"""
+Background work that should not hold up a request.
+
+Small thread pools run jobs such as preparing an uploaded document or
+pre-generating questions for all of its chunks. Each kind of job has its own
+pool, so a short preparation that a request may wait for never queues behind
+a long pre-generation. Pools are created on first use in each process, so
+they survive gunicorn's fork.
+"""
+import os
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POOL = 'background'
+PREGENERATE_POOL = 'pregenerate'
+
+_executors: Dict[str, ThreadPoolExecutor] = {}
+_executor_pid: Optional[int] = None
+_lock = threading.Lock()
+
+
+def _get_executor(pool: str) -> ThreadPoolExecutor:
+    global _executor_pid
+    with _lock:
+        if _executor_pid != os.getpid():
+            _executors.clear()
+            _executor_pid = os.getpid()
+        executor = _executors.get(pool)
+        if executor is None:
+            executor = ThreadPoolExecutor(
+                max_workers=Config.BACKGROUND_WORKERS,
+                thread_name_prefix=pool
+            )
+            _executors[pool] = executor
+        return executor
+
+
+def _log_failure(name: str, future: Future) -> None:
+    error = future.exception()
+    if error is not None:
+        logger.error(f"Background job {name} failed: {str(error)}")
+
+
+def submit(name: str, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+    """
+    Run a function in the default background pool.
+    
+    Args:
+        name: Job name used in logs
+        fn: Function to run
+        *args: Positional arguments for ``fn``
+        **kwargs: Keyword arguments for ``fn``
+    
+    Returns:
+        Future: Future of the function's result
+    """
+    return submit_to(DEFAULT_POOL, name, fn, *args, **kwargs)
+
+
+def submit_to(pool: str, name: str, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+    """
+    Run a function in a named background pool.
+    
+    Args:
+        pool: Pool name, e.g. DEFAULT_POOL or PREGENERATE_POOL
+        name: Job name used in logs
+        fn: Function to run
+        *args: Positional arguments for ``fn``
+        **kwargs: Keyword arguments for ``fn``
+    
+    Returns:
+        Future: Future of the function's result
+    """
+    future = _get_executor(pool).submit(fn, *args, **kwargs)
+    future.add_done_callback(lambda done: _log_failure(name, done))
+    logger.info(f"Queued background job {name} ({pool})")
+    return future
@@ -0,0 +1,164 @@
+"""
+Dynamic micro-batching of concurrent calls.
+
+Callers submit single items and receive a ``Future``. A background thread
+collects whatever arrives within a short window (up to a maximum batch size),
+groups the items by key and runs each group through one batched call.
+``BatchedPipeline`` applies this to the generation pipeline, so concurrent
+requests in one process (or, via the inference server, across processes)
+share model batches.
+"""
+import os
+import time
+import queue
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from config import Config
+from metrics import GENERATION_BATCH_SIZE
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """Collects concurrent submissions for a few milliseconds and runs them as batches."""
+    
+    def __init__(
+        self,
+        run_batch: Callable[[Hashable, List[Any]], List[Any]],
+        max_batch_size: int,
+        max_wait_ms: float,
+        name: str = "micro-batcher"
+    ):
+        """
+        Initialize the batcher.
+        
+        Args:
+            run_batch: Called with a group key and the items sharing it; must
+                return one result per item, in order
+            max_batch_size: Maximum number of items collected into one batch
+            max_wait_ms: How long to wait for more items after the first arrives
+            name: Name of the background thread
+        """
+        self.run_batch = run_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.name = name
+        self._lock = threading.Lock()
+        self._queue: Optional[queue.Queue] = None
+        self._pid: Optional[int] = None
+    
+    def submit(self, item: Any, key: Hashable = None) -> Future:
+        """
+        Queue an item for the next batch.
+        
+        Args:
+            item: Item to process
+            key: Items are only batched with items of an equal key
+            
+        Returns:
+            Future: Resolves to the item's result
+        """
+        future: Future = Future()
+        self._ensure_worker().put((key, item, future))
+        return future
+    
+    def _ensure_worker(self) -> queue.Queue:
+        # Threads do not survive fork, so each process starts its own worker
+        with self._lock:
+            if self._queue is None or self._pid != os.getpid():
+                self._queue = queue.Queue()
+                self._pid = os.getpid()
+                threading.Thread(
+                    target=self._worker_loop,
+                    args=(self._queue,),
+                    name=self.name,
+                    daemon=True
+                ).start()
+            return self._queue
+    
+    def _worker_loop(self, pending: queue.Queue) -> None:
+        while True:
+            batch = [pending.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    batch.append(pending.get(timeout=remaining) if remaining > 0 else pending.get_nowait())
+                except queue.Empty:
+                    break
+            self._dispatch(batch)
+    
+    def _dispatch(self, batch: List[Tuple[Hashable, Any, Future]]) -> None:
+        groups: Dict[Hashable, List[Tuple[Any, Future]]] = {}
+        for key, item, future in batch:
+            if future.set_running_or_notify_cancel():
+                groups.setdefault(key, []).append((item, future))
+        
+        for key, entries in groups.items():
+            GENERATION_BATCH_SIZE.observe(len(entries))
+            try:
+                results = self.run_batch(key, [item for item, _ in entries])
+                if len(results) != len(entries):
+                    raise RuntimeError(f"Batch returned {len(results)} results for {len(entries)} items")
+            except Exception as e:
+                logger.error(f"Batch of {len(entries)} failed: {str(e)}")
+                for _, future in entries:
+                    future.set_exception(e)
+                continue
+            for (_, future), result in zip(entries, results):
+                future.set_result(result)
+
+
+class BatchedPipeline:
+    """Pipeline-compatible callable that micro-batches concurrent generation calls."""
+    
+    def __init__(self, generation_pipeline: Any, max_batch_size: int = None, max_wait_ms: float = None):
+        """
+        Initialize the batched pipeline.
+        
+        Args:
+            generation_pipeline: Hugging Face text2text-generation pipeline
+            max_batch_size: Maximum calls per batch (defaults to Config.GENERATION_BATCH_MAX_SIZE)
+            max_wait_ms: Maximum wait for a batch to fill (defaults to Config.GENERATION_BATCH_MAX_WAIT_MS)
+        """
+        self.pipeline = generation_pipeline
+        self.batcher = MicroBatcher(
+            self._run_batch,
+            max_batch_size=max_batch_size or Config.GENERATION_BATCH_MAX_SIZE,
+            max_wait_ms=max_wait_ms if max_wait_ms is not None else Config.GENERATION_BATCH_MAX_WAIT_MS,
+            name="generation-batcher"
+        )
+    
+    def _run_batch(self, key: Hashable, texts: List[str]) -> List[List[Dict[str, Any]]]:
+        outputs = self.pipeline(texts, batch_size=len(texts), **dict(key))
+        # The pipeline flattens the output when each input has a single sequence
+        return [output if isinstance(output, list) else [output] for output in outputs]
+    
+    def submit(self, text: str, **kwargs: Any) -> Future:
+        """
+        Queue one generation call.
+        
+        Args:
+            text: Formatted model input
+            **kwargs: Generation arguments; only calls with equal arguments share a batch
+            
+        Returns:
+            Future: Resolves to the pipeline outputs for ``text``
+        """
+        return self.batcher.submit(text, key=tuple(sorted(kwargs.items())))
+    
+    def __call__(self, text: str, **kwargs: Any) -> List[Dict[str, Any]]:
+        """
+        Generate sequences for one input text, waiting for its batch.
+        
+        Args:
+            text: Formatted model input
+            **kwargs: Generation arguments, as accepted by the pipeline
+            
+        Returns:
+            List[Dict[str, Any]]: Pipeline outputs with ``generated_text``
+        """
+        return self.submit(text, **kwargs).result()
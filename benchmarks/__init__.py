@@ -0,0 +1,3 @@
+"""
+Benchmarks for the Multi-Lingual Question Generator.
+"""
@@ -0,0 +1,108 @@
+"""
+Throughput of concurrent generation with default vs. policy-managed torch threads.
+
+Each level of concurrency starts that many processes (like gunicorn workers),
+each loading the model and generating questions in a loop for a fixed time.
+The ``default`` mode gives every worker all cores, as PyTorch does on its own;
+the ``policy`` mode lets the workers split the cores between them.
+
+Usage:
+    python benchmarks/bench_cpu_threads.py --concurrency 1 2 4 8 --duration 20
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+import multiprocessing as mp
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SAMPLE_TEXT = (
+    "The Indus Valley Civilisation was a Bronze Age civilisation in the northwestern "
+    "regions of South Asia. Its cities were noted for their urban planning, baked brick "
+    "houses, elaborate drainage systems and water supply systems."
+)
+
+
+def _worker(mode: str, slot: int, workers: int, duration: float, barrier, results) -> None:
+    from models import apply_cpu_thread_policy, load_generation_pipeline
+    
+    if mode == 'policy':
+        apply_cpu_thread_policy(worker_slot=slot, workers=workers)
+    else:
+        apply_cpu_thread_policy(workers=1)
+    
+    generation_pipeline = load_generation_pipeline()
+    generation_pipeline(f"Generate a question about: {SAMPLE_TEXT}", max_length=32, num_beams=1)
+    barrier.wait()
+    
+    latencies = []
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        generation_pipeline(
+            f"Generate a question about: {SAMPLE_TEXT}",
+            max_length=64,
+            num_beams=2,
+            num_return_sequences=2
+        )
+        latencies.append(time.perf_counter() - start)
+    results.put(latencies)
+
+
+def run(mode: str, concurrency: int, duration: float) -> Dict[str, float]:
+    """
+    Run one benchmark configuration.
+    
+    Args:
+        mode: ``default`` or ``policy``
+        concurrency: Number of concurrent worker processes
+        duration: Seconds each worker generates for
+        
+    Returns:
+        Dict[str, float]: Throughput and latency percentiles
+    """
+    context = mp.get_context('spawn')
+    barrier = context.Barrier(concurrency)
+    results = context.Queue()
+    processes = [
+        context.Process(target=_worker, args=(mode, slot, concurrency, duration, barrier, results))
+        for slot in range(concurrency)
+    ]
+    for process in processes:
+        process.start()
+    latencies: List[float] = []
+    for _ in processes:
+        latencies.extend(results.get())
+    for process in processes:
+        process.join()
+    
+    latencies.sort()
+    return {
+        'throughput': len(latencies) / duration,
+        'p50': statistics.median(latencies),
+        'p95': latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    }
+
+
+def main() -> None:
+    """Run the benchmark from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--duration', type=float, default=20.0)
+    args = parser.parse_args()
+    
+    print(f"{'workers':>8} {'mode':>8} {'req/s':>8} {'p50 s':>8} {'p95 s':>8}")
+    for concurrency in args.concurrency:
+        for mode in ('default', 'policy'):
+            result = run(mode, concurrency, args.duration)
+            print(
+                f"{concurrency:>8} {mode:>8} {result['throughput']:>8.2f} "
+                f"{result['p50']:>8.3f} {result['p95']:>8.3f}"
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""
+Import-time profile of the application (``python -X importtime``).
+
+Prints the total cost of ``import app`` and the slowest modules it imports.
+
+Usage:
+    python benchmarks/bench_import_time.py --top 15
+"""
+import os
+import re
+import sys
+import argparse
+import subprocess
+from typing import Dict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+
+def measure_import_times(statement: str = "import app") -> Dict[str, int]:
+    """
+    Run a statement under ``-X importtime`` in a fresh interpreter.
+    
+    Args:
+        statement: Python code to execute
+        
+    Returns:
+        Dict[str, int]: Cumulative import time in microseconds per module
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', statement],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            times[match.group(4)] = int(match.group(2))
+    return times
+
+
+def main() -> None:
+    """Run the benchmark from the command line."""
+    parser = argparse.ArgumentParser(description="Import-time profile of app.py")
+    parser.add_argument('--top', type=int, default=15)
+    parser.add_argument('--statement', default="import app")
+    args = parser.parse_args()
+    
+    times = measure_import_times(args.statement)
+    print(f"{args.statement}: {times.get(args.statement.split()[-1], 0) / 1000:.1f} ms")
+    for module, micros in sorted(times.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"{micros / 1000:>10.1f} ms  {module}")
+
+
+if __name__ == '__main__':
+    main()
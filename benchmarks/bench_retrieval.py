@@ -0,0 +1,87 @@
+"""
+Retrieval cost of per-request TF-IDF vs. the precomputed BM25 index.
+
+Builds a synthetic document of Zipf-distributed words and times ranking a set
+of prompts with each backend. The BM25 index is built once (reported
+separately) and reused for every prompt, as it is for a cached document.
+
+Usage:
+    python benchmarks/bench_retrieval.py --chunks 10000 --prompts 20
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from document_cache import DocumentCache
+from retrieval import BM25Retriever, TfidfRetriever
+
+
+def synthetic_chunks(num_chunks: int, words_per_chunk: int = 170, vocabulary: int = 30000, seed: int = 0):
+    """
+    Generate chunks of roughly 1000 characters with a Zipfian word distribution.
+    
+    Args:
+        num_chunks: Number of chunks
+        words_per_chunk: Words in each chunk
+        vocabulary: Number of distinct words
+        seed: Random seed
+        
+    Returns:
+        List[str]: The chunks
+    """
+    rng = np.random.default_rng(seed)
+    words = np.array([f"w{i}" for i in range(vocabulary)])
+    ids = np.minimum(rng.zipf(1.2, size=(num_chunks, words_per_chunk)), vocabulary) - 1
+    return [' '.join(words[row]) for row in ids]
+
+
+def main() -> None:
+    """Run the benchmark from the command line."""
+    parser = argparse.ArgumentParser(description="TF-IDF vs. BM25 retrieval cost")
+    parser.add_argument('--chunks', type=int, default=10000)
+    parser.add_argument('--prompts', type=int, default=20)
+    parser.add_argument('--top-n', type=int, default=5)
+    args = parser.parse_args()
+    
+    chunks = synthetic_chunks(args.chunks)
+    rng = np.random.default_rng(1)
+    prompts = [' '.join(f"w{i}" for i in rng.integers(10, 2000, size=6)) for _ in range(args.prompts)]
+    
+    tfidf = TfidfRetriever()
+    tfidf_times = []
+    for prompt in prompts:
+        start = time.perf_counter()
+        tfidf.rank(prompt, chunks, args.top_n)
+        tfidf_times.append(time.perf_counter() - start)
+    
+    with tempfile.TemporaryDirectory() as cache_dir:
+        bm25 = BM25Retriever(cache=DocumentCache(cache_dir))
+        start = time.perf_counter()
+        index = bm25.get_index(chunks, document_id='bench')
+        build_time = time.perf_counter() - start
+        
+        score_times, rank_times = [], []
+        for prompt in prompts:
+            start = time.perf_counter()
+            index.score(prompt)
+            score_times.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            bm25.rank(prompt, chunks, args.top_n, document_id='bench')
+            rank_times.append(time.perf_counter() - start)
+    
+    print(f"{args.chunks} chunks, {args.prompts} prompts, top {args.top_n}")
+    print(f"tfidf per query:        {statistics.median(tfidf_times) * 1000:10.2f} ms (median)")
+    print(f"bm25 index build:       {build_time * 1000:10.2f} ms (once per document)")
+    print(f"bm25 scoring per query: {statistics.median(score_times) * 1000:10.2f} ms (median)")
+    print(f"bm25 rank per query:    {statistics.median(rank_times) * 1000:10.2f} ms (median, incl. index lookup)")
+
+
+if __name__ == '__main__':
+    main()
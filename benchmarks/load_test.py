@@ -0,0 +1,639 @@
+"""
+Load test of the web app with a stub model and a fake translation server.
+
+Starts the app (under gunicorn, or the Flask development server) with
+``GENERATION_BACKEND=stub`` and ``TRANSLATION_BACKEND=libretranslate``
+pointed at a local fake translation server, so results depend on the app
+and not on model weights or a remote API. It then replays a weighted mix of
+English, Hindi and Sanskrit uploads through ``/upload`` and ``/process`` at a
+fixed concurrency, each request as a new client, and reports throughput,
+p50/p95/p99 latency, status codes and the peak RSS of every server worker.
+
+Every request sends the same sample PDF and prompt per language, so the
+question cache and question bank are disabled by default and each request
+generates. Pass ``--warm-cache`` to measure the cached path instead.
+
+Pass ``--url`` to load an app that is already running (RSS is then not
+reported) and ``--json`` to keep the results for regression tracking.
+
+Usage:
+    python benchmarks/load_test.py --requests 200 --concurrency 8 --workers 4
+    python benchmarks/load_test.py --mix english=2,hindi=1,sanskrit=1 --json baseline.json
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import shutil
+import socket
+import argparse
+import tempfile
+import threading
+import subprocess
+import http.cookiejar
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SAMPLE_TEXTS = {
+    'english': [
+        "The Indus Valley Civilisation was a Bronze Age civilisation in the northwestern "
+        "regions of South Asia. Its cities were noted for their urban planning, baked brick "
+        "houses, elaborate drainage systems and water supply systems.",
+        "Photosynthesis is the process by which green plants use sunlight, water and carbon "
+        "dioxide to produce glucose and oxygen. It takes place in the chloroplasts of leaf cells.",
+        "The French Revolution began in 1789 and ended the absolute monarchy in France. It "
+        "spread the ideas of liberty, equality and fraternity across Europe."
+    ],
+    'hindi': [
+        "भारत एक विशाल देश है। यहाँ अनेक भाषाएँ बोली जाती हैं। गंगा भारत की सबसे पवित्र नदी है। "
+        "हिमालय भारत के उत्तर में स्थित है।",
+        "प्रकाश संश्लेषण में पौधे सूर्य के प्रकाश से भोजन बनाते हैं। इस प्रक्रिया में ऑक्सीजन निकलती है।",
+        "महात्मा गांधी ने स्वतंत्रता संग्राम का नेतृत्व किया। उन्होंने सत्य और अहिंसा का मार्ग अपनाया।"
+    ],
+    'sanskrit': [
+        "धर्मो रक्षति रक्षितः। सत्यं वद धर्मं चर। विद्या ददाति विनयं विनयाद्याति पात्रताम्।",
+        "रामः वनं गच्छति। सीता रामेण सह वनं गच्छति। लक्ष्मणः अपि तौ अनुसरति।",
+        "गङ्गा पवित्रा नदी अस्ति। हिमालयात् गङ्गा प्रवहति। जनाः गङ्गायां स्नानं कुर्वन्ति।"
+    ]
+}
+
+PROMPTS = {
+    'english': "history and science",
+    'hindi': "भारत की नदियाँ",
+    'sanskrit': "धर्म और सत्य"
+}
+
+DEVANAGARI_TARGETS = ('sa', 'hi')
+# One Devanagari consonant per Latin letter, ignoring case
+DEVANAGARI_LETTERS = str.maketrans(
+    'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ',
+    'कखगघङचछजझञटठडढणतथदधनपफबभमय' * 2
+)
+
+
+class FakeTranslationServer:
+    """
+    LibreTranslate-compatible server that echoes text back after a fixed delay.
+    
+    Text translated into Sanskrit or Hindi has its Latin letters transliterated
+    to Devanagari, so it passes the generators' script check.
+    """
+    
+    def __init__(self, latency_ms: float = 20.0, host: str = '127.0.0.1', port: int = 0):
+        """
+        Initialize the server.
+        
+        Args:
+            latency_ms: Time each translation takes
+            host: Interface to listen on
+            port: Port to listen on (0 picks a free one)
+        """
+        latency = latency_ms / 1000
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                if self.path.rstrip('/') != '/translate':
+                    self.send_error(404)
+                    return
+                length = int(self.headers.get('Content-Length', 0))
+                payload = json.loads(self.rfile.read(length) or b'{}')
+                time.sleep(latency)
+                text = payload.get('q', '')
+                if payload.get('target') in DEVANAGARI_TARGETS:
+                    text = text.translate(DEVANAGARI_LETTERS)
+                body = json.dumps({'translatedText': text}).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, format, *args):
+                pass
+        
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+    
+    @property
+    def url(self) -> str:
+        """Base URL of the server."""
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+    
+    def start(self) -> str:
+        """
+        Serve in a background thread.
+        
+        Returns:
+            str: Base URL of the server
+        """
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name='fake-translation', daemon=True)
+        self._thread.start()
+        return self.url
+    
+    def stop(self) -> None:
+        """Stop serving."""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+    
+    def __enter__(self) -> 'FakeTranslationServer':
+        self.start()
+        return self
+    
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+
+def make_sample_pdf(path: str, language: str, pages: int = 4) -> str:
+    """
+    Write a PDF with a text layer in the given language.
+    
+    Args:
+        path: Destination path
+        language: Key of SAMPLE_TEXTS
+        pages: Number of pages
+    
+    Returns:
+        str: ``path``
+    """
+    import fitz  # PyMuPDF
+    
+    pdf = fitz.open()
+    paragraphs = SAMPLE_TEXTS[language]
+    for number in range(pages):
+        page = pdf.new_page()
+        text = " ".join(paragraphs[(number + i) % len(paragraphs)] for i in range(len(paragraphs)))
+        page.insert_htmlbox(page.rect + (50, 50, -50, -50), f"<p>{text}</p>")
+    pdf.save(path)
+    return path
+
+
+def free_port() -> int:
+    """Find a free local TCP port."""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class AppServer:
+    """The app under test, started in a subprocess with the stub backends."""
+    
+    def __init__(
+        self,
+        translation_url: str,
+        server: str = 'gunicorn',
+        workers: int = 4,
+        threads: int = 1,
+        generation_latency_ms: float = 50.0,
+        admission: bool = True,
+        warm_cache: bool = False
+    ):
+        """
+        Initialize the server.
+        
+        Args:
+            translation_url: Base URL of the translation server
+            server: ``gunicorn`` or ``flask`` (development server, one process)
+            workers: Gunicorn worker processes
+            threads: Gunicorn threads per worker
+            generation_latency_ms: Time each stub generation call takes
+            admission: Whether admission control stays enabled
+            warm_cache: Whether the question cache and question bank stay
+                enabled, so repeated requests are served from them
+        """
+        self.server = server
+        self.port = free_port()
+        self.workdir = tempfile.mkdtemp(prefix='qg-load-')
+        self.process: Optional[subprocess.Popen] = None
+        self.env = dict(
+            os.environ,
+            GENERATION_BACKEND='stub',
+            STUB_GENERATION_LATENCY_MS=str(generation_latency_ms),
+            TRANSLATION_BACKEND='libretranslate',
+            TRANSLATION_URL=translation_url,
+            PORT=str(self.port),
+            WEB_CONCURRENCY=str(workers),
+            GUNICORN_THREADS=str(threads),
+            FLASK_ENV='production',
+            DEBUG='False',
+            ADMISSION_ENABLED=str(admission),
+            QUESTION_CACHE_ENABLED=str(warm_cache),
+            QUESTION_BANK_ENABLED=str(warm_cache),
+            UPLOAD_FOLDER=os.path.join(self.workdir, 'uploads'),
+            DOCUMENT_CACHE_DIR=os.path.join(self.workdir, 'document_cache'),
+            QUESTION_BANK_PATH=os.path.join(self.workdir, 'question_bank.sqlite3'),
+            CORPUS_DIR=os.path.join(self.workdir, 'corpora'),
+            PROFILE_DIR=os.path.join(self.workdir, 'profiles'),
+            ADMISSION_DIR=os.path.join(self.workdir, 'admission'),
+            PROMETHEUS_MULTIPROC_DIR=os.path.join(self.workdir, 'prometheus')
+        )
+        os.makedirs(self.env['PROMETHEUS_MULTIPROC_DIR'])
+    
+    @property
+    def url(self) -> str:
+        """Base URL of the app."""
+        return f"http://127.0.0.1:{self.port}"
+    
+    def start(self, timeout: float = 120.0) -> str:
+        """
+        Start the app and wait until it reports ready.
+        
+        Args:
+            timeout: Seconds to wait for readiness
+        
+        Returns:
+            str: Base URL of the app
+        
+        Raises:
+            RuntimeError: If the app exits or is not ready in time
+        """
+        if self.server == 'gunicorn':
+            command = [sys.executable, '-m', 'gunicorn', '--config', 'gunicorn.conf.py', 'app:app']
+        else:
+            command = [sys.executable, 'app.py']
+        self.process = subprocess.Popen(command, cwd=ROOT, env=self.env)
+        
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"App exited with code {self.process.returncode}")
+            try:
+                with urllib.request.urlopen(f"{self.url}/healthz/ready", timeout=2) as response:
+                    if response.status == 200:
+                        return self.url
+            except (OSError, urllib.error.HTTPError):
+                pass
+            time.sleep(0.5)
+        self.stop()
+        raise RuntimeError(f"App not ready after {timeout:.0f}s")
+    
+    def worker_pids(self) -> List[int]:
+        """
+        List the processes serving requests.
+        
+        Returns:
+            List[int]: Gunicorn worker pids, or the development server's pid
+        """
+        import psutil
+        
+        if self.process is None:
+            return []
+        try:
+            parent = psutil.Process(self.process.pid)
+            if self.server == 'gunicorn':
+                return [child.pid for child in parent.children()]
+            return [parent.pid]
+        except psutil.Error:
+            return []
+    
+    def stop(self) -> None:
+        """Stop the app and remove its working directory."""
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+
+class RssSampler(threading.Thread):
+    """Records the peak resident memory of a changing set of processes."""
+    
+    def __init__(self, pids, interval: float = 0.25):
+        """
+        Initialize the sampler.
+        
+        Args:
+            pids: Callable returning the pids to sample
+            interval: Seconds between samples
+        """
+        super().__init__(name='rss-sampler', daemon=True)
+        self.pids = pids
+        self.interval = interval
+        self.peak: Dict[int, int] = {}
+        self._stopped = threading.Event()
+    
+    def run(self) -> None:
+        import psutil
+        
+        while not self._stopped.is_set():
+            for pid in self.pids():
+                try:
+                    rss = psutil.Process(pid).memory_info().rss
+                except psutil.Error:
+                    continue
+                self.peak[pid] = max(rss, self.peak.get(pid, 0))
+            self._stopped.wait(self.interval)
+    
+    def stop(self) -> Dict[int, int]:
+        """
+        Stop sampling.
+        
+        Returns:
+            Dict[int, int]: Peak RSS in bytes per pid
+        """
+        self._stopped.set()
+        self.join()
+        return dict(self.peak)
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args: Any, **kwargs: Any) -> None:
+        # /process redirects only when it fails; report the redirect itself
+        return None
+
+
+def encode_multipart(fields: Dict[str, str], files: Dict[str, Tuple[str, bytes]]) -> Tuple[bytes, str]:
+    """
+    Encode a ``multipart/form-data`` body.
+    
+    Args:
+        fields: Form fields
+        files: Field name to ``(filename, content)``
+    
+    Returns:
+        Tuple[bytes, str]: Body and its Content-Type header
+    """
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in fields.items():
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode('utf-8')
+        )
+    for name, (filename, content) in files.items():
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+            f'Content-Type: application/pdf\r\n\r\n'.encode('utf-8') + content + b'\r\n'
+        )
+    parts.append(f'--{boundary}--\r\n'.encode('utf-8'))
+    return b''.join(parts), f'multipart/form-data; boundary={boundary}'
+
+
+def replay_request(url: str, language: str, pdf: bytes, prompt: str, questions: int) -> Tuple[int, float]:
+    """
+    Select a language and process one upload as a new client.
+    
+    Args:
+        url: Base URL of the app
+        language: Language to select
+        pdf: PDF content
+        prompt: Generation prompt
+        questions: Number of questions to ask for
+    
+    Returns:
+        Tuple[int, float]: HTTP status of ``/process`` (0 if it could not be
+        sent) and its latency in seconds
+    """
+    opener = urllib.request.build_opener(
+        urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()),
+        _NoRedirect()
+    )
+    try:
+        opener.open(
+            f"{url}/upload",
+            data=urllib.parse.urlencode({'language': language}).encode('utf-8'),
+            timeout=60
+        ).read()
+    except (OSError, urllib.error.HTTPError):
+        return 0, 0.0
+    
+    body, content_type = encode_multipart(
+        {'prompt': prompt, 'total_questions': str(questions)},
+        # Distinct names, as from distinct users; uploads are saved under their name
+        {'file': (f"{language}-{uuid.uuid4().hex[:12]}.pdf", pdf)}
+    )
+    request = urllib.request.Request(f"{url}/process", data=body, headers={'Content-Type': content_type})
+    start = time.perf_counter()
+    try:
+        with opener.open(request, timeout=300) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except OSError:
+        status = 0
+    return status, time.perf_counter() - start
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """
+    Nearest-rank percentile.
+    
+    Args:
+        values: Samples
+        q: Percentile between 0 and 100
+    
+    Returns:
+        float: The percentile, or 0.0 without samples
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, int(-(-q * len(ordered) // 100)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def summarize(results: Sequence[Tuple[str, int, float]], elapsed: float) -> Dict[str, Any]:
+    """
+    Summarize replayed requests.
+    
+    Args:
+        results: ``(language, status, latency)`` of each request
+        elapsed: Wall-clock duration of the run in seconds
+    
+    Returns:
+        Dict[str, Any]: Totals, throughput of successful requests, status
+        counts and latency percentiles (ms), overall and per language
+    """
+    def latency_stats(latencies: List[float]) -> Dict[str, float]:
+        return {
+            'p50_ms': round(percentile(latencies, 50) * 1000, 1),
+            'p95_ms': round(percentile(latencies, 95) * 1000, 1),
+            'p99_ms': round(percentile(latencies, 99) * 1000, 1),
+            'max_ms': round(max(latencies, default=0.0) * 1000, 1)
+        }
+    
+    statuses: Dict[str, int] = {}
+    for _, status, _ in results:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    ok = [latency for _, status, latency in results if status == 200]
+    
+    languages = {}
+    for language in sorted({language for language, _, _ in results}):
+        latencies = [latency for name, status, latency in results if name == language and status == 200]
+        counts: Dict[str, int] = {}
+        for name, status, _ in results:
+            if name == language:
+                counts[str(status)] = counts.get(str(status), 0) + 1
+        languages[language] = dict(requests=sum(counts.values()), statuses=counts, **latency_stats(latencies))
+    
+    return {
+        'requests': len(results),
+        'elapsed_s': round(elapsed, 2),
+        'throughput_rps': round(len(ok) / elapsed, 2) if elapsed else 0.0,
+        'statuses': statuses,
+        'latency': latency_stats(ok),
+        'languages': languages
+    }
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    """
+    Parse a request mix such as ``english=2,hindi=1,sanskrit=1``.
+    
+    Args:
+        spec: Comma-separated ``language=weight`` pairs
+    
+    Returns:
+        Dict[str, float]: Weight per language
+    
+    Raises:
+        ValueError: If an entry is malformed or names an unknown language
+    """
+    mix = {}
+    for entry in filter(None, (part.strip() for part in spec.split(','))):
+        language, _, weight = entry.partition('=')
+        language = language.strip().lower()
+        if language not in SAMPLE_TEXTS:
+            raise ValueError(f"Unknown language in mix: {language}")
+        mix[language] = float(weight or 1)
+    if not mix or sum(mix.values()) <= 0:
+        raise ValueError(f"Empty request mix: {spec!r}")
+    return mix
+
+
+def run_load(
+    url: str,
+    pdfs: Dict[str, bytes],
+    mix: Dict[str, float],
+    requests: int,
+    concurrency: int,
+    questions: int,
+    seed: int = 0,
+    warmup: int = 0
+) -> Dict[str, Any]:
+    """
+    Replay a mix of uploads against a running app.
+    
+    Args:
+        url: Base URL of the app
+        pdfs: PDF content per language
+        mix: Weight per language
+        requests: Number of requests to send
+        concurrency: Requests in flight at once
+        questions: Questions asked for per request
+        seed: Seed of the language schedule, for repeatable runs
+        warmup: Requests per language sent first and left out of the summary
+    
+    Returns:
+        Dict[str, Any]: Summary (see ``summarize``)
+    """
+    rng = random.Random(seed)
+    schedule = rng.choices(list(mix), weights=list(mix.values()), k=requests)
+    
+    def send(language: str) -> Tuple[str, int, float]:
+        status, latency = replay_request(url, language, pdfs[language], PROMPTS[language], questions)
+        return language, status, latency
+    
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(send, [language for language in mix for _ in range(warmup)]))
+        start = time.perf_counter()
+        results = list(executor.map(send, schedule))
+    return summarize(results, time.perf_counter() - start)
+
+
+def print_report(summary: Dict[str, Any]) -> None:
+    """Print a summary in a readable form."""
+    latency = summary['latency']
+    print(f"requests: {summary['requests']} in {summary['elapsed_s']:.1f}s, "
+          f"{summary['throughput_rps']:.2f} successful req/s")
+    print(f"statuses: {summary['statuses']}")
+    print(f"latency:  p50 {latency['p50_ms']:.0f} ms, p95 {latency['p95_ms']:.0f} ms, "
+          f"p99 {latency['p99_ms']:.0f} ms, max {latency['max_ms']:.0f} ms")
+    for language, stats in summary['languages'].items():
+        print(f"  {language:<9} {stats['requests']:>5} req  p50 {stats['p50_ms']:>7.0f} ms  "
+              f"p95 {stats['p95_ms']:>7.0f} ms  p99 {stats['p99_ms']:>7.0f} ms  {stats['statuses']}")
+    for pid, rss in sorted(summary.get('worker_peak_rss_mb', {}).items()):
+        print(f"  worker {pid}: peak RSS {rss:.1f} MB")
+
+
+def main() -> None:
+    """Run the load test from the command line."""
+    parser = argparse.ArgumentParser(description="Load test with a stub model and fake translator")
+    parser.add_argument('--url', help="Load an already running app instead of starting one")
+    parser.add_argument('--server', choices=('gunicorn', 'flask'), default='gunicorn')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=1)
+    parser.add_argument('--requests', type=int, default=100)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--mix', default="english=2,hindi=1,sanskrit=1")
+    parser.add_argument('--questions', type=int, default=5)
+    parser.add_argument('--pages', type=int, default=4, help="Pages of each generated sample PDF")
+    parser.add_argument('--pdf', action='append', default=[], metavar='LANGUAGE=PATH',
+                        help="Use this PDF for a language instead of a generated one")
+    parser.add_argument('--generation-latency-ms', type=float, default=50.0)
+    parser.add_argument('--translation-latency-ms', type=float, default=20.0)
+    parser.add_argument('--no-admission', action='store_true', help="Disable admission control")
+    parser.add_argument('--warm-cache', action='store_true',
+                        help="Keep the question cache and bank enabled to measure cached requests")
+    parser.add_argument('--warmup', type=int, default=2, help="Unmeasured requests per language sent first")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help="Write the summary to this file")
+    args = parser.parse_args()
+    
+    mix = parse_mix(args.mix)
+    overrides = dict(entry.split('=', 1) for entry in args.pdf)
+    pdfs = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for language in mix:
+            path = overrides.get(language) or make_sample_pdf(
+                os.path.join(directory, f"{language}.pdf"), language, pages=args.pages
+            )
+            with open(path, 'rb') as fh:
+                pdfs[language] = fh.read()
+    
+    if args.url:
+        summary = run_load(args.url.rstrip('/'), pdfs, mix, args.requests, args.concurrency, args.questions, args.seed, args.warmup)
+    else:
+        with FakeTranslationServer(latency_ms=args.translation_latency_ms) as translator:
+            app_server = AppServer(
+                translator.url,
+                server=args.server,
+                workers=args.workers,
+                threads=args.threads,
+                generation_latency_ms=args.generation_latency_ms,
+                admission=not args.no_admission,
+                warm_cache=args.warm_cache
+            )
+            try:
+                url = app_server.start()
+                sampler = RssSampler(app_server.worker_pids)
+                sampler.start()
+                summary = run_load(url, pdfs, mix, args.requests, args.concurrency, args.questions, args.seed, args.warmup)
+                summary['worker_peak_rss_mb'] = {
+                    pid: round(rss / 2 ** 20, 1) for pid, rss in sampler.stop().items()
+                }
+            finally:
+                app_server.stop()
+    
+    summary['config'] = {key: value for key, value in vars(args).items() if key != 'json'}
+    print_report(summary)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as fh:
+            json.dump(summary, fh, indent=2, ensure_ascii=False)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+"""
+Adaptive generation budget for the chunk-by-chunk RAG loop.
+
+Every generated sequence costs a decoder pass, but sanitization and
+deduplication throw an unpredictable share of them away. ``GenerationBudget``
+tracks the observed keep-rate of a request and sizes ``num_return_sequences``
+for each remaining chunk so the target is reached with as little overshoot as
+possible.
+"""
+import math
+import logging
+
+from config import Config
+from metrics import GENERATIONS_TOTAL, GENERATIONS_WASTED
+
+logger = logging.getLogger(__name__)
+
+
+class GenerationBudget:
+    """Decides how many sequences to request per chunk from the observed keep-rate."""
+    
+    def __init__(
+        self,
+        target: int,
+        per_chunk: int = None,
+        max_per_chunk: int = None,
+        prior_keep_rate: float = None,
+        prior_weight: float = 2.0,
+        adaptive: bool = None
+    ):
+        """
+        Initialize the budget.
+        
+        Args:
+            target: Number of questions the request needs
+            per_chunk: Preferred sequences per chunk (defaults to Config.MAX_QUESTIONS_PER_CHUNK)
+            max_per_chunk: Upper bound on sequences per chunk (defaults to
+                Config.GENERATION_MAX_RETURN_SEQUENCES); beam search cannot
+                return more sequences than Config.GENERATION_NUM_BEAMS, so
+                both bounds are capped at the beam count
+            prior_keep_rate: Keep-rate assumed before anything is observed
+                (defaults to Config.GENERATION_PRIOR_KEEP_RATE)
+            prior_weight: Weight of the prior, in generated sequences
+            adaptive: If False, always request ``per_chunk`` sequences
+                (defaults to Config.GENERATION_BUDGET_ADAPTIVE)
+        """
+        self.target = max(int(target), 0)
+        beams = max(Config.GENERATION_NUM_BEAMS, 1)
+        self.per_chunk = min(per_chunk or Config.MAX_QUESTIONS_PER_CHUNK, beams)
+        self.max_per_chunk = min(max(max_per_chunk or Config.GENERATION_MAX_RETURN_SEQUENCES, self.per_chunk), beams)
+        self.prior_keep_rate = Config.GENERATION_PRIOR_KEEP_RATE if prior_keep_rate is None else prior_keep_rate
+        self.prior_weight = prior_weight
+        self.adaptive = Config.GENERATION_BUDGET_ADAPTIVE if adaptive is None else adaptive
+        
+        self.generated = 0
+        self.kept = 0
+        # Questions served from the question cache, kept without generating
+        self.cached = 0
+    
+    @property
+    def keep_rate(self) -> float:
+        """Smoothed share of generated sequences that were kept (at least 0.1)."""
+        kept = self.kept - self.cached
+        rate = (kept + self.prior_keep_rate * self.prior_weight) / (self.generated + self.prior_weight)
+        return min(max(rate, 0.1), 1.0)
+    
+    @property
+    def remaining(self) -> int:
+        """Questions still needed."""
+        return max(self.target - self.kept, 0)
+    
+    @property
+    def done(self) -> bool:
+        """True once the target is reached."""
+        return self.kept >= self.target
+    
+    @property
+    def wasted(self) -> int:
+        """Generated sequences that will not end up in the response."""
+        needed = max(self.target - self.cached, 0)
+        return self.generated - min(self.kept - self.cached, needed)
+    
+    def next_count(self, remaining_chunks: int = 1) -> int:
+        """
+        Number of sequences to request for the next chunk.
+        
+        Asks for the preferred count while plenty is still needed, only as many
+        as the keep-rate says are missing near the end, and more than the
+        preferred count when the remaining chunks would otherwise fall short.
+        
+        Args:
+            remaining_chunks: Chunks left to generate from, including this one
+        
+        Returns:
+            int: Sequences to request (0 once the target is reached)
+        """
+        if self.done:
+            return 0
+        if not self.adaptive:
+            return self.per_chunk
+        
+        expected = math.ceil(self.remaining / self.keep_rate)
+        spread = math.ceil(expected / max(remaining_chunks, 1))
+        count = min(expected, max(self.per_chunk, spread))
+        return min(max(count, 1), self.max_per_chunk)
+    
+    def record(self, generated: int, kept: int, cached: bool = False) -> None:
+        """
+        Record the outcome of one chunk.
+        
+        Args:
+            generated: Sequences requested from the model
+            kept: Questions that survived sanitization and deduplication
+            cached: True if the chunk's questions came from the question
+                cache; they count towards the target but not as generated
+        """
+        self.kept += kept
+        if cached:
+            self.cached += kept
+        else:
+            self.generated += generated
+    
+    def report(self, source: str) -> None:
+        """
+        Publish the request's generated and wasted sequence counts.
+        
+        Args:
+            source: Metric label for the generating pipeline (e.g. ``model``)
+        """
+        GENERATIONS_TOTAL.labels(source=source).inc(self.generated)
+        GENERATIONS_WASTED.labels(source=source).inc(self.wasted)
+        logger.info(
+            f"Generation budget: {self.generated} generated, {self.kept} kept "
+            f"(keep-rate {self.keep_rate:.2f}), {self.wasted} wasted"
+        )
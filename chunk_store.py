@@ -0,0 +1,218 @@
+"""
+Compact storage of a document's chunks.
+
+Instead of one Python string per chunk, ``ChunkStore`` keeps the document text
+once and describes each chunk by ``(start, end)`` character offsets, plus the
+page and sentence it starts in. Chunks are sliced out only when accessed. A
+store behaves like a read-only list of strings, so it can be passed wherever
+``text_chunks`` are expected, and it is saved to the document cache as a
+single ``.npz`` file.
+"""
+import os
+import re
+import logging
+from typing import Iterator, List, Sequence, Tuple, Union
+
+import numpy as np
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Sentence ends in Latin and Devanagari text (danda and double danda included)
+SENTENCE_END_PATTERN = re.compile(r'[.!?।॥]+\s+')
+
+
+class ChunkStore(Sequence):
+    """Chunks of one document as offsets into its text."""
+    
+    def __init__(
+        self,
+        text: str,
+        starts: np.ndarray,
+        ends: np.ndarray,
+        page_ids: np.ndarray = None,
+        sentence_ids: np.ndarray = None
+    ):
+        """
+        Initialize the store.
+        
+        Args:
+            text: Full document text
+            starts: Start offset of each chunk in ``text``
+            ends: End offset (exclusive) of each chunk in ``text``
+            page_ids: Zero-based page each chunk starts on
+            sentence_ids: Zero-based sentence each chunk starts in
+        """
+        self.text = text
+        self.starts = np.asarray(starts, dtype=np.int64)
+        self.ends = np.asarray(ends, dtype=np.int64)
+        self.page_ids = np.asarray(
+            np.zeros(len(self.starts)) if page_ids is None else page_ids, dtype=np.int32
+        )
+        self.sentence_ids = np.asarray(
+            np.zeros(len(self.starts)) if sentence_ids is None else sentence_ids, dtype=np.int32
+        )
+    
+    @classmethod
+    def from_pages(cls, pages: Sequence[str], chunk_size: int = None) -> 'ChunkStore':
+        """
+        Chunk the text of a document given page by page.
+        
+        Non-empty pages are joined with a single space. Like ``utils.split_text_into_chunks``,
+        the text is cut into windows of ``chunk_size`` characters, each window is
+        stripped of surrounding whitespace and blank windows are skipped.
+        
+        Args:
+            pages: Cleaned text of each page
+            chunk_size: Window size in characters (defaults to Config.CHUNK_SIZE)
+        
+        Returns:
+            ChunkStore: The chunked document
+        """
+        if chunk_size is None:
+            chunk_size = Config.CHUNK_SIZE
+        
+        # Empty pages add no text but keep the page numbering
+        page_starts, page_numbers, texts = [], [], []
+        offset = 0
+        for page_number, page in enumerate(pages):
+            if page:
+                page_starts.append(offset)
+                page_numbers.append(page_number)
+                texts.append(page)
+                offset += len(page) + 1
+        text = ' '.join(texts)
+        
+        starts, ends = [], []
+        for window_start in range(0, len(text), chunk_size):
+            start = window_start
+            end = min(window_start + chunk_size, len(text))
+            while start < end and text[start].isspace():
+                start += 1
+            while end > start and text[end - 1].isspace():
+                end -= 1
+            if start < end:
+                starts.append(start)
+                ends.append(end)
+        
+        starts = np.asarray(starts, dtype=np.int64)
+        sentence_ends = np.fromiter(
+            (match.end() for match in SENTENCE_END_PATTERN.finditer(text)),
+            dtype=np.int64
+        )
+        page_index = np.searchsorted(np.asarray(page_starts, dtype=np.int64), starts, side='right') - 1
+        page_ids = np.asarray(page_numbers, dtype=np.int32)[page_index] if len(starts) else page_index
+        sentence_ids = np.searchsorted(sentence_ends, starts, side='right')
+        return cls(text, starts, ends, page_ids, sentence_ids)
+    
+    @classmethod
+    def from_chunks(cls, chunks: Sequence[str]) -> 'ChunkStore':
+        """
+        Pack already materialized chunks into a store.
+        
+        Args:
+            chunks: Chunk strings
+        
+        Returns:
+            ChunkStore: Store holding the chunks (joined with newlines)
+        """
+        if isinstance(chunks, ChunkStore):
+            return chunks
+        starts, ends = [], []
+        offset = 0
+        for chunk in chunks:
+            starts.append(offset)
+            ends.append(offset + len(chunk))
+            offset += len(chunk) + 1
+        return cls('\n'.join(chunks), starts, ends)
+    
+    def select(self, indices: Sequence[int]) -> 'ChunkStore':
+        """
+        Pick chunks by position, keeping their offsets into the document text.
+        
+        Args:
+            indices: Positions of the chunks, in the order wanted
+        
+        Returns:
+            ChunkStore: Store over the same text holding only those chunks
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        return ChunkStore(
+            self.text,
+            self.starts[indices],
+            self.ends[indices],
+            self.page_ids[indices],
+            self.sentence_ids[indices]
+        )
+    
+    def location(self, index: int) -> Tuple[int, int, int]:
+        """
+        Locate a chunk in the document.
+        
+        Args:
+            index: Position of the chunk
+        
+        Returns:
+            Tuple[int, int, int]: Start offset, end offset and zero-based page
+        """
+        return int(self.starts[index]), int(self.ends[index]), int(self.page_ids[index])
+    
+    def __len__(self) -> int:
+        return len(self.starts)
+    
+    def __getitem__(self, index: Union[int, slice]) -> Union[str, List[str]]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return self.text[self.starts[index]:self.ends[index]]
+    
+    def __iter__(self) -> Iterator[str]:
+        text = self.text
+        for start, end in zip(self.starts.tolist(), self.ends.tolist()):
+            yield text[start:end]
+    
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (ChunkStore, list, tuple)):
+            return list(self) == list(other)
+        return NotImplemented
+    
+    def __repr__(self) -> str:
+        return f"ChunkStore({len(self)} chunks, {len(self.text)} characters)"
+    
+    def save(self, path: str) -> None:
+        """
+        Save the store as a single ``.npz`` file.
+        
+        Args:
+            path: Destination path
+        """
+        tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(
+            tmp_path,
+            text=np.frombuffer(self.text.encode('utf-8'), dtype=np.uint8),
+            starts=self.starts,
+            ends=self.ends,
+            page_ids=self.page_ids,
+            sentence_ids=self.sentence_ids
+        )
+        os.replace(tmp_path, path)
+    
+    @classmethod
+    def load(cls, path: str) -> 'ChunkStore':
+        """
+        Load a store saved with ``save``.
+        
+        Args:
+            path: Path to the ``.npz`` file
+        
+        Returns:
+            ChunkStore: The loaded store
+        """
+        with np.load(path) as data:
+            return cls(
+                data['text'].tobytes().decode('utf-8'),
+                data['starts'],
+                data['ends'],
+                data['page_ids'],
+                data['sentence_ids']
+            )
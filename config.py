@@ -2,6 +2,7 @@
 Configuration settings for the Multi-Lingual Question Generation application.
 """
 import os
+import tempfile
 from typing import Dict, Any
 from dotenv import load_dotenv
 
@@ -27,19 +28,167 @@ class Config:
     DEFAULT_TOP_N_CHUNKS = 5
     CHUNK_SIZE = 1000
     
-    # Translation settings
+    # Generation backend: 'transformers', or 'stub' for a fast deterministic
+    # stand-in (load tests, development without model weights)
+    GENERATION_BACKEND = os.getenv('GENERATION_BACKEND', 'transformers').lower()
+    STUB_GENERATION_LATENCY_MS = float(os.getenv('STUB_GENERATION_LATENCY_MS', 50))
+    
+    # Adaptive generation budget: sequences per chunk follow the observed
+    # keep-rate, starting from MAX_QUESTIONS_PER_CHUNK; the maximum is capped
+    # at the beam count used for generation
+    GENERATION_NUM_BEAMS = int(os.getenv('GENERATION_NUM_BEAMS', 5))
+    GENERATION_BUDGET_ADAPTIVE = os.getenv('GENERATION_BUDGET_ADAPTIVE', 'True').lower() == 'true'
+    GENERATION_MAX_RETURN_SEQUENCES = int(os.getenv('GENERATION_MAX_RETURN_SEQUENCES', 5))
+    GENERATION_PRIOR_KEEP_RATE = float(os.getenv('GENERATION_PRIOR_KEEP_RATE', 0.7))
+    
+    # Cache of generated questions per chunk and decoding profile; optionally
+    # generate questions for all chunks of a document in the background
+    QUESTION_CACHE_ENABLED = os.getenv('QUESTION_CACHE_ENABLED', 'True').lower() == 'true'
+    PREGENERATE_QUESTIONS = os.getenv('PREGENERATE_QUESTIONS', 'False').lower() == 'true'
+    # Least recently used entries are pruned beyond these limits (0 = no limit)
+    QUESTION_CACHE_MAX_MB = int(os.getenv('QUESTION_CACHE_MAX_MB', 512))
+    QUESTION_CACHE_MAX_AGE_DAYS = float(os.getenv('QUESTION_CACHE_MAX_AGE_DAYS', 30))
+    BACKGROUND_WORKERS = int(os.getenv('BACKGROUND_WORKERS', 1))
+    
+    # How long /process waits for an upload's background preparation
+    DOCUMENT_PREPARE_TIMEOUT = float(os.getenv('DOCUMENT_PREPARE_TIMEOUT', 120))
+    # Uploaded documents unused for this long are deleted (0 = keep forever)
+    DOCUMENT_TTL_HOURS = float(os.getenv('DOCUMENT_TTL_HOURS', 24))
+    
+    # Admission control for generation requests. Capacity is counted in cost
+    # units (a request costs one unit plus one per ADMISSION_PAGES_PER_UNIT
+    # pages and per ADMISSION_QUESTIONS_PER_UNIT questions) and shared by all
+    # workers through lock files in ADMISSION_DIR. ADMISSION_LANGUAGE_CAPACITY
+    # caps single languages, e.g. "english=4,sanskrit=2".
+    ADMISSION_ENABLED = os.getenv('ADMISSION_ENABLED', 'True').lower() == 'true'
+    ADMISSION_DIR = os.getenv('ADMISSION_DIR', os.path.join(tempfile.gettempdir(), 'qg-admission'))
+    ADMISSION_GLOBAL_CAPACITY = int(os.getenv('ADMISSION_GLOBAL_CAPACITY', 8))
+    ADMISSION_LANGUAGE_CAPACITY = {
+        language.strip().lower(): int(capacity)
+        for language, _, capacity in (
+            item.partition('=') for item in os.getenv('ADMISSION_LANGUAGE_CAPACITY', '').split(',')
+        )
+        if language.strip() and capacity.strip()
+    }
+    ADMISSION_CLIENT_CONCURRENCY = int(os.getenv('ADMISSION_CLIENT_CONCURRENCY', 1))
+    ADMISSION_PAGES_PER_UNIT = int(os.getenv('ADMISSION_PAGES_PER_UNIT', 100))
+    ADMISSION_QUESTIONS_PER_UNIT = int(os.getenv('ADMISSION_QUESTIONS_PER_UNIT', 20))
+    ADMISSION_MAX_WAIT = float(os.getenv('ADMISSION_MAX_WAIT', 5))
+    ADMISSION_RETRY_AFTER = int(os.getenv('ADMISSION_RETRY_AFTER', 15))
+    API_KEY_HEADER = 'X-API-Key'
+    
+    # Questions whose character n-gram Jaccard similarity reaches this are
+    # dropped as near-duplicates (1.0 keeps everything but exact duplicates)
+    NEAR_DUPLICATE_THRESHOLD = float(os.getenv('NEAR_DUPLICATE_THRESHOLD', 0.7))
+    
+    # Share of a question's letters that must be in its language's script
+    QUESTION_MIN_SCRIPT_RATIO = float(os.getenv('QUESTION_MIN_SCRIPT_RATIO', 0.5))
+    
+    # CPU thread policy (0 = derive from available cores / WEB_CONCURRENCY);
+    # WEB_CONCURRENCY is also the number of gunicorn workers (gunicorn.conf.py)
+    WEB_CONCURRENCY = int(os.getenv('WEB_CONCURRENCY', 4))
+    TORCH_INTRA_OP_THREADS = int(os.getenv('TORCH_INTRA_OP_THREADS', 0))
+    TORCH_INTER_OP_THREADS = int(os.getenv('TORCH_INTER_OP_THREADS', 0))
+    TORCH_PIN_CORES = os.getenv('TORCH_PIN_CORES', 'False').lower() == 'true'
+    
+    # Generation batching settings (the inference server always batches)
+    GENERATION_BATCHING_ENABLED = os.getenv('GENERATION_BATCHING_ENABLED', 'False').lower() == 'true'
+    GENERATION_BATCH_MAX_SIZE = int(os.getenv('GENERATION_BATCH_MAX_SIZE', 8))
+    GENERATION_BATCH_MAX_WAIT_MS = float(os.getenv('GENERATION_BATCH_MAX_WAIT_MS', 10))
+    
+    # Inference server settings (optional process that owns the model for all workers)
+    INFERENCE_SERVER_SOCKET = os.getenv('INFERENCE_SERVER_SOCKET')
+    INFERENCE_SERVER_AUTOSTART = os.getenv('INFERENCE_SERVER_AUTOSTART', 'True').lower() == 'true'
+    INFERENCE_SERVER_AUTHKEY = os.getenv('INFERENCE_SERVER_AUTHKEY', SECRET_KEY).encode('utf-8')
+    INFERENCE_CONNECT_TIMEOUT = float(os.getenv('INFERENCE_CONNECT_TIMEOUT', 300))
+    INFERENCE_REQUEST_TIMEOUT = float(os.getenv('INFERENCE_REQUEST_TIMEOUT', 120))
+    
+    # Startup settings: languages whose models are loaded and warmed up before
+    # serving; other languages load on their first request
+    PRELOAD_LANGUAGES = [
+        language.strip().lower()
+        for language in os.getenv('PRELOAD_LANGUAGES', 'english,hindi,sanskrit').split(',')
+        if language.strip()
+    ]
+    WARMUP_ENABLED = os.getenv('WARMUP_ENABLED', 'True').lower() == 'true'
+    
+    # Languages served by this deployment (empty: every registered language).
+    # Languages register themselves in languages/registry.py.
+    ENABLED_LANGUAGES = [
+        language.strip().lower()
+        for language in os.getenv('ENABLED_LANGUAGES', '').split(',')
+        if language.strip()
+    ]
+    
+    # Retrieval settings: 'tfidf', 'dense' (sentence embeddings) or 'bm25'
+    # (BM25 blended with TF-IDF over a per-document inverted index)
+    RETRIEVER = os.getenv('RETRIEVER', 'tfidf').lower()
+    EMBEDDING_MODEL = os.getenv(
+        'EMBEDDING_MODEL', 'sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2'
+    )
+    
+    BM25_K1 = float(os.getenv('BM25_K1', 1.5))
+    BM25_B = float(os.getenv('BM25_B', 0.75))
+    BM25_WEIGHT = float(os.getenv('BM25_WEIGHT', 0.5))
+    RETRIEVAL_INDEX_CACHE_SIZE = int(os.getenv('RETRIEVAL_INDEX_CACHE_SIZE', 8))
+    
+    # Per-document cache of embeddings, indexes and other derived data
+    DOCUMENT_CACHE_DIR = os.getenv('DOCUMENT_CACHE_DIR', 'document_cache')
+    
+    # Cache of extracted text per page content, shared across documents and
+    # their revised editions
+    PAGE_CACHE_ENABLED = os.getenv('PAGE_CACHE_ENABLED', 'True').lower() == 'true'
+    # Least recently used pages are pruned beyond these limits (0 = no limit)
+    PAGE_CACHE_MAX_MB = int(os.getenv('PAGE_CACHE_MAX_MB', 1024))
+    PAGE_CACHE_MAX_AGE_DAYS = float(os.getenv('PAGE_CACHE_MAX_AGE_DAYS', 90))
+    
+    # OCR of pages without a text layer (needs the tesseract binary and pytesseract)
+    OCR_ENABLED = os.getenv('OCR_ENABLED', 'True').lower() == 'true'
+    OCR_LANGUAGES = os.getenv('OCR_LANGUAGES', 'hin+san+eng')
+    OCR_DPI = int(os.getenv('OCR_DPI', 300))
+    OCR_WORKERS = int(os.getenv('OCR_WORKERS', 0))  # 0 = one per CPU core
+    
+    # Persistent question bank: questions served again for the same document
+    # and a prompt with at least QUESTION_BANK_SIMILARITY word overlap
+    QUESTION_BANK_ENABLED = os.getenv('QUESTION_BANK_ENABLED', 'True').lower() == 'true'
+    # Database file; empty means question_bank.sqlite3 in DOCUMENT_CACHE_DIR
+    QUESTION_BANK_PATH = os.getenv('QUESTION_BANK_PATH', '')
+    QUESTION_BANK_SIMILARITY = float(os.getenv('QUESTION_BANK_SIMILARITY', 0.75))
+    
+    # Named multi-document corpora (manifests only; chunks live in the document cache)
+    CORPUS_DIR = os.getenv('CORPUS_DIR', 'corpora')
+    
+    # Translation settings: 'google' (googletrans) or 'libretranslate'
+    # (a LibreTranslate-compatible server at TRANSLATION_URL)
+    TRANSLATION_BACKEND = os.getenv('TRANSLATION_BACKEND', 'google').lower()
+    TRANSLATION_URL = os.getenv('TRANSLATION_URL', 'http://localhost:5001')
+    TRANSLATION_API_KEY = os.getenv('TRANSLATION_API_KEY')
     TRANSLATION_TIMEOUT = 10  # seconds
     
+    # Metrics settings (set PROMETHEUS_MULTIPROC_DIR when running several workers)
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'True').lower() == 'true'
+    
+    # Memory accounting: tracemalloc around every pipeline stage (opt-in, slow),
+    # and a gunicorn worker restart once its RSS exceeds WORKER_MAX_RSS_MB (0 = never)
+    MEMORY_TRACE_STAGES = os.getenv('MEMORY_TRACE_STAGES', 'False').lower() == 'true'
+    MEMORY_TRACE_TOP = int(os.getenv('MEMORY_TRACE_TOP', 5))
+    WORKER_MAX_RSS_MB = int(os.getenv('WORKER_MAX_RSS_MB', 0))
+    
+    # Request profiling settings (opt-in)
+    PROFILE_DIR = os.getenv('PROFILE_DIR', 'profiles')
+    PROFILE_SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', 0.0))
+    PROFILE_ADMIN_TOKEN = os.getenv('PROFILE_ADMIN_TOKEN')
+    PROFILE_HEADER = 'X-Profile-Token'
+    PROFILE_MAX_RETAINED = int(os.getenv('PROFILE_MAX_RETAINED', 20))
+    
+    # Administrative routes (corpus changes) require this token in ADMIN_HEADER;
+    # without a token they are disabled
+    ADMIN_TOKEN = os.getenv('ADMIN_TOKEN')
+    ADMIN_HEADER = 'X-Admin-Token'
+    
     # Logging settings
     LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
     LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    
-    # Supported languages
-    SUPPORTED_LANGUAGES = {
-        'english': 'en',
-        'hindi': 'hi', 
-        'sanskrit': 'sa'
-    }
 
 class DevelopmentConfig(Config):
     """Development configuration."""
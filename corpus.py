@@ -0,0 +1,305 @@
+"""
+Cross-document corpora for generating questions from many PDFs with one prompt.
+
+A corpus is a named set of registered documents. Registering a document
+extracts and chunks it once and builds a BM25 segment over its chunks, stored
+in the document cache. Searching scores every segment with collection-wide
+statistics (idf and average chunk length summed over the segments), so
+documents can be added and removed without rebuilding anything else.
+"""
+import os
+import re
+import json
+import time
+import fcntl
+import logging
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from chunk_store import ChunkStore
+from config import Config
+from document_cache import document_cache
+from retrieval import SparseIndex, tokenize, top_k_indices
+from utils import file_sha256
+
+logger = logging.getLogger(__name__)
+
+CORPUS_NAME_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+# Chunks depend on the extractor of the document's language, so the cached
+# artefacts are named per language (see ``artefact_names``)
+ARTEFACT_PREFIX = 'corpus-'
+CHUNKS_NAME = ARTEFACT_PREFIX + 'chunks-{language}.npz'
+SEGMENT_NAME = ARTEFACT_PREFIX + 'bm25-{language}.npz'
+# Language of manifest entries written before documents had one
+DEFAULT_LANGUAGE = 'english'
+
+
+def validate_corpus_name(name: str) -> bool:
+    """
+    Check that a corpus name is safe to use as a directory name.
+    
+    Args:
+        name: Corpus name
+        
+    Returns:
+        bool: True if the name only uses letters, digits, '-' and '_'
+    """
+    return bool(name and CORPUS_NAME_PATTERN.match(name))
+
+
+def artefact_names(language: str) -> Tuple[str, str]:
+    """
+    Get the cache names of a document's chunks and BM25 segment.
+    
+    Args:
+        language: Language whose extractor chunked the document
+        
+    Returns:
+        Tuple[str, str]: Chunks name and segment name
+    """
+    return CHUNKS_NAME.format(language=language), SEGMENT_NAME.format(language=language)
+
+
+class Corpus:
+    """A named collection of documents searchable as one index."""
+    
+    def __init__(self, name: str, root: str = None, cache=None):
+        """
+        Open (or create) a corpus.
+        
+        Args:
+            name: Corpus name
+            root: Directory holding all corpora (defaults to Config.CORPUS_DIR)
+            cache: Document cache for chunks and segments (defaults to the global cache)
+            
+        Raises:
+            ValueError: If the name is not a valid corpus name
+        """
+        if not validate_corpus_name(name):
+            raise ValueError(f"Invalid corpus name: {name}")
+        self.name = name
+        self.directory = os.path.join(root or Config.CORPUS_DIR, name)
+        self.manifest_path = os.path.join(self.directory, 'manifest.json')
+        self.cache = cache or document_cache
+        
+        self._lock = threading.Lock()
+        self._manifest: Dict[str, Dict[str, Any]] = {}
+        self._manifest_mtime: Optional[float] = None
+        # Loaded segments by (document id, language)
+        self._segments: Dict[Tuple[str, str], SparseIndex] = {}
+        self._chunks: Dict[Tuple[str, str], ChunkStore] = {}
+    
+    @contextmanager
+    def _write_lock(self):
+        # Serializes manifest updates across worker processes
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, '.lock'), 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+    
+    def _read_manifest(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as fh:
+                return json.load(fh)['documents']
+        except FileNotFoundError:
+            return {}
+    
+    def _write_manifest(self, documents: Dict[str, Dict[str, Any]]) -> None:
+        tmp_path = f"{self.manifest_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as fh:
+            json.dump({'name': self.name, 'documents': documents}, fh, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+    
+    def documents(self) -> Dict[str, Dict[str, Any]]:
+        """
+        List the registered documents, picking up changes made by other workers.
+        
+        Returns:
+            Dict[str, Dict[str, Any]]: Document id to its manifest entry
+        """
+        try:
+            mtime = os.stat(self.manifest_path).st_mtime
+        except FileNotFoundError:
+            mtime = None
+        
+        with self._lock:
+            if mtime != self._manifest_mtime:
+                self._manifest = self._read_manifest() if mtime else {}
+                self._manifest_mtime = mtime
+                # Forget segments of documents removed elsewhere
+                for key in [key for key in self._segments if key[0] not in self._manifest]:
+                    self._segments.pop(key, None)
+                    self._chunks.pop(key, None)
+            return dict(self._manifest)
+    
+    def add_document(
+        self,
+        pdf_path: str,
+        filename: str = None,
+        language: str = DEFAULT_LANGUAGE
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Register a PDF: extract, chunk and index it once.
+        
+        Args:
+            pdf_path: Path to the PDF file
+            filename: Original file name, kept for display
+            language: Language of the document; its registered generator
+                extracts and chunks the text
+            
+        Returns:
+            Optional[Dict[str, Any]]: The document's manifest entry (with its
+            ``document_id``), or None if no text could be extracted
+            
+        Raises:
+            ValueError: If the language is not available
+        """
+        from languages import get_language_generator
+        
+        language = language.lower()
+        generator = get_language_generator(language)
+        if generator is None:
+            raise ValueError(f"Language {language} is not available")
+        
+        document_id = file_sha256(pdf_path)
+        chunks_name, segment_name = artefact_names(language)
+        chunks_path = self.cache.find(document_id, chunks_name)
+        segment_path = self.cache.find(document_id, segment_name)
+        
+        if chunks_path and segment_path:
+            chunks = ChunkStore.load(chunks_path)
+        else:
+            chunks = ChunkStore.from_chunks(generator.extract_text_chunks(pdf_path))
+            if not chunks:
+                logger.warning(f"No text extracted from {pdf_path}; not added to corpus {self.name}")
+                return None
+            chunks.save(self.cache.path(document_id, chunks_name))
+            SparseIndex.build(chunks).save(self.cache.path(document_id, segment_name))
+        
+        entry = {
+            'filename': filename or os.path.basename(pdf_path),
+            'language': language,
+            'chunks': len(chunks),
+            'added_at': time.time()
+        }
+        with self._write_lock():
+            documents = self._read_manifest()
+            documents[document_id] = entry
+            self._write_manifest(documents)
+        
+        logger.info(f"Added document {document_id[:12]} ({len(chunks)} chunks) to corpus {self.name}")
+        return dict(entry, document_id=document_id)
+    
+    def remove_document(self, document_id: str) -> bool:
+        """
+        Unregister a document; its cached chunks stay available to other corpora.
+        
+        Args:
+            document_id: Document identifier
+            
+        Returns:
+            bool: True if the document was part of the corpus
+        """
+        with self._write_lock():
+            documents = self._read_manifest()
+            if document_id not in documents:
+                return False
+            del documents[document_id]
+            self._write_manifest(documents)
+        
+        logger.info(f"Removed document {document_id[:12]} from corpus {self.name}")
+        return True
+    
+    def _segment(self, document_id: str, language: str) -> Tuple[SparseIndex, ChunkStore]:
+        with self._lock:
+            key = (document_id, language)
+            if key in self._segments:
+                return self._segments[key], self._chunks[key]
+        
+        chunks_name, segment_name = artefact_names(language)
+        segment = SparseIndex.load(self.cache.path(document_id, segment_name))
+        chunks = ChunkStore.load(self.cache.path(document_id, chunks_name))
+        
+        with self._lock:
+            self._segments[key] = segment
+            self._chunks[key] = chunks
+        return segment, chunks
+    
+    def search(self, prompt: str, top_n: int = None) -> List[Tuple[str, int, str]]:
+        """
+        Retrieve the most relevant chunks across all documents of the corpus.
+        
+        Args:
+            prompt: The search prompt
+            top_n: Number of chunks to return (defaults to Config.DEFAULT_TOP_N_CHUNKS)
+            
+        Returns:
+            List[Tuple[str, int, str]]: ``(document_id, chunk_index, text)``, best first
+        """
+        if top_n is None:
+            top_n = Config.DEFAULT_TOP_N_CHUNKS
+        
+        segments = []
+        for document_id, entry in self.documents().items():
+            try:
+                language = entry.get('language', DEFAULT_LANGUAGE)
+                segments.append((document_id, *self._segment(document_id, language)))
+            except Exception as e:
+                logger.error(f"Failed to load corpus segment {document_id[:12]}: {str(e)}")
+        
+        terms = list(Counter(tokenize(prompt)))
+        if not segments or not terms:
+            return []
+        
+        # Collection statistics are summed over the segments at query time
+        num_chunks = sum(len(segment.chunk_lengths) for _, segment, _ in segments)
+        avg_length = sum(float(segment.chunk_lengths.sum()) for _, segment, _ in segments) / max(num_chunks, 1)
+        idf = {}
+        for term in terms:
+            doc_freq = sum(segment.doc_freq(term) for _, segment, _ in segments)
+            idf[term] = float(np.log1p((num_chunks - doc_freq + 0.5) / (doc_freq + 0.5)))
+        
+        hits, scores = [], []
+        for document_id, segment, chunks in segments:
+            candidates, segment_scores = segment.bm25(terms, idf, avg_length, k1=Config.BM25_K1, b=Config.BM25_B)
+            hits.extend((document_id, int(chunk_id)) for chunk_id in candidates)
+            scores.append(segment_scores)
+        
+        if not hits:
+            return []
+        chunks_by_document = {document_id: chunks for document_id, _, chunks in segments}
+        best = top_k_indices(np.concatenate(scores), top_n)
+        return [
+            (hits[i][0], hits[i][1], chunks_by_document[hits[i][0]][hits[i][1]])
+            for i in best
+        ]
+
+
+_corpora: Dict[str, Corpus] = {}
+_corpora_lock = threading.Lock()
+
+
+def get_corpus(name: str) -> Corpus:
+    """
+    Get the shared instance of a corpus.
+    
+    Args:
+        name: Corpus name
+        
+    Returns:
+        Corpus: The corpus
+        
+    Raises:
+        ValueError: If the name is not a valid corpus name
+    """
+    with _corpora_lock:
+        if name not in _corpora:
+            _corpora[name] = Corpus(name)
+        return _corpora[name]
@@ -0,0 +1,214 @@
+"""
+Near-duplicate detection for generated questions.
+
+Sampling several sequences per chunk yields many questions that differ only
+by a word or punctuation. ``NearDuplicateFilter`` compares questions by the
+Jaccard similarity of their character n-grams, using MinHash signatures and
+an LSH band index so each new question is only compared with a few likely
+matches. N-grams are built from grapheme clusters rather than code points, so
+a Devanagari consonant keeps its vowel signs, nukta and virama conjuncts.
+"""
+import re
+import zlib
+import logging
+import unicodedata
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Largest prime below 2**32: with 32-bit hashes, a * x + b fits in uint64
+_PRIME = np.uint64(4294967291)
+_VIRAMA = '्'
+_PUNCTUATION_PATTERN = re.compile(r'[^\w\s]', re.UNICODE)
+
+
+def grapheme_clusters(text: str) -> List[str]:
+    """
+    Split text into approximate grapheme clusters.
+    
+    A combining mark (matra, anusvara, nukta, virama) stays with the preceding
+    character, and a character following a virama joins the same cluster, so
+    conjuncts such as "क्ष" are one unit.
+    
+    Args:
+        text: Input text
+    
+    Returns:
+        List[str]: Grapheme clusters
+    """
+    clusters: List[str] = []
+    for char in text:
+        if clusters and (unicodedata.category(char).startswith('M') or clusters[-1].endswith(_VIRAMA)):
+            clusters[-1] += char
+        else:
+            clusters.append(char)
+    return clusters
+
+
+def normalize_for_comparison(text: str) -> str:
+    """
+    Normalize a question for similarity comparison.
+    
+    Args:
+        text: Question text
+    
+    Returns:
+        str: NFC-normalized, lowercased text without punctuation or repeated spaces
+    """
+    text = unicodedata.normalize('NFC', text).lower()
+    text = _PUNCTUATION_PATTERN.sub(' ', text)
+    return ' '.join(text.split())
+
+
+def shingles(text: str, size: int = 3) -> Set[str]:
+    """
+    Build the set of character n-grams of a normalized text.
+    
+    Args:
+        text: Normalized text
+        size: Number of grapheme clusters per n-gram
+    
+    Returns:
+        Set[str]: N-grams (the whole text if it is shorter than ``size``)
+    """
+    clusters = grapheme_clusters(text)
+    if len(clusters) <= size:
+        return {''.join(clusters)} if clusters else set()
+    return {''.join(clusters[i:i + size]) for i in range(len(clusters) - size + 1)}
+
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    """Jaccard similarity of two sets (0.0 when both are empty)."""
+    if not a and not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class NearDuplicateFilter:
+    """Incrementally keeps questions that are not near-duplicates of earlier ones."""
+    
+    def __init__(
+        self,
+        threshold: float = None,
+        shingle_size: int = 3,
+        num_bands: int = 16,
+        rows_per_band: int = 2,
+        seed: int = 1
+    ):
+        """
+        Initialize the filter.
+        
+        Args:
+            threshold: Jaccard similarity at or above which a question is a
+                near-duplicate (defaults to Config.NEAR_DUPLICATE_THRESHOLD;
+                1.0 or more only drops exact duplicates after normalization)
+            shingle_size: Grapheme clusters per n-gram
+            num_bands: LSH bands; more bands find more candidate pairs
+            rows_per_band: MinHash values per band; more rows find fewer
+            seed: Seed for the MinHash permutations
+        """
+        self.threshold = Config.NEAR_DUPLICATE_THRESHOLD if threshold is None else threshold
+        self.shingle_size = shingle_size
+        self.num_bands = num_bands
+        self.rows_per_band = rows_per_band
+        
+        num_perm = num_bands * rows_per_band
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, 2 ** 31, size=num_perm).astype(np.uint64)
+        self._b = rng.randint(0, 2 ** 31, size=num_perm).astype(np.uint64)
+        
+        self._normalized: Set[str] = set()
+        self._shingles: List[Set[str]] = []
+        self._buckets: Dict[Tuple[int, bytes], List[int]] = {}
+        self.kept: List[str] = []
+        self.dropped = 0
+    
+    def __len__(self) -> int:
+        return len(self.kept)
+    
+    def signature(self, question_shingles: Set[str]) -> np.ndarray:
+        """
+        Compute the MinHash signature of a set of n-grams.
+        
+        Args:
+            question_shingles: N-grams of a question
+        
+        Returns:
+            np.ndarray: ``num_bands * rows_per_band`` minimum hash values
+        """
+        hashes = np.fromiter(
+            (zlib.crc32(s.encode('utf-8')) for s in question_shingles),
+            dtype=np.uint64,
+            count=len(question_shingles)
+        )
+        permuted = (np.outer(self._a, hashes) + self._b[:, None]) % _PRIME
+        return permuted.min(axis=1)
+    
+    def _band_keys(self, signature: np.ndarray) -> List[Tuple[int, bytes]]:
+        bands = signature.reshape(self.num_bands, self.rows_per_band)
+        return [(band, bands[band].tobytes()) for band in range(self.num_bands)]
+    
+    def add(self, question: str) -> bool:
+        """
+        Keep a question unless it is a near-duplicate of one already kept.
+        
+        Args:
+            question: Candidate question
+        
+        Returns:
+            bool: True if the question was kept
+        """
+        normalized = normalize_for_comparison(question)
+        if normalized in self._normalized:
+            self.dropped += 1
+            return False
+        
+        question_shingles = shingles(normalized, self.shingle_size)
+        keys: Optional[List[Tuple[int, bytes]]] = None
+        if question_shingles and self.threshold < 1.0:
+            keys = self._band_keys(self.signature(question_shingles))
+            candidates = {index for key in keys for index in self._buckets.get(key, ())}
+            for index in candidates:
+                if jaccard(question_shingles, self._shingles[index]) >= self.threshold:
+                    self.dropped += 1
+                    return False
+        
+        index = len(self.kept)
+        self.kept.append(question)
+        self._normalized.add(normalized)
+        self._shingles.append(question_shingles)
+        for key in keys or ():
+            self._buckets.setdefault(key, []).append(index)
+        return True
+    
+    def extend(self, questions: Iterable[str]) -> int:
+        """
+        Add several questions.
+        
+        Args:
+            questions: Candidate questions
+        
+        Returns:
+            int: Number of questions kept
+        """
+        return sum(1 for question in questions if self.add(question))
+
+
+def remove_near_duplicates(questions: List[str], threshold: float = None) -> List[str]:
+    """
+    Remove near-duplicate questions while preserving order.
+    
+    Args:
+        questions: Questions to deduplicate
+        threshold: Jaccard similarity threshold (defaults to Config.NEAR_DUPLICATE_THRESHOLD)
+    
+    Returns:
+        List[str]: Questions with near-duplicates removed
+    """
+    near_duplicates = NearDuplicateFilter(threshold)
+    near_duplicates.extend(questions)
+    return near_duplicates.kept
@@ -0,0 +1,109 @@
+"""
+On-disk cache of per-document artefacts such as embedding matrices and indexes.
+
+Each document gets its own directory under ``Config.DOCUMENT_CACHE_DIR``,
+named by its document id (the SHA-256 of the PDF, see ``utils.file_sha256``).
+"""
+import os
+import shutil
+import logging
+from typing import Iterable, Optional
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class DocumentCache:
+    """Locates cached artefacts of processed documents."""
+    
+    def __init__(self, root: str = None):
+        """
+        Initialize the document cache.
+        
+        Args:
+            root: Cache directory (defaults to Config.DOCUMENT_CACHE_DIR)
+        """
+        self.root = root or Config.DOCUMENT_CACHE_DIR
+    
+    def document_dir(self, document_id: str) -> str:
+        """
+        Get the cache directory of a document, creating it if needed.
+        
+        Args:
+            document_id: Document identifier
+            
+        Returns:
+            str: Path to the document's cache directory
+        """
+        path = os.path.join(self.root, document_id)
+        os.makedirs(path, exist_ok=True)
+        return path
+    
+    def path(self, document_id: str, name: str) -> str:
+        """
+        Get the path of a named artefact of a document.
+        
+        Args:
+            document_id: Document identifier
+            name: File name of the artefact
+            
+        Returns:
+            str: Path to the artefact (which may not exist yet)
+        """
+        return os.path.join(self.document_dir(document_id), name)
+    
+    def find(self, document_id: str, name: str) -> Optional[str]:
+        """
+        Get the path of a named artefact if it has been cached.
+        
+        Args:
+            document_id: Document identifier
+            name: File name of the artefact
+            
+        Returns:
+            Optional[str]: Path to the artefact, or None if it is not cached
+        """
+        path = os.path.join(self.root, document_id, name)
+        return path if os.path.exists(path) else None
+    
+    def remove(self, document_id: str, keep: Iterable[str] = ()) -> int:
+        """
+        Delete the cached artefacts of a document.
+        
+        Args:
+            document_id: Document identifier
+            keep: Prefixes of file names to leave in place (e.g. artefacts of
+                a corpus)
+            
+        Returns:
+            int: Number of artefacts deleted
+        """
+        directory = os.path.join(self.root, document_id)
+        keep = tuple(keep)
+        removed = 0
+        try:
+            names = os.listdir(directory)
+        except OSError:
+            return 0
+        for name in names:
+            if name.startswith(keep):
+                continue
+            path = os.path.join(directory, name)
+            try:
+                if os.path.isdir(path):
+                    shutil.rmtree(path)
+                else:
+                    os.remove(path)
+            except OSError:
+                continue
+            removed += 1
+        try:
+            os.rmdir(directory)
+        except OSError:
+            pass  # Not empty: kept artefacts remain
+        return removed
+
+
+# Global instance for shared use
+document_cache = DocumentCache()
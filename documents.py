@@ -0,0 +1,263 @@
+"""
+Uploaded documents and their background preparation.
+
+An upload is stored under its document id (the SHA-256 of the PDF) and
+prepared in the background (extraction, chunking, retrieval index and,
+optionally, question pre-generation) while the user is still writing the
+prompt. ``/process`` then refers to the document by id and only pays for
+retrieval and generation. Stored documents, and uploads that were never
+processed, are deleted once unused for ``DOCUMENT_TTL_HOURS``, together with
+their cached text, chunks and indexes.
+"""
+import os
+import re
+import json
+import time
+import logging
+import threading
+from concurrent.futures import Future, wait
+from typing import Any, Dict, List, Optional
+
+import background
+from config import Config
+from corpus import ARTEFACT_PREFIX
+from document_cache import document_cache
+from utils import file_sha256
+
+logger = logging.getLogger(__name__)
+
+DOCUMENT_ID_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+STATUS_NAME = 'status.json'
+# Cached artefacts of corpora outlive the upload
+CORPUS_ARTEFACTS = (ARTEFACT_PREFIX,)
+# Seconds between two sweeps for expired documents
+SWEEP_INTERVAL = 300
+
+_jobs: Dict[str, Future] = {}
+_jobs_lock = threading.Lock()
+_last_sweep = 0.0
+
+
+def validate_document_id(document_id: str) -> bool:
+    """
+    Check that a document id is a SHA-256 hex digest.
+    
+    Args:
+        document_id: Document identifier
+    
+    Returns:
+        bool: True if the id is well formed
+    """
+    return bool(document_id and DOCUMENT_ID_PATTERN.match(document_id))
+
+
+def store_upload(file_path: str) -> str:
+    """
+    Move an uploaded PDF to its content-addressed location.
+    
+    Args:
+        file_path: Path returned by ``utils.secure_file_upload``
+    
+    Returns:
+        str: Document id
+    """
+    document_id = file_sha256(file_path)
+    os.replace(file_path, os.path.join(Config.UPLOAD_FOLDER, f"{document_id}.pdf"))
+    return document_id
+
+
+def document_path(document_id: str) -> Optional[str]:
+    """
+    Get the stored PDF of an uploaded document.
+    
+    Args:
+        document_id: Document identifier
+    
+    Returns:
+        Optional[str]: Path to the PDF, or None if it is unknown or removed
+    """
+    if not validate_document_id(document_id):
+        return None
+    path = os.path.join(Config.UPLOAD_FOLDER, f"{document_id}.pdf")
+    return path if os.path.exists(path) else None
+
+
+def touch_document(document_id: str) -> None:
+    """
+    Mark a stored document as used, so the TTL sweep keeps it.
+    
+    Args:
+        document_id: Document identifier
+    """
+    path = document_path(document_id)
+    if path is None:
+        return
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def expire_documents(force: bool = False) -> int:
+    """
+    Delete uploaded PDFs unused for longer than ``DOCUMENT_TTL_HOURS``.
+    
+    The cached artefacts of an expired document are deleted with it, as are
+    those of documents that were processed from a one-shot upload and not
+    touched for the TTL. Corpus artefacts are kept. The sweep runs at most
+    every SWEEP_INTERVAL seconds per process and also removes one-shot
+    uploads left behind by requests that never finished.
+    
+    Args:
+        force: Sweep even if the last sweep was recent
+    
+    Returns:
+        int: Number of uploaded files deleted
+    """
+    global _last_sweep
+    now = time.time()
+    if not Config.DOCUMENT_TTL_HOURS or (not force and now - _last_sweep < SWEEP_INTERVAL):
+        return 0
+    _last_sweep = now
+    cutoff = now - Config.DOCUMENT_TTL_HOURS * 3600
+    
+    removed = 0
+    for name in _list_directory(Config.UPLOAD_FOLDER):
+        path = os.path.join(Config.UPLOAD_FOLDER, name)
+        try:
+            if os.path.getmtime(path) > cutoff:
+                continue
+            os.remove(path)
+        except OSError:
+            continue
+        removed += 1
+        document_id, extension = os.path.splitext(name)
+        if extension == '.pdf' and validate_document_id(document_id):
+            document_cache.remove(document_id, keep=CORPUS_ARTEFACTS)
+    
+    # Artefacts of one-shot uploads have no stored PDF to expire with
+    for document_id in _list_directory(document_cache.root):
+        if not validate_document_id(document_id) or document_path(document_id):
+            continue
+        if _last_modified(os.path.join(document_cache.root, document_id)) <= cutoff:
+            document_cache.remove(document_id, keep=CORPUS_ARTEFACTS)
+    
+    if removed:
+        logger.info(f"Expired {removed} uploaded documents")
+    return removed
+
+
+def _list_directory(path: str) -> List[str]:
+    try:
+        return os.listdir(path)
+    except OSError:
+        return []
+
+
+def _last_modified(directory: str) -> float:
+    times = [0.0]
+    for path in [directory] + [os.path.join(directory, name) for name in _list_directory(directory)]:
+        try:
+            times.append(os.path.getmtime(path))
+        except OSError:
+            continue
+    return max(times)
+
+
+def _write_status(document_id: str, **status: Any) -> None:
+    path = document_cache.path(document_id, STATUS_NAME)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as fh:
+        json.dump(dict(status, updated_at=time.time()), fh)
+    os.replace(tmp_path, path)
+
+
+def _prepare(document_id: str, language: str, generator: Any) -> int:
+    _write_status(document_id, state='processing', language=language)
+    started = time.perf_counter()
+    try:
+        prepared = generator.prepare(document_path(document_id), document_id=document_id)
+    except Exception:
+        _write_status(document_id, state='failed', language=language)
+        raise
+    _write_status(document_id, state='ready', language=language, prepared=prepared)
+    logger.info(f"Prepared document {document_id[:12]} for {language} in {time.perf_counter() - started:.2f}s")
+    return prepared
+
+
+def prepare_in_background(document_id: str, language: str, generator: Any) -> Optional[Future]:
+    """
+    Start preparing a document, unless it is already being prepared here.
+    
+    Args:
+        document_id: Document identifier
+        language: Language the document will be processed in
+        generator: Language generator; its ``prepare(pdf_path, document_id)``
+            does the work
+    
+    Returns:
+        Optional[Future]: The preparation job, or None if the generator has
+        nothing to prepare
+    """
+    if getattr(generator, 'prepare', None) is None:
+        return None
+    with _jobs_lock:
+        job = _jobs.get(document_id)
+        if job is None or job.done():
+            job = background.submit(f"prepare {document_id[:12]}", _prepare, document_id, language, generator)
+            _jobs[document_id] = job
+            job.add_done_callback(lambda done: _forget(document_id, done))
+        return job
+
+
+def _forget(document_id: str, job: Future) -> None:
+    with _jobs_lock:
+        if _jobs.get(document_id) is job:
+            del _jobs[document_id]
+
+
+def wait_until_prepared(document_id: str, timeout: float = None) -> bool:
+    """
+    Wait for a preparation job started by this process, if any.
+    
+    Jobs started by other workers are not waited for; the request then
+    extracts whatever is not cached yet itself.
+    
+    Args:
+        document_id: Document identifier
+        timeout: Seconds to wait at most (defaults to Config.DOCUMENT_PREPARE_TIMEOUT)
+    
+    Returns:
+        bool: False if a job is still running when the timeout expires
+    """
+    if timeout is None:
+        timeout = Config.DOCUMENT_PREPARE_TIMEOUT
+    with _jobs_lock:
+        job = _jobs.get(document_id)
+    if job is None:
+        return True
+    done, _ = wait([job], timeout=timeout)
+    return bool(done)
+
+
+def document_status(document_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Report the preparation state of an uploaded document.
+    
+    Args:
+        document_id: Document identifier
+    
+    Returns:
+        Optional[Dict[str, Any]]: ``state`` is ``uploaded``, ``processing``,
+        ``ready`` or ``failed``; None if the document is unknown
+    """
+    if document_path(document_id) is None:
+        return None
+    path = document_cache.find(document_id, STATUS_NAME)
+    if path is None:
+        return {'document_id': document_id, 'state': 'uploaded'}
+    try:
+        with open(path, 'r', encoding='utf-8') as fh:
+            return dict(json.load(fh), document_id=document_id)
+    except ValueError:
+        return {'document_id': document_id, 'state': 'processing'}
@@ -0,0 +1,76 @@
+"""
+Gunicorn configuration for the Multi-Lingual Question Generator.
+"""
+import os
+import sys
+import shutil
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from config import Config
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+# Same default as the CPU thread policy, so each worker gets its share of cores
+workers = Config.WEB_CONCURRENCY
+threads = int(os.getenv('GUNICORN_THREADS', 1))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 120))
+
+# Load model weights once in the master; workers share them copy-on-write
+preload_app = os.getenv('GUNICORN_PRELOAD', 'True').lower() == 'true'
+
+def on_starting(server):
+    """Start every master with an empty Prometheus multiprocess directory."""
+    multiproc_dir = os.getenv('PROMETHEUS_MULTIPROC_DIR')
+    if multiproc_dir:
+        shutil.rmtree(multiproc_dir, ignore_errors=True)
+        os.makedirs(multiproc_dir, exist_ok=True)
+
+def when_ready(server):
+    """Load preloaded models in the master and start the shared inference server if configured."""
+    if server.cfg.preload_app:
+        from app import load_models
+        load_models()
+    
+    socket_path = os.getenv('INFERENCE_SERVER_SOCKET')
+    if socket_path and os.getenv('INFERENCE_SERVER_AUTOSTART', 'True').lower() == 'true':
+        server.inference_process = subprocess.Popen(
+            [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'inference_server.py'),
+             '--socket', socket_path]
+        )
+        server.log.info(f"Started inference server (pid {server.inference_process.pid}) on {socket_path}")
+
+def on_exit(server):
+    """Stop the inference server together with the master."""
+    process = getattr(server, 'inference_process', None)
+    if process is not None:
+        process.terminate()
+        process.wait(timeout=30)
+
+def child_exit(server, worker):
+    """Drop live gauges of workers that have exited."""
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
+
+def pre_fork(server, worker):
+    """Give each worker the lowest free slot, used to pick its CPU cores."""
+    used = {getattr(w, 'cpu_slot', None) for w in server.WORKERS.values()}
+    worker.cpu_slot = next(slot for slot in range(len(used) + 1) if slot not in used)
+
+def post_fork(server, worker):
+    """Size the worker's torch thread pools to its share of the CPU cores."""
+    if not os.getenv('INFERENCE_SERVER_SOCKET'):
+        from models import apply_cpu_thread_policy
+        apply_cpu_thread_policy(worker_slot=worker.cpu_slot, workers=server.num_workers)
+
+def post_worker_init(worker):
+    """Run the warm-up generation in each worker before it accepts requests."""
+    from app import warm_up_models
+    warm_up_models()
+
+def post_request(worker, req, environ, resp):
+    """Restart the worker after this request once its RSS exceeds WORKER_MAX_RSS_MB."""
+    from memory import should_recycle
+    if worker.alive and should_recycle():
+        # The master replaces the worker once it has finished its in-flight requests
+        worker.alive = False
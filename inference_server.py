@@ -0,0 +1,189 @@
+"""
+Dedicated inference server process that owns the question generation model.
+
+Instead of every gunicorn worker loading its own copy of the model, a single
+server process loads it once and serves generation calls over a Unix socket.
+Concurrent calls from all workers are combined by a ``BatchedPipeline`` so the
+model runs fuller batches. Web workers use ``InferenceClient``, which is a
+drop-in replacement for the Hugging Face pipeline callable.
+
+Run it with ``python inference_server.py`` and set ``INFERENCE_SERVER_SOCKET``
+for both the server and the web app, or let ``gunicorn.conf.py`` start it.
+"""
+import os
+import time
+import logging
+import argparse
+import threading
+from multiprocessing.connection import Client, Listener
+from typing import Any, Dict, List, Optional
+
+from batching import BatchedPipeline
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class InferenceServer:
+    """Serves generation requests for one shared model over a Unix socket."""
+    
+    def __init__(self, address: str = None, generation_pipeline: Any = None):
+        """
+        Initialize the server and load the model.
+        
+        Args:
+            address: Path of the Unix socket (defaults to Config.INFERENCE_SERVER_SOCKET)
+            generation_pipeline: Pipeline callable to serve; loaded from
+                Config.QUESTION_GENERATOR_MODEL when not given
+        """
+        self.address = address or Config.INFERENCE_SERVER_SOCKET
+        if generation_pipeline is None:
+            from models import load_generation_pipeline
+            generation_pipeline = load_generation_pipeline()
+        self.pipeline = BatchedPipeline(generation_pipeline)
+        self._listener: Optional[Listener] = None
+    
+    def serve_forever(self) -> None:
+        """Accept connections until ``shutdown`` is called."""
+        if os.path.exists(self.address):
+            os.remove(self.address)
+        self._listener = Listener(self.address, family='AF_UNIX', authkey=Config.INFERENCE_SERVER_AUTHKEY)
+        logger.info(f"Inference server listening on {self.address}")
+        
+        while True:
+            try:
+                connection = self._listener.accept()
+            except OSError:
+                # Listener closed by shutdown()
+                break
+            except Exception as e:
+                logger.warning(f"Rejected inference connection: {str(e)}")
+                continue
+            threading.Thread(target=self._handle, args=(connection,), daemon=True).start()
+    
+    def _handle(self, connection) -> None:
+        with connection:
+            while True:
+                try:
+                    request = connection.recv()
+                except (EOFError, OSError):
+                    return
+                
+                try:
+                    future = self.pipeline.submit(request['text'], **request['kwargs'])
+                    reply = {'result': future.result()}
+                except Exception as e:
+                    logger.error(f"Inference request failed: {str(e)}")
+                    reply = {'error': str(e)}
+                
+                try:
+                    connection.send(reply)
+                except (EOFError, OSError):
+                    return
+    
+    def shutdown(self) -> None:
+        """Stop accepting connections and remove the socket."""
+        if self._listener is not None:
+            self._listener.close()
+            self._listener = None
+        if os.path.exists(self.address):
+            os.remove(self.address)
+
+
+class InferenceClient:
+    """Pipeline-compatible callable that forwards generation to the inference server."""
+    
+    def __init__(self, address: str = None, connect_timeout: float = None):
+        """
+        Initialize the client; connections are opened lazily per thread.
+        
+        Args:
+            address: Path of the server's Unix socket
+            connect_timeout: Seconds to keep retrying while the server starts
+        """
+        self.address = address or Config.INFERENCE_SERVER_SOCKET
+        self.connect_timeout = connect_timeout if connect_timeout is not None else Config.INFERENCE_CONNECT_TIMEOUT
+        self._local = threading.local()
+    
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        # Connections inherited through fork are shared with the parent; reopen them
+        if connection is not None and self._local.pid == os.getpid():
+            return connection
+        
+        deadline = time.monotonic() + self.connect_timeout
+        while True:
+            try:
+                connection = Client(self.address, family='AF_UNIX', authkey=Config.INFERENCE_SERVER_AUTHKEY)
+                break
+            except (FileNotFoundError, ConnectionRefusedError):
+                if time.monotonic() >= deadline:
+                    raise RuntimeError(f"Inference server not reachable at {self.address}")
+                time.sleep(0.5)
+        
+        self._local.connection = connection
+        self._local.pid = os.getpid()
+        return connection
+    
+    def _reset(self) -> None:
+        connection = getattr(self._local, 'connection', None)
+        self._local.connection = None
+        if connection is not None:
+            try:
+                connection.close()
+            except OSError:
+                pass
+    
+    def __call__(self, text: str, **kwargs: Any) -> List[Dict[str, Any]]:
+        """
+        Generate sequences for one input text.
+        
+        Args:
+            text: Formatted model input
+            **kwargs: Generation arguments, as accepted by the pipeline
+            
+        Returns:
+            List[Dict[str, Any]]: Pipeline outputs with ``generated_text``
+        """
+        request = {'text': text, 'kwargs': kwargs}
+        for attempt in range(2):
+            try:
+                connection = self._connection()
+                connection.send(request)
+                if not connection.poll(Config.INFERENCE_REQUEST_TIMEOUT):
+                    self._reset()
+                    raise RuntimeError("Inference server timed out")
+                reply = connection.recv()
+                break
+            except (EOFError, OSError):
+                # Server restarted; reconnect once
+                self._reset()
+                if attempt:
+                    raise
+        
+        if 'error' in reply:
+            raise RuntimeError(f"Inference server error: {reply['error']}")
+        return reply['result']
+
+
+def main() -> None:
+    """Run the inference server from the command line."""
+    parser = argparse.ArgumentParser(description="Question generation inference server")
+    parser.add_argument('--socket', default=Config.INFERENCE_SERVER_SOCKET or '/tmp/qg-inference.sock')
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=getattr(logging, Config.LOG_LEVEL), format=Config.LOG_FORMAT)
+    # The server is the only process running the model, so it gets every core
+    from models import apply_cpu_thread_policy
+    apply_cpu_thread_policy(workers=1)
+    server = InferenceServer(address=args.socket)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
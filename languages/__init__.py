@@ -1,13 +1,30 @@
 """
 Language-specific question generation modules.
+
+Importing this package registers the built-in languages with
+``languages.registry``; generators are created on first use.
 """
 
+from .registry import (
+    LanguageSpec,
+    register_language,
+    registered_languages,
+    available_languages,
+    get_language_spec,
+    get_language_generator
+)
 from .english import EnglishQuestionGenerator
 from .hindi import HindiQuestionGenerator
 from .sanskrit import SanskritQuestionGenerator
 
 __all__ = [
+    'LanguageSpec',
+    'register_language',
+    'registered_languages',
+    'available_languages',
+    'get_language_spec',
+    'get_language_generator',
     'EnglishQuestionGenerator',
     'HindiQuestionGenerator', 
     'SanskritQuestionGenerator'
-] 
\ No newline at end of file
+]
\ No newline at end of file
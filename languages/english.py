@@ -2,26 +2,114 @@
 English question generation module.
 """
 import logging
-from typing import List, Optional
+import threading
+from typing import List, Optional, Sequence, Set
 from pdf_processor import extract_clean_text_chunks_from_pdf
+from utils import file_sha256
+from config import Config
+import background
+from languages.registry import get_language_generator, register_language
+from question_generator import question_generator as core_question_generator
 from question_generator import generate_questions_from_prompt_with_rag as core_generate_questions_from_prompt_with_rag
 
 logger = logging.getLogger(__name__)
 
+@register_language(
+    'english', 'en',
+    description='Generate questions from English documents using advanced AI models',
+    capabilities=('model', 'rag', 'prepare', 'pages'),
+    requires=('transformers', 'torch', 'sklearn', 'pdfplumber'),
+    icon='fa-flag-usa',
+    color='primary'
+)
 class EnglishQuestionGenerator:
     """Handles English question generation."""
     
     def __init__(self):
         """Initialize the English question generator."""
+        # Documents whose pre-generation was queued by this process
+        self._pregenerated: Set[str] = set()
+        self._pregenerated_lock = threading.Lock()
         logger.info("Initialized English question generator")
     
+    def load(self) -> None:
+        """Load the question generation model now rather than on the first request."""
+        core_question_generator.load()
+    
+    def warm_up(self) -> None:
+        """Warm up the shared question generation model."""
+        core_question_generator.warm_up()
+    
+    def prepare(self, pdf_path: str, document_id: str = None) -> int:
+        """
+        Extract, chunk and index a document before its first prompt arrives.
+        
+        With Config.PREGENERATE_QUESTIONS, questions for every chunk are then
+        generated into the question cache by a separate background job, which
+        nothing waits for.
+        
+        Args:
+            pdf_path: Path to the PDF file
+            document_id: Document identifier (defaults to the file's SHA-256)
+            
+        Returns:
+            int: Number of chunks prepared
+        """
+        document_id = document_id or file_sha256(pdf_path)
+        text_chunks = extract_clean_text_chunks_from_pdf(pdf_path)
+        if text_chunks:
+            core_question_generator.retriever.prepare(text_chunks, document_id)
+            self.pregenerate_in_background(text_chunks, document_id)
+        return len(text_chunks)
+    
+    def extract_text_chunks(self, pdf_path: str) -> Sequence[str]:
+        """
+        Extract and chunk a whole document, e.g. to register it in a corpus.
+        
+        Args:
+            pdf_path: Path to the PDF file
+            
+        Returns:
+            Sequence[str]: Text chunks (a ChunkStore)
+        """
+        return extract_clean_text_chunks_from_pdf(pdf_path)
+    
+    def pregenerate_in_background(self, text_chunks: Sequence[str], document_id: str) -> bool:
+        """
+        Queue question generation for every chunk of a document, once per document.
+        
+        The job runs in its own pool, so preparations of other documents do
+        not queue behind it.
+        
+        Args:
+            text_chunks: All chunks of the document
+            document_id: Document identifier
+            
+        Returns:
+            bool: True if a job was queued
+        """
+        if not Config.PREGENERATE_QUESTIONS:
+            return False
+        with self._pregenerated_lock:
+            if document_id in self._pregenerated:
+                return False
+            self._pregenerated.add(document_id)
+        background.submit_to(
+            background.PREGENERATE_POOL,
+            f"pregenerate {document_id[:12]}",
+            core_question_generator.pregenerate,
+            text_chunks
+        )
+        return True
+    
     def generate_questions_from_pdf(
         self,
         pdf_path: str,
         prompt: str,
         total_questions: int = 20,
         top_n_chunks: int = 5,
-        questions_per_chunk: int = 2
+        questions_per_chunk: int = 2,
+        pages: Sequence[int] = None
     ) -> List[str]:
         """
         Generate English questions from a PDF file.
@@ -32,6 +120,7 @@ class EnglishQuestionGenerator:
             total_questions: Total number of questions to generate
             top_n_chunks: Number of top chunks to use
             questions_per_chunk: Number of questions per chunk
+            pages: Zero-based pages to use (defaults to the whole document)
             
         Returns:
             List[str]: List of generated questions
@@ -40,21 +129,27 @@ class EnglishQuestionGenerator:
             logger.info(f"Generating English questions from PDF: {pdf_path}")
             
             # Extract text chunks from PDF
-            text_chunks = extract_clean_text_chunks_from_pdf(pdf_path)
+            text_chunks = extract_clean_text_chunks_from_pdf(pdf_path, pages=pages)
             
             if not text_chunks:
                 logger.warning("No text chunks extracted from PDF")
                 return []
             
             # Generate questions using RAG
+            document_id = file_sha256(pdf_path)
             questions = core_generate_questions_from_prompt_with_rag(
                 prompt=prompt,
                 text_chunks=text_chunks,
                 total_questions=total_questions,
                 top_n_chunks=top_n_chunks,
-                questions_per_chunk=questions_per_chunk
+                questions_per_chunk=questions_per_chunk,
+                document_id=document_id
             )
             
+            if pages is None:
+                # Later prompts on this document hit the question cache
+                self.pregenerate_in_background(text_chunks, document_id)
+            
             logger.info(f"Generated {len(questions)} English questions")
             return questions
             
@@ -62,8 +157,35 @@ class EnglishQuestionGenerator:
             logger.error(f"Error generating English questions: {str(e)}")
             return []
 
-# Global instance for backward compatibility
-english_generator = EnglishQuestionGenerator()
+    def generate_questions_from_chunks(
+        self,
+        relevant_chunks: List[str],
+        total_questions: int = 20,
+        questions_per_chunk: int = 2
+    ) -> List[str]:
+        """
+        Generate English questions from already retrieved chunks.
+        
+        Args:
+            relevant_chunks: Chunks ordered by relevance
+            total_questions: Total number of questions to generate
+            questions_per_chunk: Number of questions per chunk
+            
+        Returns:
+            List[str]: List of generated questions
+        """
+        return core_question_generator.generate_questions_from_chunks(
+            relevant_chunks,
+            total_questions=total_questions,
+            questions_per_chunk=questions_per_chunk
+        )
+
+def __getattr__(name: str):
+    # Legacy global instance, created on first access and owned by the
+    # language registry so there is only one per process
+    if name == 'english_generator':
+        return get_language_generator('english')
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # Legacy function for backward compatibility
 def generate_questions_from_prompt_with_rag(
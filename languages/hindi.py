@@ -3,16 +3,37 @@ Hindi question generation module.
 """
 import logging
 import re
-from typing import List, Optional
-import pandas as pd
-from tqdm import tqdm
-import fitz  # PyMuPDF
+from typing import List, Optional, Sequence
 
-from utils import clean_text, sanitize_question
+from utils import clean_text
+from chunk_store import ChunkStore
+from normalization import NORMALIZATION_VERSION, sentence_split_pattern
+from postprocessing import postprocess_questions
 from config import Config
+from page_cache import page_cache
+from ocr import fill_empty_pages
+from metrics import count_questions, timed
+from languages.registry import get_language_generator, register_language
 
 logger = logging.getLogger(__name__)
 
+# Rule patterns, matched from the start of a sentence; a match found later
+# in the sentence would also match from its start, since the first group
+# absorbs the prefix
+_LOCATION_PATTERN = re.compile(r'(.+?) (में|से|पर) (.+?) है।')
+_WHO_PATTERN = re.compile(r'(.+?) ने (.+?)।')
+_POSSESSION_PATTERN = re.compile(r'(.+?) की (.+?)।')
+_WHAT_IS_PATTERN = re.compile(r'(.+?) एक (.+?) है।')
+_WHEN_PATTERN = re.compile(r'(.+?) में (.+?) हुआ।')
+
+@register_language(
+    'hindi', 'hi',
+    description='Create questions from Hindi text using rule-based patterns',
+    capabilities=('rules', 'prepare', 'pages'),
+    requires=('fitz',),
+    icon='fa-om',
+    color='success'
+)
 class HindiQuestionGenerator:
     """Handles Hindi question generation using rule-based approach."""
     
@@ -20,29 +41,70 @@ class HindiQuestionGenerator:
         """Initialize the Hindi question generator."""
         logger.info("Initialized Hindi question generator")
     
-    def extract_text_from_pdf(self, pdf_path: str) -> Optional[str]:
+    def extract_pages_from_pdf(self, pdf_path: str, pages: Sequence[int] = None) -> List[str]:
         """
-        Extract text from PDF using PyMuPDF.
+        Extract the cleaned text of each page using PyMuPDF, with OCR for
+        scanned pages.
         
         Args:
             pdf_path: Path to the PDF file
+            pages: Zero-based pages to extract (defaults to all pages); the
+                others are not read at all
             
         Returns:
-            Optional[str]: Extracted text or None if extraction failed
+            List[str]: Text of every page ('' for pages without text or not
+            selected), or an empty list if extraction failed
         """
+        # Pages are cached by content, so prepared uploads and revised
+        # editions skip extraction of the pages seen before
+        texts = page_cache.extract(
+            pdf_path, pages, f'pymupdf-hi-n{NORMALIZATION_VERSION}', self._extract_pages_with_pymupdf
+        )
+        return fill_empty_pages(pdf_path, texts, pages)
+    
+    def _extract_pages_with_pymupdf(self, pdf_path: str, pages: Sequence[int]) -> List[str]:
         try:
-            text = ""
-            with fitz.open(pdf_path) as pdf:
-                for page in pdf:
-                    page_text = page.get_text()
-                    if page_text:
-                        text += clean_text(page_text) + "\n"
+            import fitz  # PyMuPDF
             
-            return text.strip() if text else None
+            with fitz.open(pdf_path) as pdf:
+                selected = range(pdf.page_count) if pages is None else set(pages)
+                return [
+                    clean_text(pdf[number].get_text(), 'hi') if number in selected else ""
+                    for number in range(pdf.page_count)
+                ]
             
         except Exception as e:
             logger.error(f"Error extracting text from PDF {pdf_path}: {str(e)}")
-            return None
+            return []
+    
+    def extract_text_from_pdf(self, pdf_path: str, pages: Sequence[int] = None) -> Optional[str]:
+        """
+        Extract text from PDF using PyMuPDF.
+        
+        Args:
+            pdf_path: Path to the PDF file
+            pages: Zero-based pages to extract (defaults to all pages)
+            
+        Returns:
+            Optional[str]: Extracted text or None if extraction failed
+        """
+        text = "\n".join(page for page in self.extract_pages_from_pdf(pdf_path, pages) if page)
+        return text or None
+    
+    def extract_text_chunks(self, pdf_path: str) -> Sequence[str]:
+        """
+        Extract and chunk a whole document, e.g. to register it in a corpus.
+        
+        Pages come from the Hindi extraction, so the chunks keep the
+        Devanagari normalization used for generation.
+        
+        Args:
+            pdf_path: Path to the PDF file
+            
+        Returns:
+            Sequence[str]: Text chunks (a ChunkStore)
+        """
+        return ChunkStore.from_pages(self.extract_pages_from_pdf(pdf_path), Config.CHUNK_SIZE)
     
     def split_text_into_sentences(self, text: str) -> List[str]:
         """
@@ -57,8 +119,8 @@ class HindiQuestionGenerator:
         if not text:
             return []
         
-        # Split by Hindi sentence endings
-        sentences = re.split(r'(?<=।)\s+', text)
+        # Split after dandas and other Devanagari sentence endings
+        sentences = sentence_split_pattern('hi').split(text)
         return [s.strip() for s in sentences if s.strip()]
     
     def generate_question_from_sentence(self, sentence: str) -> Optional[str]:
@@ -71,11 +133,12 @@ class HindiQuestionGenerator:
         Returns:
             Optional[str]: Generated question or None if no pattern matches
         """
-        if not sentence or not sentence.strip():
+        # Every pattern needs a danda; without one there is nothing to match
+        if not sentence or '।' not in sentence:
             return None
         
         # Pattern 1: Location-based questions (में/से/पर)
-        location_match = re.search(r'(.+?) (में|से|पर) (.+?) है।', sentence)
+        location_match = _LOCATION_PATTERN.match(sentence)
         if location_match:
             location = location_match.group(1)
             location_words = location.split()
@@ -84,12 +147,12 @@ class HindiQuestionGenerator:
                 return f"{location_without_last} कहाँ {location_match.group(3)} है?"
         
         # Pattern 2: Who did something (ने)
-        who_match = re.search(r'(.+?) ने (.+?)।', sentence)
+        who_match = _WHO_PATTERN.match(sentence)
         if who_match:
             return f"किसने {who_match.group(2)}?"
         
         # Pattern 3: Possession questions (की)
-        possession_match = re.search(r'(.+?) की (.+?)।', sentence)
+        possession_match = _POSSESSION_PATTERN.match(sentence)
         if possession_match:
             location = possession_match.group(1)
             location_words = location.split()
@@ -98,17 +161,18 @@ class HindiQuestionGenerator:
                 return f"{location_without_last} किसकी {possession_match.group(2)}?"
         
         # Pattern 4: What is questions
-        what_is_match = re.search(r'(.+?) एक (.+?) है।', sentence)
+        what_is_match = _WHAT_IS_PATTERN.match(sentence)
         if what_is_match:
             return f"{what_is_match.group(1)} क्या है?"
         
         # Pattern 5: When questions
-        when_match = re.search(r'(.+?) में (.+?) हुआ।', sentence)
+        when_match = _WHEN_PATTERN.match(sentence)
         if when_match:
             return f"{when_match.group(1)} कब हुआ?"
         
         return None
     
+    @timed('hindi_rules')
     def process_sentences(self, sentences: List[str]) -> List[str]:
         """
         Process sentences and generate questions.
@@ -119,22 +183,45 @@ class HindiQuestionGenerator:
         Returns:
             List[str]: List of generated questions
         """
-        questions = []
+        from tqdm import tqdm
+        
+        candidates = [
+            self.generate_question_from_sentence(sentence)
+            for sentence in tqdm(sentences, desc="Generating Hindi questions")
+        ]
+        processed = postprocess_questions(
+            (question for question in candidates if question),
+            language='hi',
+            min_length=10
+        )
         
-        for sentence in tqdm(sentences, desc="Generating Hindi questions"):
-            question = self.generate_question_from_sentence(sentence)
-            if question:
-                sanitized = sanitize_question(question, min_length=10)
-                if sanitized:
-                    questions.append(sanitized)
+        count_questions(
+            'hindi_rules',
+            kept=len(processed.questions),
+            sanitized=processed.rejected,
+            duplicate=processed.duplicates
+        )
+        return processed.questions
+    
+    def prepare(self, pdf_path: str, document_id: str = None) -> int:
+        """
+        Extract a document's text before its first request arrives.
         
-        return questions
+        Args:
+            pdf_path: Path to the PDF file
+            document_id: Unused; pages are cached by their content
+            
+        Returns:
+            int: Number of sentences found
+        """
+        return len(self.split_text_into_sentences(self.extract_text_from_pdf(pdf_path)))
     
     def generate_questions_from_pdf(
         self,
         pdf_path: str,
         prompt: str = "",
-        total_questions: int = 20
+        total_questions: int = 20,
+        pages: Sequence[int] = None
     ) -> List[str]:
         """
         Generate Hindi questions from a PDF file.
@@ -143,6 +230,7 @@ class HindiQuestionGenerator:
             pdf_path: Path to the PDF file
             prompt: User prompt (not used in Hindi generation)
             total_questions: Total number of questions to generate
+            pages: Zero-based pages to use (defaults to the whole document)
             
         Returns:
             List[str]: List of generated questions
@@ -151,7 +239,7 @@ class HindiQuestionGenerator:
             logger.info(f"Generating Hindi questions from PDF: {pdf_path}")
             
             # Extract text from PDF
-            text = self.extract_text_from_pdf(pdf_path)
+            text = self.extract_text_from_pdf(pdf_path, pages)
             if not text:
                 logger.warning("No text extracted from PDF")
                 return []
@@ -175,8 +263,35 @@ class HindiQuestionGenerator:
             logger.error(f"Error generating Hindi questions: {str(e)}")
             return []
 
-# Global instance for backward compatibility
-hindi_generator = HindiQuestionGenerator()
+    def generate_questions_from_chunks(
+        self,
+        relevant_chunks: List[str],
+        total_questions: int = 20,
+        questions_per_chunk: int = None
+    ) -> List[str]:
+        """
+        Generate Hindi questions from already retrieved chunks.
+        
+        Args:
+            relevant_chunks: Chunks ordered by relevance
+            total_questions: Total number of questions to generate
+            questions_per_chunk: Unused; the rule engine yields at most one
+                question per sentence
+            
+        Returns:
+            List[str]: List of generated questions
+        """
+        sentences = []
+        for chunk in relevant_chunks:
+            sentences.extend(self.split_text_into_sentences(chunk))
+        return self.process_sentences(sentences)[:total_questions]
+
+def __getattr__(name: str):
+    # Legacy global instance, created on first access and owned by the
+    # language registry so there is only one per process
+    if name == 'hindi_generator':
+        return get_language_generator('hindi')
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # Legacy function for backward compatibility
 def process_hindi_pdf(prompt: str, pdf_path: str) -> List[str]:
@@ -190,4 +305,4 @@ def process_hindi_pdf(prompt: str, pdf_path: str) -> List[str]:
     Returns:
         List[str]: Generated questions
     """
-    return hindi_generator.generate_questions_from_pdf(pdf_path, prompt) 
\ No newline at end of file
+    return get_language_generator('hindi').generate_questions_from_pdf(pdf_path, prompt) 
\ No newline at end of file
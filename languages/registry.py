@@ -0,0 +1,196 @@
+"""
+Registry of language generators.
+
+Each language registers its generator class with ``@register_language``,
+declaring its code, capabilities and the Python packages it needs. Generators
+are created on first use, so a worker only loads what the languages it
+actually serves require. ``Config.ENABLED_LANGUAGES`` restricts a deployment
+to some languages (e.g. a Hindi-only pool that never imports torch).
+
+Languages shipped outside this package are discovered through the
+``question_generator.languages`` entry-point group; each entry point names a
+module (or class) whose import registers the language.
+"""
+import logging
+import threading
+import importlib.util
+from importlib import metadata
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+ENTRY_POINT_GROUP = 'question_generator.languages'
+
+
+class LanguageSpec:
+    """Description of a registered language."""
+    
+    def __init__(
+        self,
+        name: str,
+        code: str,
+        factory: Callable[[], Any],
+        display_name: str = None,
+        description: str = "",
+        capabilities: Iterable[str] = (),
+        requires: Iterable[str] = (),
+        icon: str = "fa-language",
+        color: str = "primary"
+    ):
+        """
+        Initialize the spec.
+        
+        Args:
+            name: Language name used in forms and URLs (lowercase)
+            code: ISO 639-1 language code
+            factory: Callable creating the generator (usually its class)
+            display_name: Name shown in the UI (defaults to the title-cased name)
+            description: One-line description shown in the UI
+            capabilities: Features of the generator, e.g. ``rag``, ``model``,
+                ``translation``, ``rules``
+            requires: Top-level Python packages the generator imports
+            icon: Font Awesome icon class for the UI
+            color: Bootstrap colour name for the UI
+        """
+        self.name = name
+        self.code = code
+        self.factory = factory
+        self.display_name = display_name or name.title()
+        self.description = description
+        self.capabilities = frozenset(capabilities)
+        self.requires = tuple(requires)
+        self.icon = icon
+        self.color = color
+    
+    def missing_dependencies(self) -> List[str]:
+        """
+        List required packages that are not installed.
+        
+        Returns:
+            List[str]: Names of missing packages
+        """
+        return [package for package in self.requires if importlib.util.find_spec(package) is None]
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Describe the language for JSON responses."""
+        return {
+            'name': self.name,
+            'code': self.code,
+            'display_name': self.display_name,
+            'capabilities': sorted(self.capabilities),
+            'requires': list(self.requires),
+            'missing_dependencies': self.missing_dependencies()
+        }
+
+
+_specs: Dict[str, LanguageSpec] = {}
+_generators: Dict[str, Any] = {}
+_lock = threading.Lock()
+_entry_points_loaded = False
+
+
+def register_language(
+    name: str,
+    code: str,
+    **options: Any
+) -> Callable[[Callable[[], Any]], Callable[[], Any]]:
+    """
+    Class decorator registering a language generator.
+    
+    Args:
+        name: Language name (lowercase)
+        code: ISO 639-1 language code
+        **options: Further ``LanguageSpec`` fields (display_name, description,
+            capabilities, requires, icon, color)
+    
+    Returns:
+        Callable: Decorator returning the class unchanged
+    """
+    def decorator(factory: Callable[[], Any]) -> Callable[[], Any]:
+        _specs[name.lower()] = LanguageSpec(name.lower(), code, factory, **options)
+        return factory
+    return decorator
+
+
+def _load_entry_points() -> None:
+    global _entry_points_loaded
+    if _entry_points_loaded:
+        return
+    _entry_points_loaded = True
+    try:
+        entry_points = metadata.entry_points(group=ENTRY_POINT_GROUP)
+    except TypeError:
+        # Python < 3.10
+        entry_points = metadata.entry_points().get(ENTRY_POINT_GROUP, [])
+    for entry_point in entry_points:
+        try:
+            entry_point.load()
+        except Exception as e:
+            logger.error(f"Failed to load language plugin {entry_point.name}: {str(e)}")
+
+
+def registered_languages() -> Dict[str, LanguageSpec]:
+    """
+    Get every registered language, enabled or not.
+    
+    Returns:
+        Dict[str, LanguageSpec]: Language name to spec, in registration order
+    """
+    _load_entry_points()
+    return dict(_specs)
+
+
+def available_languages() -> Dict[str, LanguageSpec]:
+    """
+    Get the languages this deployment serves (``Config.ENABLED_LANGUAGES``,
+    or every registered language when it is empty).
+    
+    Returns:
+        Dict[str, LanguageSpec]: Language name to spec, in registration order
+    """
+    specs = registered_languages()
+    if not Config.ENABLED_LANGUAGES:
+        return specs
+    return {name: spec for name, spec in specs.items() if name in Config.ENABLED_LANGUAGES}
+
+
+def get_language_spec(language: str) -> Optional[LanguageSpec]:
+    """
+    Get an available language by name.
+    
+    Args:
+        language: Language name (case-insensitive)
+    
+    Returns:
+        Optional[LanguageSpec]: The spec, or None if the language is not available
+    """
+    return available_languages().get((language or '').lower())
+
+
+def get_language_generator(language: str) -> Optional[Any]:
+    """
+    Get the generator for a language, creating it on first use.
+    
+    Args:
+        language: Language name (case-insensitive)
+    
+    Returns:
+        Optional[Any]: Generator instance, or None if the language is not available
+    """
+    language = (language or '').lower()
+    generator = _generators.get(language)
+    if generator is None:
+        spec = get_language_spec(language)
+        if spec is None:
+            return None
+        with _lock:
+            generator = _generators.get(language)
+            if generator is None:
+                missing = spec.missing_dependencies()
+                if missing:
+                    logger.warning(f"Language {language} is missing dependencies: {', '.join(missing)}")
+                generator = spec.factory()
+                _generators[language] = generator
+    return generator
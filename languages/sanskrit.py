@@ -3,30 +3,60 @@ Sanskrit question generation module.
 """
 import logging
 import re
-from typing import List, Optional
-from googletrans import Translator
-from tqdm import tqdm
+import threading
+from typing import Any, List, Optional, Sequence
 
 from pdf_processor import extract_clean_text_chunks_from_pdf
-from question_generator import QuestionGenerator
-from utils import clean_text, sanitize_question, remove_duplicates_preserve_order
+from question_generator import question_generator as core_question_generator
+from utils import clean_text, file_sha256
+from postprocessing import postprocess_questions
+from budget import GenerationBudget
+from dedup import NearDuplicateFilter
 from config import Config
+from metrics import count_questions, timed
+from translation import create_translator
+from question_bank import record_source
+from languages.registry import get_language_generator, register_language
 
 logger = logging.getLogger(__name__)
 
+@register_language(
+    'sanskrit', 'sa',
+    description='Generate Sanskrit questions with translation assistance',
+    capabilities=('model', 'translation', 'prepare', 'pages'),
+    requires=('transformers', 'torch', 'googletrans', 'pdfplumber'),
+    icon='fa-pray',
+    color='warning'
+)
 class SanskritQuestionGenerator:
     """Handles Sanskrit question generation using translation approach."""
     
     def __init__(self):
         """Initialize the Sanskrit question generator."""
-        try:
-            self.translator = Translator()
-            self.question_generator = QuestionGenerator()
-            logger.info("Initialized Sanskrit question generator")
-        except Exception as e:
-            logger.error(f"Failed to initialize Sanskrit question generator: {str(e)}")
-            raise
+        # Shares the English model instead of loading a second copy
+        self.question_generator = core_question_generator
+        self._translator: Optional[Any] = None
+        self._lock = threading.Lock()
+        logger.info("Initialized Sanskrit question generator")
+    
+    @property
+    def translator(self) -> Any:
+        """Translation client (see Config.TRANSLATION_BACKEND), created on first use."""
+        if self._translator is None:
+            with self._lock:
+                if self._translator is None:
+                    self._translator = create_translator()
+        return self._translator
+    
+    def load(self) -> None:
+        """Load the question generation model now rather than on the first request."""
+        self.question_generator.load()
     
+    def warm_up(self) -> None:
+        """Warm up the question generation model (translation is not warmed up)."""
+        self.question_generator.warm_up()
+    
+    @timed('translation')
     def safe_translate(self, text: str, src: str, dest: str) -> Optional[str]:
         """
         Safely translate text with error handling.
@@ -49,19 +79,26 @@ class SanskritQuestionGenerator:
             logger.warning(f"Translation failed for text: {text[:50]}... Error: {str(e)}")
             return None
     
-    def retrieve_relevant_chunks(self, prompt: str, text_chunks: List[str], top_n: int = 5) -> List[str]:
+    def retrieve_relevant_chunks(
+        self,
+        prompt: str,
+        text_chunks: List[str],
+        top_n: int = 5,
+        document_id: str = None
+    ) -> List[str]:
         """
-        Retrieve relevant chunks using TF-IDF (inherited from base class).
+        Retrieve relevant chunks using the configured retriever (inherited from base class).
         
         Args:
             prompt: Search prompt
             text_chunks: Text chunks to search
             top_n: Number of top chunks
+            document_id: Identifier of the source document
             
         Returns:
             List[str]: Relevant chunks
         """
-        return self.question_generator.retrieve_relevant_chunks(prompt, text_chunks, top_n)
+        return self.question_generator.retrieve_relevant_chunks(prompt, text_chunks, top_n, document_id)
     
     def generate_questions_from_prompt_with_rag(
         self,
@@ -69,7 +106,8 @@ class SanskritQuestionGenerator:
         text_chunks: List[str],
         total_questions: int = 10,
         top_n_chunks: int = 5,
-        questions_per_chunk: int = 3
+        questions_per_chunk: int = 3,
+        document_id: str = None
     ) -> List[str]:
         """
         Generate Sanskrit questions using RAG with translation.
@@ -80,6 +118,7 @@ class SanskritQuestionGenerator:
             total_questions: Total number of questions to generate
             top_n_chunks: Number of top chunks to use
             questions_per_chunk: Number of questions per chunk
+            document_id: Identifier of the source document
             
         Returns:
             List[str]: List of generated questions in Sanskrit
@@ -97,43 +136,19 @@ class SanskritQuestionGenerator:
             relevant_chunks = self.retrieve_relevant_chunks(
                 translated_prompt, 
                 text_chunks, 
-                top_n=top_n_chunks
+                top_n=top_n_chunks,
+                document_id=document_id
             )
             
             if not relevant_chunks:
                 logger.warning("No relevant chunks found")
                 return []
             
-            # Generate questions from each relevant chunk
-            all_generated_questions = []
-            
-            for chunk in tqdm(relevant_chunks, desc="Generating Sanskrit questions"):
-                # Translate Sanskrit chunk to English
-                translated_chunk = self.safe_translate(chunk, src='sa', dest='en')
-                if not translated_chunk:
-                    continue
-                
-                # Generate questions in English
-                english_questions = self.question_generator.generate_questions_from_text(
-                    translated_chunk, 
-                    num_questions=questions_per_chunk
-                )
-                
-                # Translate questions back to Sanskrit
-                for question in english_questions:
-                    sanskrit_question = self.safe_translate(question, src='en', dest='sa')
-                    if sanskrit_question:
-                        sanitized = sanitize_question(sanskrit_question, min_length=10)
-                        if sanitized:
-                            all_generated_questions.append(sanitized)
-                
-                # Stop if we have enough questions
-                if len(all_generated_questions) >= total_questions:
-                    break
-            
-            # Remove duplicates and limit to requested number
-            unique_questions = remove_duplicates_preserve_order(all_generated_questions)
-            final_questions = unique_questions[:total_questions]
+            final_questions = self.generate_questions_from_chunks(
+                relevant_chunks,
+                total_questions=total_questions,
+                questions_per_chunk=questions_per_chunk
+            )
             
             logger.info(f"Generated {len(final_questions)} Sanskrit questions")
             return final_questions
@@ -142,13 +157,117 @@ class SanskritQuestionGenerator:
             logger.error(f"Error generating Sanskrit questions: {str(e)}")
             return []
     
+    def generate_questions_from_chunks(
+        self,
+        relevant_chunks: List[str],
+        total_questions: int = 10,
+        questions_per_chunk: int = 3
+    ) -> List[str]:
+        """
+        Generate Sanskrit questions from already retrieved Sanskrit chunks.
+        
+        Each chunk is translated to English, questions are generated in
+        English and translated back to Sanskrit.
+        
+        Args:
+            relevant_chunks: Chunks ordered by relevance
+            total_questions: Total number of questions to generate
+            questions_per_chunk: Number of questions per chunk
+            
+        Returns:
+            List[str]: List of generated questions in Sanskrit
+        """
+        from tqdm import tqdm
+        
+        # Generate questions from each relevant chunk, dropping near-duplicates
+        # as they arrive so the early stop counts only distinct questions; the
+        # budget sizes each chunk's request from the keep-rate so far
+        near_duplicates = NearDuplicateFilter()
+        budget = GenerationBudget(total_questions, per_chunk=questions_per_chunk)
+        
+        for position, chunk in enumerate(tqdm(relevant_chunks, desc="Generating Sanskrit questions")):
+            # Stop if we have enough questions
+            if budget.done:
+                break
+            
+            # Translate Sanskrit chunk to English
+            translated_chunk = self.safe_translate(chunk, src='sa', dest='en')
+            if not translated_chunk:
+                continue
+            
+            # Generate questions in English
+            num_questions = budget.next_count(len(relevant_chunks) - position)
+            cached = self.question_generator.cached_questions(translated_chunk, num_questions)
+            english_questions = cached if cached is not None else self.question_generator.generate_uncached_questions(
+                translated_chunk, 
+                num_questions=num_questions
+            )
+            
+            # Translate questions back to Sanskrit; untranslated questions
+            # fail the script check
+            translated = [
+                self.safe_translate(question, src='en', dest='sa')
+                for question in english_questions
+            ]
+            processed = postprocess_questions(
+                (question for question in translated if question),
+                language='sa',
+                min_length=10
+            )
+            kept = 0
+            for sanitized in processed.questions:
+                if near_duplicates.add(sanitized):
+                    kept += 1
+                    record_source([sanitized], relevant_chunks, position)
+            count_questions('translation', sanitized=processed.rejected, duplicate=processed.duplicates)
+            budget.record(num_questions, kept, cached=cached is not None)
+        
+        final_questions = near_duplicates.kept[:total_questions]
+        count_questions(
+            'translation',
+            kept=len(near_duplicates),
+            near_duplicate=near_duplicates.dropped
+        )
+        budget.report('translation')
+        return final_questions
+    
+    def prepare(self, pdf_path: str, document_id: str = None) -> int:
+        """
+        Extract, chunk and index a document before its first prompt arrives.
+        
+        Args:
+            pdf_path: Path to the PDF file
+            document_id: Document identifier (defaults to the file's SHA-256)
+            
+        Returns:
+            int: Number of chunks prepared
+        """
+        document_id = document_id or file_sha256(pdf_path)
+        text_chunks = extract_clean_text_chunks_from_pdf(pdf_path)
+        if text_chunks:
+            self.question_generator.retriever.prepare(text_chunks, document_id)
+        return len(text_chunks)
+    
+    def extract_text_chunks(self, pdf_path: str) -> Sequence[str]:
+        """
+        Extract and chunk a whole document, e.g. to register it in a corpus.
+        
+        Args:
+            pdf_path: Path to the PDF file
+            
+        Returns:
+            Sequence[str]: Text chunks (a ChunkStore)
+        """
+        return extract_clean_text_chunks_from_pdf(pdf_path)
+    
     def generate_questions_from_pdf(
         self,
         pdf_path: str,
         prompt: str,
         total_questions: int = 10,
         top_n_chunks: int = 5,
-        questions_per_chunk: int = 3
+        questions_per_chunk: int = 3,
+        pages: Sequence[int] = None
     ) -> List[str]:
         """
         Generate Sanskrit questions from a PDF file.
@@ -159,6 +278,7 @@ class SanskritQuestionGenerator:
             total_questions: Total number of questions to generate
             top_n_chunks: Number of top chunks to use
             questions_per_chunk: Number of questions per chunk
+            pages: Zero-based pages to use (defaults to the whole document)
             
         Returns:
             List[str]: List of generated questions
@@ -167,7 +287,7 @@ class SanskritQuestionGenerator:
             logger.info(f"Generating Sanskrit questions from PDF: {pdf_path}")
             
             # Extract text chunks from PDF
-            text_chunks = extract_clean_text_chunks_from_pdf(pdf_path)
+            text_chunks = extract_clean_text_chunks_from_pdf(pdf_path, pages=pages)
             
             if not text_chunks:
                 logger.warning("No text chunks extracted from PDF")
@@ -179,7 +299,8 @@ class SanskritQuestionGenerator:
                 text_chunks=text_chunks,
                 total_questions=total_questions,
                 top_n_chunks=top_n_chunks,
-                questions_per_chunk=questions_per_chunk
+                questions_per_chunk=questions_per_chunk,
+                document_id=file_sha256(pdf_path)
             )
             
             return questions
@@ -188,8 +309,12 @@ class SanskritQuestionGenerator:
             logger.error(f"Error generating Sanskrit questions from PDF: {str(e)}")
             return []
 
-# Global instance for backward compatibility
-sanskrit_generator = SanskritQuestionGenerator()
+def __getattr__(name: str):
+    # Legacy global instance, created on first access and owned by the
+    # language registry so there is only one per process
+    if name == 'sanskrit_generator':
+        return get_language_generator('sanskrit')
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # Legacy functions for backward compatibility
 def generate_questions_from_prompt_with_rag(
@@ -212,6 +337,6 @@ def generate_questions_from_prompt_with_rag(
     Returns:
         List[str]: Generated questions
     """
-    return sanskrit_generator.generate_questions_from_prompt_with_rag(
+    return get_language_generator('sanskrit').generate_questions_from_prompt_with_rag(
         prompt, text_chunks, total_questions, top_n_chunks, questions_per_chunk
     ) 
\ No newline at end of file
@@ -0,0 +1,111 @@
+"""
+Application startup lifecycle: model loading, warm-up and readiness reporting.
+
+The lifecycle moves through ``starting`` -> ``loaded`` -> ``ready`` (or
+``failed``). State is per process: with gunicorn ``--preload`` the master
+loads the models and every forked worker inherits ``loaded``, then runs its
+own warm-up generation before reporting ready.
+"""
+import os
+import time
+import logging
+import threading
+from typing import Any, Dict, Mapping
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+STARTING = 'starting'
+LOADED = 'loaded'
+READY = 'ready'
+FAILED = 'failed'
+
+_lock = threading.Lock()
+_state: Dict[str, Any] = {
+    'status': STARTING,
+    'loaded_at': None,
+    'ready_at': None,
+    'warm_up_seconds': {},
+    'error': None
+}
+
+
+def mark_models_loaded() -> None:
+    """Record that model weights are loaded in this process."""
+    with _lock:
+        if _state['status'] == STARTING:
+            _state['status'] = LOADED
+            _state['loaded_at'] = time.time()
+    logger.info("Models loaded")
+
+
+def warm_up(generators: Mapping[str, Any]) -> bool:
+    """
+    Run a warm-up generation for every generator and mark the process ready.
+    
+    Args:
+        generators: Mapping of language name to generator instance; generators
+            without a ``warm_up`` method are considered warm already
+        
+    Returns:
+        bool: True if the process is ready to serve requests
+    """
+    with _lock:
+        if _state['status'] == READY:
+            return True
+    
+    if not Config.WARMUP_ENABLED:
+        logger.info("Warm-up disabled; marking application ready")
+        _mark_ready({})
+        return True
+    
+    timings = {}
+    try:
+        for language, generator in generators.items():
+            warm = getattr(generator, 'warm_up', None)
+            if warm is None:
+                continue
+            start = time.perf_counter()
+            warm()
+            timings[language] = round(time.perf_counter() - start, 3)
+            logger.info(f"Warmed up {language} generator in {timings[language]}s")
+    except Exception as e:
+        logger.error(f"Warm-up failed: {str(e)}")
+        with _lock:
+            _state['status'] = FAILED
+            _state['error'] = str(e)
+        return False
+    
+    _mark_ready(timings)
+    return True
+
+
+def _mark_ready(timings: Dict[str, float]) -> None:
+    with _lock:
+        _state['status'] = READY
+        _state['ready_at'] = time.time()
+        _state['warm_up_seconds'] = timings
+        _state['error'] = None
+    logger.info(f"Application ready (pid {os.getpid()})")
+
+
+def is_ready() -> bool:
+    """
+    Check whether this process has finished loading and warming up.
+    
+    Returns:
+        bool: True if requests can be served at full speed
+    """
+    return _state['status'] == READY
+
+
+def readiness() -> Dict[str, Any]:
+    """
+    Describe the lifecycle state of this process.
+    
+    Returns:
+        Dict[str, Any]: Status, timestamps and per-language warm-up timings
+    """
+    with _lock:
+        return dict(_state, pid=os.getpid(), warm_up_seconds=dict(_state['warm_up_seconds']))
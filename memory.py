@@ -0,0 +1,219 @@
+"""
+Memory accounting utilities.
+
+``RequestMemory`` reports the peak resident memory of a worker while it
+serves a request: on Linux the kernel's high-water mark (``VmHWM``) is read
+when the request ends. The mark belongs to the whole process, so it is only
+reset when a request starts while no other request is in flight. With several
+threads per worker, the peak of overlapping requests is therefore an upper
+bound that includes the memory of the requests they overlap with; it never
+hides a peak by resetting the mark under a running request.
+
+With ``MEMORY_TRACE_STAGES`` each timed pipeline stage is wrapped in
+tracemalloc snapshots, and the source lines that allocated the memory still
+held when the stage ends are logged. ``should_recycle`` backs the gunicorn
+``post_request`` hook that restarts a worker whose RSS exceeds
+``WORKER_MAX_RSS_MB``.
+"""
+import sys
+import logging
+import threading
+import tracemalloc
+from typing import Dict, Optional
+
+from config import Config
+from metrics import REQUEST_PEAK_RSS, STAGE_ALLOCATED, WORKER_RECYCLES, WORKER_RSS
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 ** 2
+
+# Requests measured by RequestMemory in this process, and whether the
+# high-water mark was reset when the first of them started
+_in_flight = 0
+_in_flight_peak_reset = False
+_in_flight_lock = threading.Lock()
+
+
+def _proc_status() -> Dict[str, int]:
+    # VmRSS and VmHWM in bytes; empty where /proc is not available
+    values = {}
+    try:
+        with open('/proc/self/status', 'r') as fh:
+            for line in fh:
+                if line.startswith(('VmRSS:', 'VmHWM:')):
+                    name, value = line.split(':', 1)
+                    values[name] = int(value.split()[0]) * 1024
+    except (OSError, ValueError):
+        pass
+    return values
+
+
+def current_rss() -> int:
+    """
+    Get the resident memory of this process.
+    
+    Returns:
+        int: Resident set size in bytes, or 0 if it cannot be read
+    """
+    rss = _proc_status().get('VmRSS')
+    if rss is None:
+        try:
+            import psutil
+            
+            rss = psutil.Process().memory_info().rss
+        except Exception:
+            rss = 0
+    return rss
+
+
+def reset_peak_rss() -> bool:
+    """
+    Reset the kernel's high-water mark of this process's resident memory.
+    
+    Returns:
+        bool: True if the mark was reset (Linux 4.0 and later)
+    """
+    try:
+        with open('/proc/self/clear_refs', 'w') as fh:
+            fh.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss() -> int:
+    """
+    Get the peak resident memory of this process.
+    
+    Returns:
+        int: Peak resident set size in bytes since the last ``reset_peak_rss``
+        (or since the process started), or 0 if it cannot be read
+    """
+    peak = _proc_status().get('VmHWM')
+    if peak is not None:
+        return peak
+    try:
+        import resource
+        
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+    except (ImportError, OSError):
+        return 0
+
+
+class RequestMemory:
+    """Measures the peak RSS of the worker while a request is served."""
+    
+    def __init__(self, language: str):
+        """
+        Initialize the measurement.
+        
+        Args:
+            language: Language of the request, used as the metric label
+        """
+        self.language = language
+        self.start_rss = 0
+        self.end_rss = 0
+        self.peak = 0
+        self._peak_reset = False
+    
+    def __enter__(self) -> 'RequestMemory':
+        global _in_flight, _in_flight_peak_reset
+        with _in_flight_lock:
+            # Resetting under another running request would hide its peak
+            if _in_flight == 0:
+                _in_flight_peak_reset = reset_peak_rss()
+            _in_flight += 1
+            self._peak_reset = _in_flight_peak_reset
+        self.start_rss = current_rss()
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> bool:
+        global _in_flight
+        with _in_flight_lock:
+            _in_flight -= 1
+        self.end_rss = current_rss()
+        # Without a reset the high-water mark covers the whole process lifetime
+        self.peak = max(peak_rss() if self._peak_reset else 0, self.start_rss, self.end_rss)
+        REQUEST_PEAK_RSS.labels(language=self.language).observe(self.peak)
+        WORKER_RSS.set(self.end_rss)
+        logger.info(
+            f"Memory of {self.language} request: peak RSS {self.peak / MB:.0f} MB, "
+            f"{self.start_rss / MB:.0f} MB before, {self.end_rss / MB:.0f} MB after"
+        )
+        return False
+
+
+class StageMemoryTrace:
+    """Compares tracemalloc snapshots taken around one pipeline stage."""
+    
+    # Allocations made by tracemalloc and the import system are not the stage's
+    _FILTERS = (
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+        tracemalloc.Filter(False, '<unknown>')
+    )
+    
+    def __init__(self, stage: str):
+        """
+        Initialize the trace.
+        
+        Args:
+            stage: Name of the stage
+        """
+        self.stage = stage
+        self._before: Optional[tracemalloc.Snapshot] = None
+        self._traced_before = 0
+    
+    def start(self) -> None:
+        """Take the snapshot before the stage, starting tracemalloc if needed."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self._traced_before = tracemalloc.get_traced_memory()[0]
+        if hasattr(tracemalloc, 'reset_peak'):
+            tracemalloc.reset_peak()
+        self._before = tracemalloc.take_snapshot().filter_traces(self._FILTERS)
+    
+    def stop(self) -> None:
+        """Take the snapshot after the stage and report what it still holds."""
+        if self._before is None or not tracemalloc.is_tracing():
+            return
+        peak = tracemalloc.get_traced_memory()[1] - self._traced_before
+        after = tracemalloc.take_snapshot().filter_traces(self._FILTERS)
+        stats = after.compare_to(self._before, 'lineno')
+        retained = sum(stat.size_diff for stat in stats)
+        STAGE_ALLOCATED.labels(stage=self.stage).observe(max(retained, 0))
+        
+        top = [stat for stat in stats if stat.size_diff > 0][:Config.MEMORY_TRACE_TOP]
+        lines = "; ".join(
+            f"{stat.traceback[0].filename}:{stat.traceback[0].lineno} +{stat.size_diff / 1024:.0f} KiB"
+            for stat in top
+        )
+        logger.info(
+            f"Stage {self.stage} memory: {retained / 1024:+.0f} KiB retained, "
+            f"{peak / 1024:.0f} KiB peak; {lines or 'no growth'}"
+        )
+
+
+def should_recycle(rss: int = None) -> bool:
+    """
+    Check whether this worker has outgrown Config.WORKER_MAX_RSS_MB.
+    
+    Args:
+        rss: Resident memory in bytes (defaults to the current RSS)
+    
+    Returns:
+        bool: True if the worker should exit after the current request
+    """
+    if not Config.WORKER_MAX_RSS_MB:
+        return False
+    rss = current_rss() if rss is None else rss
+    if rss <= Config.WORKER_MAX_RSS_MB * MB:
+        return False
+    WORKER_RECYCLES.inc()
+    logger.warning(
+        f"Worker RSS {rss / MB:.0f} MB exceeds WORKER_MAX_RSS_MB={Config.WORKER_MAX_RSS_MB}; recycling worker"
+    )
+    return True
@@ -0,0 +1,240 @@
+"""
+Instrumentation utilities: per-stage timers, counters and the Prometheus exposition.
+
+When the application runs under gunicorn with several workers, set the
+``PROMETHEUS_MULTIPROC_DIR`` environment variable (see ``gunicorn.conf.py``) so
+that every worker writes its samples to a shared directory and ``/metrics``
+aggregates them regardless of which worker answers the scrape.
+"""
+import os
+import time
+import logging
+from contextlib import ContextDecorator
+from typing import Optional, Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client import multiprocess
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Buckets cover everything from a fast TF-IDF lookup to a slow CPU generation
+STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+STAGE_DURATION = Histogram(
+    'qg_stage_duration_seconds',
+    'Time spent in each pipeline stage',
+    ['stage'],
+    buckets=STAGE_BUCKETS
+)
+
+STAGE_ERRORS = Counter(
+    'qg_stage_errors_total',
+    'Pipeline stages that exited with an exception',
+    ['stage']
+)
+
+REQUEST_DURATION = Histogram(
+    'qg_request_duration_seconds',
+    'End-to-end duration of question generation requests',
+    ['language'],
+    buckets=STAGE_BUCKETS
+)
+
+CHUNKS_TOTAL = Counter(
+    'qg_chunks_total',
+    'Text chunks handled by the pipeline',
+    ['stage']
+)
+
+INPUT_TOKENS_TOTAL = Counter(
+    'qg_input_tokens_total',
+    'Whitespace-delimited tokens fed to the question generation model'
+)
+
+QUESTIONS_TOTAL = Counter(
+    'qg_questions_total',
+    'Candidate questions by source and outcome (kept, sanitized, duplicate, near_duplicate)',
+    ['source', 'outcome']
+)
+
+GENERATIONS_TOTAL = Counter(
+    'qg_generations_total',
+    'Sequences requested from the generation model in the RAG loop',
+    ['source']
+)
+
+GENERATIONS_WASTED = Counter(
+    'qg_generations_wasted_total',
+    'Generated sequences that did not end up in the response',
+    ['source']
+)
+
+QUESTION_CACHE_REQUESTS = Counter(
+    'qg_question_cache_requests_total',
+    'Chunk question cache lookups by outcome (hit, miss)',
+    ['outcome']
+)
+
+PAGE_CACHE_REQUESTS = Counter(
+    'qg_page_cache_requests_total',
+    'Page text cache lookups by outcome (hit, miss)',
+    ['outcome']
+)
+
+QUESTION_BANK_REQUESTS = Counter(
+    'qg_question_bank_requests_total',
+    'Question bank lookups by outcome (exact, similar, miss)',
+    ['outcome']
+)
+
+ADMISSION_DECISIONS = Counter(
+    'qg_admission_decisions_total',
+    'Admission decisions for generation requests (admitted, rejected_client, rejected_capacity)',
+    ['language', 'outcome']
+)
+
+ADMISSION_WAIT = Histogram(
+    'qg_admission_wait_seconds',
+    'Time generation requests waited for capacity',
+    ['language'],
+    buckets=STAGE_BUCKETS
+)
+
+# Buckets from a small worker to one holding several models and large documents
+MEMORY_BUCKETS = tuple(2 ** power * 1024 ** 2 for power in range(5, 15))
+
+REQUEST_PEAK_RSS = Histogram(
+    'qg_request_peak_rss_bytes',
+    'Peak resident memory of the worker while serving a generation request',
+    ['language'],
+    buckets=MEMORY_BUCKETS
+)
+
+WORKER_RSS = Gauge(
+    'qg_worker_rss_bytes',
+    'Resident memory of each worker after its last generation request',
+    multiprocess_mode='liveall'
+)
+
+WORKER_RECYCLES = Counter(
+    'qg_worker_recycles_total',
+    'Workers restarted because their resident memory exceeded WORKER_MAX_RSS_MB'
+)
+
+STAGE_ALLOCATED = Histogram(
+    'qg_stage_allocated_bytes',
+    'Python memory still allocated when a stage ends (MEMORY_TRACE_STAGES only)',
+    ['stage'],
+    buckets=(0,) + tuple(2 ** power * 1024 for power in range(4, 22, 2))
+)
+
+GENERATION_BATCH_SIZE = Histogram(
+    'qg_generation_batch_size',
+    'Number of generation calls combined into one model batch',
+    buckets=(1, 2, 4, 8, 16, 32, 64)
+)
+
+
+class StageTimer(ContextDecorator):
+    """Times a pipeline stage; usable as a context manager or a decorator."""
+
+    def __init__(self, stage: str):
+        """
+        Initialize the timer.
+
+        Args:
+            stage: Name of the stage, used as the ``stage`` metric label
+        """
+        self.stage = stage
+        self._start: Optional[float] = None
+        self._memory = None
+        self.elapsed: Optional[float] = None
+
+    def _recreate_cm(self):
+        # A fresh timer per decorated call keeps concurrent calls independent
+        return StageTimer(self.stage)
+
+    def __enter__(self) -> 'StageTimer':
+        if Config.MEMORY_TRACE_STAGES:
+            from memory import StageMemoryTrace
+            self._memory = StageMemoryTrace(self.stage)
+            self._memory.start()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> bool:
+        self.elapsed = time.perf_counter() - self._start
+        STAGE_DURATION.labels(stage=self.stage).observe(self.elapsed)
+        if exc_type is not None:
+            STAGE_ERRORS.labels(stage=self.stage).inc()
+        logger.debug(f"Stage {self.stage} took {self.elapsed:.4f}s")
+        if self._memory is not None:
+            self._memory.stop()
+        return False
+
+
+def timed(stage: str) -> StageTimer:
+    """
+    Create a timer for a pipeline stage.
+
+    Args:
+        stage: Name of the stage
+
+    Returns:
+        StageTimer: Timer usable with ``with`` or as ``@timed(...)``
+    """
+    return StageTimer(stage)
+
+
+def count_questions(
+    source: str,
+    kept: int = 0,
+    sanitized: int = 0,
+    duplicate: int = 0,
+    near_duplicate: int = 0
+) -> None:
+    """
+    Record the outcome of a batch of candidate questions.
+
+    Args:
+        source: Where the candidates came from (e.g. ``model``, ``hindi_rules``)
+        kept: Questions that survived sanitization and deduplication
+        sanitized: Candidates rejected by sanitization
+        duplicate: Candidates dropped as duplicates
+        near_duplicate: Candidates dropped as near-duplicates of questions
+            kept earlier in the request
+    """
+    outcomes = (
+        ('kept', kept),
+        ('sanitized', sanitized),
+        ('duplicate', duplicate),
+        ('near_duplicate', near_duplicate)
+    )
+    for outcome, value in outcomes:
+        if value:
+            QUESTIONS_TOTAL.labels(source=source, outcome=outcome).inc(value)
+
+
+def generate_metrics() -> Tuple[bytes, str]:
+    """
+    Render all metrics in the Prometheus text format.
+
+    Returns:
+        Tuple[bytes, str]: Response body and its content type
+    """
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
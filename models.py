@@ -0,0 +1,243 @@
+"""
+Loading of the transformer models used for question generation, and the CPU
+thread policy applied to them.
+
+Every gunicorn worker that runs the model gets ``cores / workers`` intra-op
+threads (unless overridden in ``Config``) so that several PyTorch instances do
+not oversubscribe the machine; workers can optionally be pinned to disjoint
+cores. With ``GENERATION_BACKEND=stub`` a deterministic stand-in replaces the
+model, e.g. for load tests.
+"""
+import os
+import re
+import sys
+import time
+import hashlib
+import logging
+from typing import Any, Dict, List, Optional, Union
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+FALLBACK_MODEL = "google/flan-t5-base"
+
+# Policy applied to this process, reported at startup and by /healthz/ready
+_cpu_policy: Optional[Dict[str, Any]] = None
+
+
+def available_cores() -> List[int]:
+    """
+    List the CPU cores this process may run on.
+    
+    Returns:
+        List[int]: Core ids, honouring container CPU affinity where supported
+    """
+    if hasattr(os, 'sched_getaffinity'):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def cpu_thread_policy(worker_slot: int = None, workers: int = None) -> Dict[str, Any]:
+    """
+    Derive the CPU thread settings for one model-serving process.
+    
+    Args:
+        worker_slot: Index of this worker among its siblings, used for core pinning
+        workers: Number of processes sharing the machine (defaults to Config.WEB_CONCURRENCY)
+        
+    Returns:
+        Dict[str, Any]: ``intra_op_threads``, ``inter_op_threads`` and the
+        ``cores`` to pin to (empty when pinning is disabled)
+    """
+    if workers is None:
+        workers = Config.WEB_CONCURRENCY
+    cores = available_cores()
+    per_worker = max(1, len(cores) // max(1, workers))
+    
+    pinned: List[int] = []
+    if Config.TORCH_PIN_CORES and worker_slot is not None:
+        start = (worker_slot * per_worker) % len(cores)
+        pinned = [cores[(start + i) % len(cores)] for i in range(per_worker)]
+    
+    return {
+        'intra_op_threads': Config.TORCH_INTRA_OP_THREADS or per_worker,
+        'inter_op_threads': Config.TORCH_INTER_OP_THREADS or 1,
+        'cores': pinned,
+        'workers': workers,
+        'worker_slot': worker_slot
+    }
+
+
+def apply_cpu_thread_policy(worker_slot: int = None, workers: int = None) -> Dict[str, Any]:
+    """
+    Apply the CPU thread policy to this process.
+    
+    Environment variables are set so a later torch import picks the policy
+    up; if torch is already loaded (e.g. preloaded in the gunicorn master) its
+    thread pools are resized directly.
+    
+    Args:
+        worker_slot: Index of this worker among its siblings
+        workers: Number of processes sharing the machine
+        
+    Returns:
+        Dict[str, Any]: The applied policy
+    """
+    global _cpu_policy
+    policy = cpu_thread_policy(worker_slot, workers)
+    
+    os.environ['OMP_NUM_THREADS'] = str(policy['intra_op_threads'])
+    os.environ['MKL_NUM_THREADS'] = str(policy['intra_op_threads'])
+    if policy['cores'] and hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, policy['cores'])
+    
+    _cpu_policy = policy
+    if 'torch' in sys.modules:
+        _apply_torch_threads(policy)
+    else:
+        logger.info(f"CPU thread policy: {policy}")
+    return policy
+
+
+def _apply_torch_threads(policy: Dict[str, Any]) -> None:
+    import torch
+    
+    torch.set_num_threads(policy['intra_op_threads'])
+    try:
+        torch.set_num_interop_threads(policy['inter_op_threads'])
+    except RuntimeError:
+        # Inter-op threads can only be set once, before any parallel work
+        logger.debug("Inter-op thread count already fixed for this process")
+    
+    policy['effective_intra_op_threads'] = torch.get_num_threads()
+    policy['effective_inter_op_threads'] = torch.get_num_interop_threads()
+    logger.info(
+        f"Torch threads: intra-op {policy['effective_intra_op_threads']}, "
+        f"inter-op {policy['effective_inter_op_threads']}, "
+        f"cores {policy['cores'] or 'unpinned'}"
+    )
+
+
+def effective_cpu_policy() -> Optional[Dict[str, Any]]:
+    """
+    Return the CPU thread policy applied to this process.
+    
+    Returns:
+        Optional[Dict[str, Any]]: The policy, or None if none was applied
+    """
+    return dict(_cpu_policy) if _cpu_policy else None
+
+
+class StubPipeline:
+    """
+    Deterministic stand-in for the text2text-generation pipeline.
+    
+    Questions are built from the words of the input, so retrieval, filtering
+    and caching downstream do their usual work, and each call takes a fixed
+    time instead of a model's. It needs neither torch nor model weights.
+    """
+    
+    TEMPLATES = (
+        "What does the passage say about {0}?",
+        "Why is {0} important in this context?",
+        "How is {0} related to {1}?",
+        "Which statement about {0} is correct?",
+        "What role does {1} play in {0}?",
+        "When is {0} mentioned together with {1}?"
+    )
+    
+    def __init__(self, latency_ms: float = None):
+        """
+        Initialize the stub.
+        
+        Args:
+            latency_ms: Time each call takes (defaults to Config.STUB_GENERATION_LATENCY_MS)
+        """
+        if latency_ms is None:
+            latency_ms = Config.STUB_GENERATION_LATENCY_MS
+        self.latency = latency_ms / 1000
+    
+    def _generate(self, text: str, num_return_sequences: int = 1, **kwargs: Any) -> List[Dict[str, str]]:
+        words = [word for word in re.findall(r'\w+', text.split(':', 1)[-1]) if len(word) > 3] or ['the text']
+        seed = int(hashlib.sha256(text.encode('utf-8')).hexdigest()[:8], 16)
+        outputs = []
+        for i in range(num_return_sequences):
+            template = self.TEMPLATES[(seed + i) % len(self.TEMPLATES)]
+            first = words[(seed + 3 * i) % len(words)]
+            second = words[(seed + 3 * i + 1) % len(words)]
+            outputs.append({'generated_text': template.format(first, second)})
+        return outputs
+    
+    def __call__(self, inputs: Union[str, List[str]], batch_size: int = None, **kwargs: Any) -> List[Any]:
+        """
+        Generate outputs shaped like the Hugging Face pipeline's.
+        
+        Args:
+            inputs: One formatted input or a batch of them
+            batch_size: Ignored; accepted for compatibility
+            **kwargs: Generation arguments (only ``num_return_sequences`` is used)
+        
+        Returns:
+            List[Any]: Outputs with ``generated_text`` for a single input; for a
+            batch, one list per input (flattened when each has one sequence)
+        """
+        if self.latency:
+            time.sleep(self.latency)
+        if isinstance(inputs, str):
+            return self._generate(inputs, **kwargs)
+        outputs = [self._generate(text, **kwargs) for text in inputs]
+        return [output[0] if len(output) == 1 else output for output in outputs]
+
+
+def load_generation_pipeline(model_name: str = None) -> Any:
+    """
+    Load the text2text-generation pipeline, falling back to a second model.
+    
+    Args:
+        model_name: Name of the transformer model to use
+        
+    Returns:
+        Any: A Hugging Face pipeline callable
+        
+    Raises:
+        RuntimeError: If neither the requested nor the fallback model loads
+    """
+    if Config.GENERATION_BACKEND == 'stub':
+        logger.info("Using the stub generation backend")
+        return StubPipeline()
+    
+    # Imported here so processes that delegate to the inference server never load torch
+    from transformers import pipeline
+    
+    policy = _cpu_policy or apply_cpu_thread_policy()
+    if 'effective_intra_op_threads' not in policy:
+        _apply_torch_threads(policy)
+    
+    if model_name is None:
+        model_name = Config.QUESTION_GENERATOR_MODEL
+    
+    try:
+        # Try to load the model with error handling
+        generation_pipeline = pipeline(
+            "text2text-generation", 
+            model=model_name,
+            device=-1  # Force CPU usage
+        )
+        logger.info(f"Question generator initialized with model: {model_name}")
+        return generation_pipeline
+    except Exception as e:
+        logger.error(f"Failed to initialize question generator with {model_name}: {str(e)}")
+        # Fallback to a simpler model if the main one fails
+        try:
+            logger.info("Attempting to use fallback model...")
+            generation_pipeline = pipeline(
+                "text2text-generation", 
+                model=FALLBACK_MODEL,
+                device=-1  # Force CPU usage
+            )
+            logger.info(f"Successfully initialized with fallback model: {FALLBACK_MODEL}")
+            return generation_pipeline
+        except Exception as fallback_error:
+            logger.error(f"Fallback model also failed: {str(fallback_error)}")
+            raise RuntimeError("Could not initialize any question generation model")
@@ -0,0 +1,96 @@
+"""
+Script-aware text normalization.
+
+Extracted text and generated questions are normalized to Unicode NFC. URLs
+and characters outside a whitelist are removed, and whitespace runs are
+collapsed. The whitelist depends on the script: Devanagari keeps its vowel
+signs, virama, nukta, danda (।) and double danda (॥), so Hindi and Sanskrit
+text keeps its words and sentence boundaries. Python's ``\\w`` does not match
+combining marks. Patterns are compiled once per language at import.
+"""
+import re
+import unicodedata
+from typing import Dict, Iterable
+
+# Bump when normalization changes, so cached extracted text is not reused
+NORMALIZATION_VERSION = 2
+
+_COMMON_PUNCTUATION = r'\.\,\!\?\;\:\-\(\)\[\]\{\}'
+
+# Characters kept besides word characters and whitespace, per script
+SCRIPT_CHARACTERS: Dict[str, str] = {
+    'latin': _COMMON_PUNCTUATION,
+    # Devanagari block (signs, danda, double danda), Vedic extensions,
+    # Devanagari Extended and the zero-width (non-)joiners used in conjuncts
+    'devanagari': _COMMON_PUNCTUATION + r'\u0900-\u097F\u1CD0-\u1CFF\uA8E0-\uA8FF\u200C\u200D'
+}
+
+# Script of each language code
+LANGUAGE_SCRIPTS: Dict[str, str] = {
+    'en': 'latin',
+    'hi': 'devanagari',
+    'sa': 'devanagari'
+}
+
+# Sentence-ending punctuation per script
+SENTENCE_ENDINGS: Dict[str, str] = {
+    'latin': '.!?',
+    'devanagari': '।॥!?'
+}
+
+_WHITESPACE_PATTERN = re.compile(r'\s+')
+
+
+def _strip_pattern(scripts: Iterable[str]) -> re.Pattern:
+    allowed = ''.join(SCRIPT_CHARACTERS[script] for script in scripts)
+    return re.compile(rf'http\S+|www\S+|file:\S+|\S+\.html|[^\w\s{allowed}]')
+
+
+_STRIP_PATTERNS: Dict[str, re.Pattern] = {
+    code: _strip_pattern([script]) for code, script in LANGUAGE_SCRIPTS.items()
+}
+# Text of unknown language keeps the characters of every script
+_DEFAULT_STRIP_PATTERN = _strip_pattern(SCRIPT_CHARACTERS)
+
+
+def _sentence_pattern(endings: str) -> re.Pattern:
+    return re.compile(rf'(?<=[{re.escape(endings)}])\s+')
+
+
+_SENTENCE_PATTERNS: Dict[str, re.Pattern] = {
+    code: _sentence_pattern(SENTENCE_ENDINGS[script]) for code, script in LANGUAGE_SCRIPTS.items()
+}
+_DEFAULT_SENTENCE_PATTERN = _sentence_pattern(''.join(sorted(set(''.join(SENTENCE_ENDINGS.values())))))
+
+
+def normalize_text(text: str, language: str = None) -> str:
+    """
+    Normalize text for the given language.
+    
+    Args:
+        text: Raw text
+        language: Language code (e.g. ``hi``); unknown or None keeps the
+            characters of every supported script
+    
+    Returns:
+        str: NFC-normalized text without URLs or unsupported characters, with
+        whitespace collapsed to single spaces
+    """
+    if not text:
+        return ""
+    text = unicodedata.normalize('NFC', text)
+    text = _STRIP_PATTERNS.get(language, _DEFAULT_STRIP_PATTERN).sub('', text)
+    return _WHITESPACE_PATTERN.sub(' ', text).strip()
+
+
+def sentence_split_pattern(language: str = None) -> re.Pattern:
+    """
+    Get the compiled pattern that splits normalized text into sentences.
+    
+    Args:
+        language: Language code (None splits at the endings of every script)
+    
+    Returns:
+        re.Pattern: Pattern matching the whitespace after a sentence ending
+    """
+    return _SENTENCE_PATTERNS.get(language, _DEFAULT_SENTENCE_PATTERN)
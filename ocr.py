@@ -0,0 +1,217 @@
+"""
+OCR fallback for PDF pages without a text layer.
+
+Scanned books come back empty from pdfplumber and PyMuPDF. Those pages are
+rendered with PyMuPDF at ``Config.OCR_DPI`` and read by a local Tesseract
+(through the optional ``pytesseract`` package) in a pool of processes. The
+recognized text goes to the page cache under a namespace naming the
+Tesseract languages and resolution, so each scanned page is paid for once.
+"""
+import os
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from typing import Any, List, Optional, Sequence
+
+from config import Config
+from utils import clean_text
+from normalization import NORMALIZATION_VERSION
+from page_cache import page_cache
+from metrics import timed
+
+logger = logging.getLogger(__name__)
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_pid: Optional[int] = None
+_lock = threading.Lock()
+
+
+@lru_cache(maxsize=1)
+def ocr_languages() -> str:
+    """
+    Get the Tesseract languages pages are recognized with.
+    
+    Configured languages whose data is not installed are left out.
+    
+    Returns:
+        str: ``+``-joined languages such as ``hin+san+eng``, or '' if
+        Tesseract or pytesseract is not available
+    """
+    try:
+        import pytesseract
+        
+        installed = set(pytesseract.get_languages(config=''))
+    except Exception as e:
+        logger.info(f"OCR is not available: {str(e)}")
+        return ''
+    
+    wanted = [language.strip() for language in Config.OCR_LANGUAGES.split('+') if language.strip()]
+    missing = [language for language in wanted if language not in installed]
+    if missing:
+        logger.warning(f"Tesseract language data not installed: {', '.join(missing)}")
+    return '+'.join(language for language in wanted if language in installed)
+
+
+def ocr_available() -> bool:
+    """
+    Check whether pages without a text layer can be OCR'd.
+    
+    Returns:
+        bool: True if OCR is enabled and Tesseract has one of the configured languages
+    """
+    return Config.OCR_ENABLED and bool(ocr_languages())
+
+
+def has_text_layer(pdf_path: str) -> bool:
+    """
+    Check whether any page of a PDF has extractable text.
+    
+    Args:
+        pdf_path: Path to the PDF file
+    
+    Returns:
+        bool: False only if the PDF was read and no page has text
+    """
+    try:
+        import fitz  # PyMuPDF
+        
+        with fitz.open(pdf_path) as pdf:
+            return any(page.get_text().strip() for page in pdf)
+    except Exception as e:
+        logger.warning(f"Could not inspect text layer of {pdf_path}: {str(e)}")
+        return True
+
+
+def _init_worker() -> None:
+    # One Tesseract thread per process; the pool provides the parallelism
+    os.environ['OMP_THREAD_LIMIT'] = '1'
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor, _executor_pid
+    with _lock:
+        if _executor is None or _executor_pid != os.getpid():
+            # forkserver: forking a threaded gunicorn worker directly is unsafe
+            _executor = ProcessPoolExecutor(
+                max_workers=Config.OCR_WORKERS or os.cpu_count() or 1,
+                mp_context=multiprocessing.get_context('forkserver'),
+                initializer=_init_worker
+            )
+            _executor_pid = os.getpid()
+        return _executor
+
+
+def _recognize(image: Any, languages: str) -> str:
+    import pytesseract
+    
+    return pytesseract.image_to_string(image, lang=languages)
+
+
+def ocr_page(pdf_path: str, number: int, languages: str, dpi: int) -> str:
+    """
+    Render one page and recognize its text.
+    
+    Runs in the OCR pool, so it only takes picklable arguments.
+    
+    Args:
+        pdf_path: Path to the PDF file
+        number: Zero-based page number
+        languages: Tesseract languages, e.g. ``hin+san+eng``
+        dpi: Rendering resolution
+    
+    Returns:
+        str: Cleaned text of the page
+    """
+    import fitz  # PyMuPDF
+    from PIL import Image
+    
+    with fitz.open(pdf_path) as pdf:
+        pixmap = pdf[number].get_pixmap(dpi=dpi, colorspace=fitz.csGRAY, alpha=False)
+    image = Image.frombytes('L', (pixmap.width, pixmap.height), pixmap.samples)
+    return clean_text(_recognize(image, languages))
+
+
+def extract_pages_with_ocr(pdf_path: str, pages: Sequence[int] = None) -> List[str]:
+    """
+    Recognize the text of pages with Tesseract.
+    
+    Several pages are rendered and recognized in parallel, one page per
+    process of the OCR pool.
+    
+    Args:
+        pdf_path: Path to the PDF file
+        pages: Zero-based pages to recognize (defaults to all pages)
+    
+    Returns:
+        List[str]: Cleaned text of every page ('' for pages not selected),
+        or an empty list if OCR failed
+    """
+    global _executor
+    languages = ocr_languages()
+    try:
+        import fitz  # PyMuPDF
+        
+        with fitz.open(pdf_path) as pdf:
+            page_count = pdf.page_count
+        numbers = list(range(page_count) if pages is None else pages)
+        
+        if Config.OCR_WORKERS == 1 or len(numbers) < 2:
+            results = [ocr_page(pdf_path, number, languages, Config.OCR_DPI) for number in numbers]
+        else:
+            executor = _get_executor()
+            futures = [
+                executor.submit(ocr_page, pdf_path, number, languages, Config.OCR_DPI)
+                for number in numbers
+            ]
+            results = [future.result() for future in futures]
+        
+        texts = [""] * page_count
+        for number, text in zip(numbers, results):
+            texts[number] = text
+        return texts
+    
+    except BrokenProcessPool as e:
+        logger.error(f"OCR pool failed on {pdf_path}: {str(e)}")
+        with _lock:
+            _executor = None
+        return []
+    except Exception as e:
+        logger.error(f"Error running OCR on {pdf_path}: {str(e)}")
+        return []
+
+
+def fill_empty_pages(pdf_path: str, texts: List[str], pages: Sequence[int] = None) -> List[str]:
+    """
+    OCR the selected pages an extractor found no text on.
+    
+    Args:
+        pdf_path: Path to the PDF file
+        texts: Text of every page as returned by an extractor; updated in place
+        pages: Zero-based pages that were selected (defaults to all pages)
+    
+    Returns:
+        List[str]: ``texts`` with recognized text filled in
+    """
+    if not texts or not Config.OCR_ENABLED:
+        return texts
+    wanted = range(len(texts)) if pages is None else pages
+    empty = [number for number in wanted if number < len(texts) and not texts[number]]
+    if not empty:
+        return texts
+    if not ocr_available():
+        logger.warning(f"{len(empty)} pages of {pdf_path} have no text layer and OCR is not available")
+        return texts
+    
+    method = f"ocr-{ocr_languages()}-{Config.OCR_DPI}-n{NORMALIZATION_VERSION}"
+    with timed('ocr'):
+        recognized = page_cache.extract(pdf_path, empty, method, extract_pages_with_ocr)
+    for number in empty:
+        if number < len(recognized):
+            texts[number] = recognized[number]
+    
+    found = sum(1 for number in empty if texts[number])
+    logger.info(f"OCR found text on {found} of {len(empty)} pages of {pdf_path}")
+    return texts
@@ -0,0 +1,215 @@
+"""
+Cache of extracted page text, shared across documents and their revisions.
+
+Each page is identified by a fingerprint of what it draws: its content
+stream, the streams of the images and form XObjects it uses, its fonts and
+its geometry. A revised edition of a book therefore only extracts the pages
+that actually changed. Text is stored under ``Config.DOCUMENT_CACHE_DIR/pages/``
+per extraction method, since different extractors give different text.
+Pages are touched when read, and the least recently used ones are pruned
+beyond ``PAGE_CACHE_MAX_MB`` or ``PAGE_CACHE_MAX_AGE_DAYS``.
+"""
+import os
+import time
+import hashlib
+import logging
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from config import Config
+from metrics import PAGE_CACHE_REQUESTS
+from utils import prune_directory
+
+logger = logging.getLogger(__name__)
+
+
+def page_fingerprint(pdf: Any, page: Any) -> str:
+    """
+    Fingerprint the content of a PDF page.
+    
+    Object numbers are left out, so the same page keeps its fingerprint when
+    the rest of the file is rewritten.
+    
+    Args:
+        pdf: Open PyMuPDF document
+        page: Page of ``pdf``
+    
+    Returns:
+        str: Hex digest identifying the page content
+    """
+    digest = hashlib.sha256()
+    digest.update(repr((tuple(page.rect), page.rotation)).encode('utf-8'))
+    digest.update(page.read_contents())
+    for xref, *_ in page.get_xobjects():
+        digest.update(pdf.xref_stream_raw(xref) or b'')
+    for image in page.get_images(full=True):
+        digest.update(pdf.xref_stream_raw(image[0]) or b'')
+    for font in page.get_fonts(full=True):
+        # Font type, base font, resource name and encoding
+        digest.update(repr(font[2:6]).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def fingerprint_pages(pdf_path: str, pages: Sequence[int] = None) -> Tuple[int, Dict[int, str]]:
+    """
+    Fingerprint pages of a PDF without extracting their text.
+    
+    Args:
+        pdf_path: Path to the PDF file
+        pages: Zero-based pages to fingerprint (defaults to all pages)
+    
+    Returns:
+        Tuple[int, Dict[int, str]]: Page count and fingerprint of each page;
+        ``(0, {})`` if the PDF cannot be read with PyMuPDF
+    """
+    try:
+        import fitz  # PyMuPDF
+        
+        with fitz.open(pdf_path) as pdf:
+            numbers = range(pdf.page_count) if pages is None else pages
+            return pdf.page_count, {number: page_fingerprint(pdf, pdf[number]) for number in numbers}
+    except Exception as e:
+        logger.warning(f"Could not fingerprint pages of {pdf_path}: {str(e)}")
+        return 0, {}
+
+
+class PageCache:
+    """Stores extracted text per page fingerprint and extraction method."""
+    
+    # Seconds between prune scans of one process
+    PRUNE_INTERVAL = 300
+    
+    def __init__(self, root: str = None, enabled: bool = None, max_mb: float = None, max_age_days: float = None):
+        """
+        Initialize the page cache.
+        
+        Args:
+            root: Cache directory (defaults to ``pages`` under Config.DOCUMENT_CACHE_DIR)
+            enabled: Whether lookups and stores happen (defaults to
+                Config.PAGE_CACHE_ENABLED)
+            max_mb: Size limit (defaults to Config.PAGE_CACHE_MAX_MB; 0 = none)
+            max_age_days: Age limit of unused pages (defaults to
+                Config.PAGE_CACHE_MAX_AGE_DAYS; 0 = none)
+        """
+        self.root = root or os.path.join(Config.DOCUMENT_CACHE_DIR, 'pages')
+        self.enabled = Config.PAGE_CACHE_ENABLED if enabled is None else enabled
+        self.max_mb = Config.PAGE_CACHE_MAX_MB if max_mb is None else max_mb
+        self.max_age_days = Config.PAGE_CACHE_MAX_AGE_DAYS if max_age_days is None else max_age_days
+        self._last_prune = 0.0
+    
+    def _path(self, fingerprint: str, method: str) -> str:
+        return os.path.join(self.root, method, fingerprint[:2], f"{fingerprint}.txt")
+    
+    def get(self, fingerprint: str, method: str) -> Optional[str]:
+        """
+        Look up the text of a page.
+        
+        Args:
+            fingerprint: Page fingerprint (see ``page_fingerprint``)
+            method: Extraction method the text was produced with
+        
+        Returns:
+            Optional[str]: Cached text ('' for pages known to have none), or
+            None on a miss
+        """
+        path = self._path(fingerprint, method)
+        try:
+            with open(path, 'r', encoding='utf-8') as fh:
+                text = fh.read()
+        except FileNotFoundError:
+            return None
+        try:
+            # Mark the page as recently used for pruning
+            os.utime(path)
+        except OSError:
+            pass
+        return text
+    
+    def put(self, fingerprint: str, method: str, text: str) -> None:
+        """
+        Store the text of a page.
+        
+        Args:
+            fingerprint: Page fingerprint (see ``page_fingerprint``)
+            method: Extraction method the text was produced with
+            text: Extracted text
+        """
+        path = self._path(fingerprint, method)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as fh:
+                fh.write(text)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Failed to cache page text: {str(e)}")
+        
+        if time.time() - self._last_prune > self.PRUNE_INTERVAL:
+            self.prune()
+    
+    def prune(self) -> int:
+        """
+        Delete the least recently used pages beyond the size and age limits.
+        
+        Returns:
+            int: Number of pages deleted
+        """
+        self._last_prune = time.time()
+        if not self.max_mb and not self.max_age_days:
+            return 0
+        return prune_directory(self.root, int(self.max_mb * 1024 ** 2), self.max_age_days * 86400)
+    
+    def extract(
+        self,
+        pdf_path: str,
+        pages: Optional[Sequence[int]],
+        method: str,
+        extract_pages: Callable[[str, Sequence[int]], List[str]]
+    ) -> List[str]:
+        """
+        Extract page text, running the extractor only on pages not cached yet.
+        
+        Args:
+            pdf_path: Path to the PDF file
+            pages: Zero-based pages to extract (defaults to all pages)
+            method: Name of the extraction method, used as cache namespace
+            extract_pages: ``extract_pages(pdf_path, pages)`` returning the text
+                of every page of the document ('' for pages not selected), or
+                an empty list on failure
+        
+        Returns:
+            List[str]: Text of every page ('' for pages without text or not
+            selected), or an empty list if extraction failed
+        """
+        if not self.enabled:
+            return extract_pages(pdf_path, pages)
+        page_count, fingerprints = fingerprint_pages(pdf_path, pages)
+        if not fingerprints:
+            return extract_pages(pdf_path, pages)
+        
+        texts = [""] * page_count
+        missing = []
+        for number, fingerprint in fingerprints.items():
+            text = self.get(fingerprint, method)
+            if text is None:
+                missing.append(number)
+            else:
+                texts[number] = text
+        PAGE_CACHE_REQUESTS.labels(outcome='hit').inc(len(fingerprints) - len(missing))
+        PAGE_CACHE_REQUESTS.labels(outcome='miss').inc(len(missing))
+        
+        if missing:
+            extracted = extract_pages(pdf_path, missing)
+            if not extracted:
+                return []
+            for number in missing:
+                texts[number] = extracted[number]
+                self.put(fingerprints[number], method, extracted[number])
+        
+        logger.info(
+            f"Pages of {pdf_path}: {len(fingerprints) - len(missing)} cached, {len(missing)} extracted with {method}"
+        )
+        return texts
+
+
+# Global instance for shared use
+page_cache = PageCache()
@@ -1,12 +1,18 @@
 """
 PDF processing utilities for extracting and cleaning text from PDF files.
+
+The PDF libraries are imported on first use to keep application start-up fast.
 """
 import logging
-from typing import List, Optional
-import pdfplumber
-import fitz  # PyMuPDF
-from utils import clean_text, split_text_into_chunks
+from typing import Any, Dict, List, Optional, Sequence
+from utils import clean_text, split_text_into_chunks, file_sha256, parse_page_ranges
 from config import Config
+from document_cache import document_cache
+from chunk_store import ChunkStore
+from page_cache import page_cache
+from normalization import NORMALIZATION_VERSION
+from ocr import fill_empty_pages
+from metrics import CHUNKS_TOTAL, timed
 
 logger = logging.getLogger(__name__)
 
@@ -17,54 +23,142 @@ class PDFProcessor:
         """Initialize the PDF processor."""
         self.chunk_size = Config.CHUNK_SIZE
     
-    def extract_text_with_pdfplumber(self, pdf_path: str) -> Optional[str]:
+    def extract_pages_with_pdfplumber(self, pdf_path: str, pages: Sequence[int] = None) -> Optional[List[str]]:
         """
-        Extract text from PDF using pdfplumber library.
+        Extract the raw text of each page using pdfplumber.
         
         Args:
             pdf_path: Path to the PDF file
+            pages: Zero-based pages to extract (defaults to all pages)
             
         Returns:
-            Optional[str]: Extracted text or None if extraction failed
+            Optional[List[str]]: Text of every page ('' for pages without
+            text or not selected), or None if extraction failed
         """
         try:
-            text = ""
-            with pdfplumber.open(pdf_path) as pdf:
-                for page in pdf.pages:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += page_text + "\n"
+            import pdfplumber
             
-            return clean_text(text) if text else None
+            with pdfplumber.open(pdf_path) as pdf:
+                selected = range(len(pdf.pages)) if pages is None else set(pages)
+                return [
+                    (page.extract_text() or "") if number in selected else ""
+                    for number, page in enumerate(pdf.pages)
+                ]
             
         except Exception as e:
             logger.error(f"Error extracting text with pdfplumber from {pdf_path}: {str(e)}")
             return None
     
-    def extract_text_with_pymupdf(self, pdf_path: str) -> Optional[str]:
+    def extract_pages_with_pymupdf(self, pdf_path: str, pages: Sequence[int] = None) -> Optional[List[str]]:
         """
-        Extract text from PDF using PyMuPDF library.
+        Extract the raw text of each page using PyMuPDF.
         
         Args:
             pdf_path: Path to the PDF file
+            pages: Zero-based pages to extract (defaults to all pages)
             
         Returns:
-            Optional[str]: Extracted text or None if extraction failed
+            Optional[List[str]]: Text of every page ('' for pages without
+            text or not selected), or None if extraction failed
         """
         try:
-            text = ""
-            with fitz.open(pdf_path) as pdf:
-                for page in pdf:
-                    page_text = page.get_text()
-                    if page_text:
-                        text += page_text + "\n"
+            import fitz  # PyMuPDF
             
-            return clean_text(text) if text else None
+            with fitz.open(pdf_path) as pdf:
+                selected = range(pdf.page_count) if pages is None else set(pages)
+                return [
+                    (pdf[number].get_text() or "") if number in selected else ""
+                    for number in range(pdf.page_count)
+                ]
             
         except Exception as e:
             logger.error(f"Error extracting text with PyMuPDF from {pdf_path}: {str(e)}")
             return None
     
+    def extract_text_with_pdfplumber(self, pdf_path: str) -> Optional[str]:
+        """
+        Extract text from PDF using pdfplumber library.
+        
+        Args:
+            pdf_path: Path to the PDF file
+            
+        Returns:
+            Optional[str]: Extracted text or None if extraction failed
+        """
+        pages = self.extract_pages_with_pdfplumber(pdf_path)
+        text = "\n".join(page for page in pages or [] if page)
+        return clean_text(text) if text else None
+    
+    def extract_text_with_pymupdf(self, pdf_path: str) -> Optional[str]:
+        """
+        Extract text from PDF using PyMuPDF library.
+        
+        Args:
+            pdf_path: Path to the PDF file
+            
+        Returns:
+            Optional[str]: Extracted text or None if extraction failed
+        """
+        pages = self.extract_pages_with_pymupdf(pdf_path)
+        text = "\n".join(page for page in pages or [] if page)
+        return clean_text(text) if text else None
+    
+    def extract_clean_pages(self, pdf_path: str, pages: Sequence[int] = None) -> List[str]:
+        """
+        Extract the cleaned text of pages with pdfplumber, falling back to
+        PyMuPDF for pages pdfplumber finds no text on.
+        
+        Args:
+            pdf_path: Path to the PDF file
+            pages: Zero-based pages to extract (defaults to all pages)
+            
+        Returns:
+            List[str]: Cleaned text of every page ('' for pages without text
+            or not selected), or an empty list if both libraries failed
+        """
+        texts = [clean_text(page) for page in self.extract_pages_with_pdfplumber(pdf_path, pages) or []]
+        wanted = range(len(texts)) if pages is None else pages
+        empty = [number for number in wanted if number < len(texts) and not texts[number]]
+        if texts and not empty:
+            return texts
+        
+        fallback = [clean_text(page) for page in self.extract_pages_with_pymupdf(pdf_path, empty if texts else pages) or []]
+        if not texts:
+            return fallback
+        for number in empty:
+            if number < len(fallback):
+                texts[number] = fallback[number]
+        return texts
+    
+    @timed('pdf_extraction')
+    def extract_pages(self, pdf_path: str, pages: Sequence[int] = None) -> List[str]:
+        """
+        Extract the cleaned text of each page using the best available method.
+        
+        Pages whose content was extracted before, in this or any other
+        document, come from the page cache. Pages without a text layer are
+        OCR'd when Tesseract is available.
+        
+        Args:
+            pdf_path: Path to the PDF file
+            pages: Zero-based pages to extract (defaults to all pages); the
+                others are not read at all
+            
+        Returns:
+            List[str]: Cleaned text of every page ('' for pages without text
+            or not selected), or an empty list if extraction failed
+        """
+        texts = page_cache.extract(pdf_path, pages, f'text-n{NORMALIZATION_VERSION}', self.extract_clean_pages)
+        texts = fill_empty_pages(pdf_path, texts, pages)
+        if any(texts):
+            selected = len(texts) if pages is None else len(pages)
+            logger.info(f"Successfully extracted {selected} of {len(texts)} pages from {pdf_path}")
+            return texts
+        
+        logger.error(f"Failed to extract text from {pdf_path}")
+        return []
+    
+    @timed('pdf_extraction')
     def extract_text(self, pdf_path: str) -> Optional[str]:
         """
         Extract text from PDF using the best available method.
@@ -89,55 +183,155 @@ class PDFProcessor:
         
         return text
     
-    def extract_text_chunks(self, pdf_path: str, chunk_size: int = None) -> List[str]:
+    def extract_outline(self, pdf_path: str) -> List[Dict[str, Any]]:
+        """
+        Read the chapters of a PDF from its outline (table of contents).
+        
+        Args:
+            pdf_path: Path to the PDF file
+            
+        Returns:
+            List[Dict[str, Any]]: One entry per outline item with its
+            ``level``, ``title`` and the ``first_page`` and ``last_page``
+            (numbered from 1) it spans, up to the next item of the same or a
+            higher level; empty if the PDF has no outline
+        """
+        try:
+            import fitz  # PyMuPDF
+            
+            with fitz.open(pdf_path) as pdf:
+                toc = pdf.get_toc(simple=True)
+                page_count = pdf.page_count
+        except Exception as e:
+            logger.error(f"Error reading outline of {pdf_path}: {str(e)}")
+            return []
+        
+        chapters = []
+        for index, (level, title, page) in enumerate(toc):
+            if page < 1:
+                continue
+            next_pages = [
+                next_page for next_level, _, next_page in toc[index + 1:]
+                if next_level <= level and next_page >= 1
+            ]
+            last_page = next_pages[0] - 1 if next_pages else page_count
+            chapters.append({
+                'level': level,
+                'title': title.strip(),
+                'first_page': page,
+                'last_page': max(page, last_page)
+            })
+        return chapters
+    
+    def select_pages(self, pdf_path: str, page_ranges: str = None, chapter: int = None) -> Optional[List[int]]:
+        """
+        Resolve a page range or an outline chapter to the pages to process.
+        
+        Args:
+            pdf_path: Path to the PDF file
+            page_ranges: Pages such as ``"3-7, 10"`` (see ``utils.parse_page_ranges``)
+            chapter: Index into ``extract_outline``; used if no page range is given
+            
+        Returns:
+            Optional[List[int]]: Sorted zero-based pages, or None for the whole document
+            
+        Raises:
+            ValueError: If the range or chapter does not exist in the document
+        """
+        if page_ranges:
+            import fitz  # PyMuPDF
+            
+            with fitz.open(pdf_path) as pdf:
+                page_count = pdf.page_count
+            return parse_page_ranges(page_ranges, page_count)
+        if chapter is not None:
+            chapters = self.extract_outline(pdf_path)
+            if not 0 <= chapter < len(chapters):
+                raise ValueError(f"Chapter {chapter} is not in the outline")
+            selected = chapters[chapter]
+            return list(range(selected['first_page'] - 1, selected['last_page']))
+        return None
+    
+    def extract_text_chunks(
+        self,
+        pdf_path: str,
+        chunk_size: int = None,
+        pages: Sequence[int] = None
+    ) -> ChunkStore:
         """
         Extract text from PDF and split into chunks.
         
         Args:
             pdf_path: Path to the PDF file
             chunk_size: Size of each chunk (defaults to Config.CHUNK_SIZE)
+            pages: Zero-based pages to use (defaults to the whole document)
             
         Returns:
-            List[str]: List of text chunks
+            ChunkStore: The chunks, usable as a read-only list of strings
         """
         if chunk_size is None:
             chunk_size = self.chunk_size
         
-        text = self.extract_text(pdf_path)
-        if not text:
-            return []
+        # Whole-document chunks are cached per document, so a document
+        # prepared in the background right after upload is not chunked again;
+        # selections are chunked from the page cache. The normalization
+        # version is part of the name, so chunks of older rules are not reused
+        document_id = file_sha256(pdf_path)
+        name = f"chunks-{chunk_size}-n{NORMALIZATION_VERSION}.npz"
+        if pages is None:
+            cached_path = document_cache.find(document_id, name)
+            if cached_path:
+                return ChunkStore.load(cached_path)
+        
+        page_texts = self.extract_pages(pdf_path, pages)
+        if not page_texts:
+            return ChunkStore.from_chunks([])
         
-        chunks = split_text_into_chunks(text, chunk_size)
+        chunks = ChunkStore.from_pages(page_texts, chunk_size)
+        CHUNKS_TOTAL.labels(stage='extracted').inc(len(chunks))
         logger.info(f"Extracted {len(chunks)} text chunks from {pdf_path}")
         
+        if pages is None:
+            chunks.save(document_cache.path(document_id, name))
         return chunks
     
-    def extract_clean_text_chunks_from_pdf(self, pdf_path: str, chunk_size: int = None) -> List[str]:
+    def extract_clean_text_chunks_from_pdf(
+        self,
+        pdf_path: str,
+        chunk_size: int = None,
+        pages: Sequence[int] = None
+    ) -> ChunkStore:
         """
         Legacy method for backward compatibility.
         
         Args:
             pdf_path: Path to the PDF file
             chunk_size: Size of each chunk
+            pages: Zero-based pages to use (defaults to the whole document)
             
         Returns:
-            List[str]: List of text chunks
+            ChunkStore: Text chunks
         """
-        return self.extract_text_chunks(pdf_path, chunk_size)
+        return self.extract_text_chunks(pdf_path, chunk_size, pages)
 
 # Global instance for backward compatibility
 pdf_processor = PDFProcessor()
 
 # Legacy function for backward compatibility
-def extract_clean_text_chunks_from_pdf(pdf_path: str, chunk_size: int = None) -> List[str]:
+def extract_clean_text_chunks_from_pdf(
+    pdf_path: str,
+    chunk_size: int = None,
+    pages: Sequence[int] = None
+) -> ChunkStore:
     """
     Extract and clean text chunks from a PDF file.
     
     Args:
         pdf_path: Path to the PDF file
         chunk_size: Size of each chunk
+        pages: Zero-based pages to use (defaults to the whole document)
         
     Returns:
-        List[str]: List of cleaned text chunks
+        ChunkStore: Cleaned text chunks
     """
-    return pdf_processor.extract_text_chunks(pdf_path, chunk_size) 
\ No newline at end of file
+    return pdf_processor.extract_text_chunks(pdf_path, chunk_size, pages) 
\ No newline at end of file
@@ -0,0 +1,97 @@
+"""
+Batch post-processing of generated questions.
+
+Every language path hands its candidate questions to ``postprocess_questions``
+as one batch. A single loop normalizes each question for its language,
+filters it by length, rejects generic questions, checks that its letters are
+mostly in the language's script and drops exact duplicates, using patterns
+compiled once at import. English, Hindi and Sanskrit therefore apply the same
+rules.
+"""
+import re
+import logging
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set
+
+from config import Config
+from normalization import LANGUAGE_SCRIPTS, normalize_text
+
+logger = logging.getLogger(__name__)
+
+_GENERIC_PATTERN = re.compile(r'(?:what|who|where|when|how) is')
+# Letters: word characters other than digits and the underscore
+_LETTER_PATTERN = re.compile(r'[^\W\d_]')
+
+SCRIPT_PATTERNS: Dict[str, re.Pattern] = {
+    'latin': re.compile(r'[A-Za-z\u00C0-\u024F]'),
+    'devanagari': re.compile(r'[\u0900-\u097F\uA8E0-\uA8FF]')
+}
+
+
+class PostProcessResult(NamedTuple):
+    """Questions kept from a batch and the number dropped."""
+    questions: List[str]
+    rejected: int
+    duplicates: int
+
+
+def script_ratio(text: str, script: str) -> float:
+    """
+    Compute the share of a text's letters written in a script.
+    
+    Args:
+        text: Text to check
+        script: Key of SCRIPT_PATTERNS
+    
+    Returns:
+        float: Ratio between 0 and 1 (0 for text without letters)
+    """
+    letters = ''.join(_LETTER_PATTERN.findall(text))
+    if not letters:
+        return 0.0
+    return len(SCRIPT_PATTERNS[script].findall(letters)) / len(letters)
+
+
+def postprocess_questions(
+    questions: Iterable[Optional[str]],
+    language: str = None,
+    min_length: int = 15,
+    seen: Set[str] = None
+) -> PostProcessResult:
+    """
+    Clean, filter and deduplicate a batch of generated questions.
+    
+    Args:
+        questions: Candidate questions; empty entries count as rejected
+        language: Language code whose script the questions must use (no
+            script check if None or unknown)
+        min_length: Minimum length of a cleaned question
+        seen: Questions kept earlier, updated in place, so duplicates across
+            batches are dropped as well
+    
+    Returns:
+        PostProcessResult: Kept questions in input order and drop counts
+    """
+    script = LANGUAGE_SCRIPTS.get(language)
+    min_ratio = Config.QUESTION_MIN_SCRIPT_RATIO
+    seen = set() if seen is None else seen
+    kept: List[str] = []
+    rejected = 0
+    duplicates = 0
+    
+    for question in questions:
+        cleaned = normalize_text(question, language) if question else ''
+        if (
+            len(cleaned) < min_length
+            or _GENERIC_PATTERN.fullmatch(cleaned.lower())
+            or (script and script_ratio(cleaned, script) < min_ratio)
+        ):
+            rejected += 1
+        elif cleaned in seen:
+            duplicates += 1
+        else:
+            seen.add(cleaned)
+            kept.append(cleaned)
+    
+    if rejected or duplicates:
+        logger.debug(f"Post-processing kept {len(kept)} questions, rejected {rejected}, {duplicates} duplicates")
+    return PostProcessResult(kept, rejected, duplicates)
@@ -0,0 +1,128 @@
+"""
+Opt-in request profiling with cProfile.
+
+A request is profiled when it carries the admin header with the configured
+token, or when it is picked by random sampling at ``PROFILE_SAMPLE_RATE``.
+Profiles are written to ``PROFILE_DIR`` as ``.prof`` files (loadable with
+``pstats`` or snakeviz) next to a ``.json`` file describing the request, and
+only the newest ``PROFILE_MAX_RETAINED`` profiles are kept.
+"""
+import os
+import hmac
+import json
+import time
+import random
+import logging
+import cProfile
+import threading
+from typing import Any, Dict, Mapping, Optional
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Only one cProfile profiler can be active per interpreter at a time
+_profile_lock = threading.Lock()
+
+
+def should_profile(headers: Mapping[str, str]) -> bool:
+    """
+    Decide whether the current request should be profiled.
+    
+    Args:
+        headers: Request headers
+        
+    Returns:
+        bool: True if the admin header matches or the request was sampled
+    """
+    token = Config.PROFILE_ADMIN_TOKEN
+    supplied = headers.get(Config.PROFILE_HEADER)
+    if token and supplied and hmac.compare_digest(supplied, token):
+        return True
+    
+    return Config.PROFILE_SAMPLE_RATE > 0 and random.random() < Config.PROFILE_SAMPLE_RATE
+
+
+class RequestProfiler:
+    """Context manager that profiles a block of code when enabled."""
+    
+    def __init__(self, enabled: bool = True, profile_dir: str = None, max_retained: int = None):
+        """
+        Initialize the profiler.
+        
+        Args:
+            enabled: Whether to profile at all; a disabled profiler is a no-op
+            profile_dir: Directory to store profiles (defaults to Config.PROFILE_DIR)
+            max_retained: Number of profiles to keep (defaults to Config.PROFILE_MAX_RETAINED)
+        """
+        self.enabled = enabled
+        self.profile_dir = profile_dir or Config.PROFILE_DIR
+        self.max_retained = max_retained if max_retained is not None else Config.PROFILE_MAX_RETAINED
+        self.elapsed: Optional[float] = None
+        self._profile: Optional[cProfile.Profile] = None
+        self._start: Optional[float] = None
+    
+    def __enter__(self) -> 'RequestProfiler':
+        if self.enabled:
+            if _profile_lock.acquire(blocking=False):
+                self._profile = cProfile.Profile()
+                self._start = time.perf_counter()
+                self._profile.enable()
+            else:
+                logger.info("Another request is being profiled; skipping this one")
+                self.enabled = False
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> bool:
+        if self._profile is not None:
+            self._profile.disable()
+            self.elapsed = time.perf_counter() - self._start
+            _profile_lock.release()
+        return False
+    
+    def save(self, **metadata: Any) -> Optional[str]:
+        """
+        Write the collected profile and its metadata to the profile directory.
+        
+        Args:
+            **metadata: Request details stored alongside the profile
+                (document hash, language, prompt, parameters, ...)
+            
+        Returns:
+            Optional[str]: Path to the saved profile, or None if nothing was saved
+        """
+        if not self.enabled or self._profile is None:
+            return None
+        
+        try:
+            os.makedirs(self.profile_dir, exist_ok=True)
+            name = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{time.time_ns() % 1000000:06d}"
+            profile_path = os.path.join(self.profile_dir, f"{name}.prof")
+            self._profile.dump_stats(profile_path)
+            
+            metadata = dict(metadata, elapsed_seconds=self.elapsed, pid=os.getpid())
+            with open(os.path.join(self.profile_dir, f"{name}.json"), 'w', encoding='utf-8') as fh:
+                json.dump(metadata, fh, ensure_ascii=False, indent=2, default=str)
+            
+            logger.info(f"Saved request profile to {profile_path} ({self.elapsed:.2f}s)")
+            self.prune()
+            return profile_path
+            
+        except Exception as e:
+            logger.error(f"Failed to save request profile: {str(e)}")
+            return None
+    
+    def prune(self) -> None:
+        """Delete the oldest profiles beyond the retention limit."""
+        try:
+            profiles = sorted(
+                (entry for entry in os.scandir(self.profile_dir) if entry.name.endswith('.prof')),
+                key=lambda entry: entry.stat().st_mtime
+            )
+            for entry in profiles[:max(len(profiles) - self.max_retained, 0)]:
+                base = entry.path[:-len('.prof')]
+                for path in (entry.path, f"{base}.json"):
+                    if os.path.exists(path):
+                        os.remove(path)
+        except Exception as e:
+            logger.warning(f"Failed to prune old profiles: {str(e)}")
@@ -0,0 +1,454 @@
+"""
+Persistent question bank.
+
+Generated questions are stored in a local SQLite database
+(``Config.QUESTION_BANK_PATH``, by default in ``Config.DOCUMENT_CACHE_DIR``)
+together with the document's SHA-256, the language, prompt, page selection
+and model version, and, where the pipeline knows it, the offsets of the chunk
+each question came from. A later request
+for the same document with the same or a similar prompt is answered from the
+bank without running the model.
+
+Lookups by document use a composite index; prompts are indexed with FTS5 to
+find similar ones, and candidates are confirmed by their token overlap with
+the new prompt. Several gunicorn workers can share the database (WAL mode).
+"""
+import os
+import re
+import csv
+import io
+import json
+import time
+import sqlite3
+import logging
+import threading
+import unicodedata
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from config import Config
+from normalization import NORMALIZATION_VERSION
+from metrics import QUESTION_BANK_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS generations (
+    id INTEGER PRIMARY KEY,
+    document_hash TEXT NOT NULL,
+    language TEXT NOT NULL,
+    prompt TEXT NOT NULL,
+    prompt_key TEXT NOT NULL,
+    pages TEXT NOT NULL DEFAULT '',
+    model_version TEXT NOT NULL,
+    question_count INTEGER NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS generations_lookup
+    ON generations (document_hash, language, model_version, pages, prompt_key);
+CREATE TABLE IF NOT EXISTS questions (
+    id INTEGER PRIMARY KEY,
+    generation_id INTEGER NOT NULL REFERENCES generations (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    question TEXT NOT NULL,
+    chunk_start INTEGER,
+    chunk_end INTEGER,
+    page INTEGER
+);
+CREATE INDEX IF NOT EXISTS questions_generation ON questions (generation_id, position);
+CREATE VIRTUAL TABLE IF NOT EXISTS generation_prompts USING fts5 (prompt_key);
+"""
+
+EXPORT_FIELDS = (
+    'document_hash', 'language', 'prompt', 'pages', 'model_version', 'created_at',
+    'position', 'question', 'chunk_start', 'chunk_end', 'page'
+)
+
+# Words of a prompt: anything between whitespace and punctuation, so that
+# Devanagari vowel signs stay part of their word
+_TOKEN_PATTERN = re.compile(r"[^\s.,;:!?।॥'\"()\[\]{}<>/\\|*+=-]+")
+
+# Chunk each question was generated from, collected while a request records sources
+_sources: ContextVar[Optional[Dict[str, Tuple[int, int, int]]]] = ContextVar('question_sources', default=None)
+
+
+def prompt_tokens(prompt: str) -> List[str]:
+    """
+    Split a prompt into lowercase words.
+    
+    Args:
+        prompt: User prompt
+    
+    Returns:
+        List[str]: Words of the NFC-normalized prompt
+    """
+    return _TOKEN_PATTERN.findall(unicodedata.normalize('NFC', prompt or '').lower())
+
+
+def normalize_prompt(prompt: str) -> str:
+    """
+    Normalize a prompt for exact lookups.
+    
+    Args:
+        prompt: User prompt
+    
+    Returns:
+        str: Lowercase words joined by single spaces
+    """
+    return ' '.join(prompt_tokens(prompt))
+
+
+def prompt_similarity(first: str, second: str) -> float:
+    """
+    Compare two prompts by their words.
+    
+    Args:
+        first: A prompt
+        second: Another prompt
+    
+    Returns:
+        float: Jaccard similarity of the prompts' word sets (1.0 for equal sets)
+    """
+    a, b = set(prompt_tokens(first)), set(prompt_tokens(second))
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+@contextmanager
+def recording_sources() -> Iterator[Dict[str, Tuple[int, int, int]]]:
+    """
+    Collect the chunk each question of the current request was generated from.
+    
+    Yields:
+        Dict[str, Tuple[int, int, int]]: Question to start offset, end offset
+        and zero-based page of its chunk, filled in by ``record_source``
+    """
+    sources: Dict[str, Tuple[int, int, int]] = {}
+    token = _sources.set(sources)
+    try:
+        yield sources
+    finally:
+        _sources.reset(token)
+
+
+def record_source(questions: Iterable[str], chunks: Sequence[str], index: int) -> None:
+    """
+    Remember the chunk questions were generated from, if sources are being recorded.
+    
+    Only chunks of a ``ChunkStore`` know their place in the document; questions
+    from plain chunk lists are not recorded.
+    
+    Args:
+        questions: Questions generated from ``chunks[index]``
+        chunks: Chunks being generated from
+        index: Position of the chunk in ``chunks``
+    """
+    sources = _sources.get()
+    if sources is not None and hasattr(chunks, 'location'):
+        location = chunks.location(index)
+        for question in questions:
+            sources.setdefault(question, location)
+
+
+def model_version(language: str) -> str:
+    """
+    Describe what produces a language's questions, so changing it invalidates the bank.
+    
+    Args:
+        language: Language name
+    
+    Returns:
+        str: Generation backend and model (plus the translation backend), or
+        ``<language>-rules`` for rule-based languages, followed by
+        ``-n<NORMALIZATION_VERSION>`` since stored questions are normalized
+    """
+    from languages.registry import get_language_spec
+    
+    spec = get_language_spec(language)
+    capabilities = spec.capabilities if spec is not None else ()
+    if 'model' not in capabilities:
+        version = f"{language}-rules"
+    else:
+        version = f"{Config.GENERATION_BACKEND}:{Config.QUESTION_GENERATOR_MODEL}"
+        if 'translation' in capabilities:
+            version += f"+{Config.TRANSLATION_BACKEND}"
+    return f"{version}-n{NORMALIZATION_VERSION}"
+
+
+def _pages_key(pages: Optional[Sequence[int]]) -> str:
+    return '' if pages is None else ','.join(str(number) for number in pages)
+
+
+class QuestionBank:
+    """SQLite store of generated questions, looked up by document and prompt."""
+    
+    def __init__(self, path: str = None, enabled: bool = None, similarity: float = None):
+        """
+        Initialize the question bank.
+        
+        Args:
+            path: Database file (defaults to Config.QUESTION_BANK_PATH, or
+                ``question_bank.sqlite3`` under Config.DOCUMENT_CACHE_DIR)
+            enabled: Whether lookups and stores happen (defaults to Config.QUESTION_BANK_ENABLED)
+            similarity: Minimum prompt similarity for serving stored questions
+                (defaults to Config.QUESTION_BANK_SIMILARITY)
+        """
+        self.path = path or Config.QUESTION_BANK_PATH or os.path.join(Config.DOCUMENT_CACHE_DIR, 'question_bank.sqlite3')
+        self.enabled = Config.QUESTION_BANK_ENABLED if enabled is None else enabled
+        self.similarity = Config.QUESTION_BANK_SIMILARITY if similarity is None else similarity
+        self._local = threading.local()
+    
+    def _connect(self) -> sqlite3.Connection:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=10)
+        connection.row_factory = sqlite3.Row
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA foreign_keys=ON')
+        connection.executescript(SCHEMA)
+        return connection
+    
+    def _connection(self) -> sqlite3.Connection:
+        # One connection per thread, reopened after a fork
+        if getattr(self._local, 'pid', None) != os.getpid() or getattr(self._local, 'path', None) != self.path:
+            self._local.connection = self._connect()
+            self._local.pid = os.getpid()
+            self._local.path = self.path
+        return self._local.connection
+    
+    def find(
+        self,
+        document_hash: str,
+        language: str,
+        prompt: str,
+        total_questions: int,
+        pages: Sequence[int] = None,
+        version: str = None
+    ) -> Optional[List[str]]:
+        """
+        Look up questions generated earlier for a document and a similar prompt.
+        
+        Args:
+            document_hash: SHA-256 of the document
+            language: Language name
+            prompt: User prompt
+            total_questions: Number of questions wanted; stored results with
+                fewer questions are not used
+            pages: Zero-based page selection (defaults to the whole document)
+            version: Model version (defaults to ``model_version(language)``)
+        
+        Returns:
+            Optional[List[str]]: Up to ``total_questions`` stored questions, or
+            None if there are none to serve
+        """
+        if not self.enabled or not os.path.exists(self.path):
+            return None
+        key = normalize_prompt(prompt)
+        scope = (document_hash, language, version or model_version(language), _pages_key(pages))
+        try:
+            connection = self._connection()
+            row = connection.execute(
+                "SELECT id FROM generations WHERE document_hash = ? AND language = ? AND model_version = ? "
+                "AND pages = ? AND prompt_key = ? AND question_count >= ? ORDER BY created_at DESC LIMIT 1",
+                scope + (key, total_questions)
+            ).fetchone()
+            outcome = 'exact'
+            
+            if row is None and key:
+                outcome = 'similar'
+                match = ' OR '.join('"{}"'.format(token.replace('"', '""')) for token in key.split())
+                candidates = connection.execute(
+                    "SELECT g.id, g.prompt_key FROM generation_prompts AS p JOIN generations AS g ON g.id = p.rowid "
+                    "WHERE generation_prompts MATCH ? AND g.document_hash = ? AND g.language = ? "
+                    "AND g.model_version = ? AND g.pages = ? AND g.question_count >= ? "
+                    "ORDER BY bm25(generation_prompts) LIMIT 20",
+                    (match,) + scope + (total_questions,)
+                ).fetchall()
+                row = next(
+                    (candidate for candidate in candidates
+                     if prompt_similarity(key, candidate['prompt_key']) >= self.similarity),
+                    None
+                )
+            
+            if row is None:
+                QUESTION_BANK_REQUESTS.labels(outcome='miss').inc()
+                return None
+            questions = [
+                question for (question,) in connection.execute(
+                    "SELECT question FROM questions WHERE generation_id = ? ORDER BY position LIMIT ?",
+                    (row['id'], total_questions)
+                )
+            ]
+            QUESTION_BANK_REQUESTS.labels(outcome=outcome).inc()
+            logger.info(f"Serving {len(questions)} questions from the question bank ({outcome} prompt match)")
+            return questions or None
+        
+        except sqlite3.Error as e:
+            logger.warning(f"Question bank lookup failed: {str(e)}")
+            return None
+    
+    def store(
+        self,
+        document_hash: str,
+        language: str,
+        prompt: str,
+        questions: Sequence[str],
+        pages: Sequence[int] = None,
+        version: str = None,
+        offsets: Dict[str, Tuple[int, int, int]] = None
+    ) -> Optional[int]:
+        """
+        Store the questions generated for a request.
+        
+        Args:
+            document_hash: SHA-256 of the document
+            language: Language name
+            prompt: User prompt
+            questions: Generated questions, in order
+            pages: Zero-based page selection (defaults to the whole document)
+            version: Model version (defaults to ``model_version(language)``)
+            offsets: Question to start offset, end offset and page of the chunk
+                it was generated from (see ``recording_sources``)
+        
+        Returns:
+            Optional[int]: Id of the stored generation, or None if not stored
+        """
+        if not self.enabled or not questions:
+            return None
+        offsets = offsets or {}
+        key = normalize_prompt(prompt)
+        try:
+            connection = self._connection()
+            with connection:
+                cursor = connection.execute(
+                    "INSERT INTO generations (document_hash, language, prompt, prompt_key, pages, "
+                    "model_version, question_count, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (document_hash, language, prompt, key, _pages_key(pages),
+                     version or model_version(language), len(questions), time.time())
+                )
+                generation_id = cursor.lastrowid
+                connection.execute(
+                    "INSERT INTO generation_prompts (rowid, prompt_key) VALUES (?, ?)", (generation_id, key)
+                )
+                connection.executemany(
+                    "INSERT INTO questions (generation_id, position, question, chunk_start, chunk_end, page) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    [
+                        (generation_id, position, question) + tuple(offsets.get(question, (None, None, None)))
+                        for position, question in enumerate(questions)
+                    ]
+                )
+            logger.info(f"Stored {len(questions)} questions for document {document_hash[:12]} in the question bank")
+            return generation_id
+        
+        except sqlite3.Error as e:
+            logger.warning(f"Failed to store questions in the question bank: {str(e)}")
+            return None
+    
+    def generations(self, document_hash: str) -> List[Dict[str, Any]]:
+        """
+        List the stored generations of a document, newest first.
+        
+        Args:
+            document_hash: SHA-256 of the document
+        
+        Returns:
+            List[Dict[str, Any]]: Id, language, prompt, pages, model version,
+            question count and creation time of each generation
+        """
+        if not os.path.exists(self.path):
+            return []
+        try:
+            rows = self._connection().execute(
+                "SELECT id, language, prompt, pages, model_version, question_count, created_at "
+                "FROM generations WHERE document_hash = ? ORDER BY created_at DESC",
+                (document_hash,)
+            )
+            return [dict(row) for row in rows]
+        except sqlite3.Error as e:
+            logger.warning(f"Question bank lookup failed: {str(e)}")
+            return []
+    
+    def iter_questions(self, document_hash: str = None, language: str = None) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over stored questions without loading them all into memory.
+        
+        Uses its own connection, so it can be consumed by a streaming response.
+        
+        Args:
+            document_hash: Only questions of this document
+            language: Only questions in this language
+        
+        Yields:
+            Dict[str, Any]: One question with the fields in EXPORT_FIELDS
+        """
+        conditions, parameters = [], []
+        if document_hash:
+            conditions.append("g.document_hash = ?")
+            parameters.append(document_hash)
+        if language:
+            conditions.append("g.language = ?")
+            parameters.append(language)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        if not os.path.exists(self.path):
+            return
+        
+        connection = self._connect()
+        try:
+            cursor = connection.execute(
+                "SELECT g.document_hash, g.language, g.prompt, g.pages, g.model_version, g.created_at, "
+                "q.position, q.question, q.chunk_start, q.chunk_end, q.page "
+                f"FROM questions AS q JOIN generations AS g ON g.id = q.generation_id {where} "
+                "ORDER BY g.id, q.position",
+                parameters
+            )
+            for row in cursor:
+                yield dict(row)
+        except sqlite3.Error as e:
+            logger.error(f"Question bank export failed: {str(e)}")
+        finally:
+            connection.close()
+
+
+def stream_json(rows: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    """
+    Render rows as a JSON array, one row at a time.
+    
+    Args:
+        rows: Rows to render
+    
+    Yields:
+        str: Pieces of the JSON document
+    """
+    yield '['
+    for index, row in enumerate(rows):
+        yield (',\n' if index else '\n') + json.dumps(row, ensure_ascii=False)
+    yield '\n]\n'
+
+
+def stream_csv(rows: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    """
+    Render rows as CSV with a header, one row at a time.
+    
+    Args:
+        rows: Rows with the fields in EXPORT_FIELDS
+    
+    Yields:
+        str: CSV lines
+    """
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS)
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+# Global instance for shared use
+question_bank = QuestionBank()
@@ -0,0 +1,144 @@
+"""
+Cache of questions generated per chunk, shared across prompts and documents.
+
+Different prompts on the same document retrieve overlapping chunks. Questions
+are stored under ``Config.DOCUMENT_CACHE_DIR/chunk_questions/`` keyed by the
+SHA-256 of the chunk text and a decoding profile (model name and generation
+parameters), so a chunk seen before is answered without running the model.
+Entries are touched when read, and the least recently used ones are pruned
+once the cache exceeds ``QUESTION_CACHE_MAX_MB`` or
+``QUESTION_CACHE_MAX_AGE_DAYS``.
+"""
+import os
+import time
+import json
+import hashlib
+import logging
+from typing import Any, Dict, List, Optional
+
+from config import Config
+from metrics import QUESTION_CACHE_REQUESTS
+from utils import prune_directory
+
+logger = logging.getLogger(__name__)
+
+
+def decoding_profile(**params: Any) -> str:
+    """
+    Build a short stable identifier for a model and its decoding parameters.
+    
+    Args:
+        **params: Model name and generation keyword arguments
+    
+    Returns:
+        str: Hex digest identifying the profile
+    """
+    encoded = json.dumps(params, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()[:16]
+
+
+class QuestionCache:
+    """Stores generated questions per chunk and decoding profile."""
+    
+    # Seconds between prune scans of one process
+    PRUNE_INTERVAL = 300
+    
+    def __init__(self, root: str = None, enabled: bool = None, max_mb: float = None, max_age_days: float = None):
+        """
+        Initialize the question cache.
+        
+        Args:
+            root: Cache directory (defaults to ``chunk_questions`` under
+                Config.DOCUMENT_CACHE_DIR)
+            enabled: Whether lookups and stores happen (defaults to
+                Config.QUESTION_CACHE_ENABLED)
+            max_mb: Size limit (defaults to Config.QUESTION_CACHE_MAX_MB; 0 = none)
+            max_age_days: Age limit of unused entries (defaults to
+                Config.QUESTION_CACHE_MAX_AGE_DAYS; 0 = none)
+        """
+        self.root = root or os.path.join(Config.DOCUMENT_CACHE_DIR, 'chunk_questions')
+        self.enabled = Config.QUESTION_CACHE_ENABLED if enabled is None else enabled
+        self.max_mb = Config.QUESTION_CACHE_MAX_MB if max_mb is None else max_mb
+        self.max_age_days = Config.QUESTION_CACHE_MAX_AGE_DAYS if max_age_days is None else max_age_days
+        self._last_prune = 0.0
+    
+    def _path(self, text: str, profile: str) -> str:
+        digest = hashlib.sha256(text.encode('utf-8')).hexdigest()
+        return os.path.join(self.root, profile, digest[:2], f"{digest}.json")
+    
+    def get(self, text: str, profile: str, num_questions: int) -> Optional[List[str]]:
+        """
+        Look up the questions of a chunk.
+        
+        An entry only answers requests for at most as many sequences as it was
+        generated with.
+        
+        Args:
+            text: Chunk text
+            profile: Decoding profile (see ``decoding_profile``)
+            num_questions: Number of sequences the caller would generate
+        
+        Returns:
+            Optional[List[str]]: Cached questions, or None on a miss
+        """
+        if not self.enabled:
+            return None
+        path = self._path(text, profile)
+        try:
+            with open(path, 'r', encoding='utf-8') as fh:
+                entry: Dict[str, Any] = json.load(fh)
+        except (FileNotFoundError, ValueError):
+            QUESTION_CACHE_REQUESTS.labels(outcome='miss').inc()
+            return None
+        
+        if entry['num_questions'] < num_questions:
+            QUESTION_CACHE_REQUESTS.labels(outcome='miss').inc()
+            return None
+        QUESTION_CACHE_REQUESTS.labels(outcome='hit').inc()
+        try:
+            # Mark the entry as recently used for pruning
+            os.utime(path)
+        except OSError:
+            pass
+        return entry['questions'][:num_questions]
+    
+    def put(self, text: str, profile: str, num_questions: int, questions: List[str]) -> None:
+        """
+        Store the questions generated for a chunk.
+        
+        Args:
+            text: Chunk text
+            profile: Decoding profile (see ``decoding_profile``)
+            num_questions: Number of sequences that were generated
+            questions: Questions kept from those sequences
+        """
+        if not self.enabled:
+            return
+        path = self._path(text, profile)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as fh:
+                json.dump({'num_questions': num_questions, 'questions': questions}, fh, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Failed to cache questions: {str(e)}")
+        
+        if time.time() - self._last_prune > self.PRUNE_INTERVAL:
+            self.prune()
+    
+    def prune(self) -> int:
+        """
+        Delete the least recently used entries beyond the size and age limits.
+        
+        Returns:
+            int: Number of entries deleted
+        """
+        self._last_prune = time.time()
+        if not self.max_mb and not self.max_age_days:
+            return 0
+        return prune_directory(self.root, int(self.max_mb * 1024 ** 2), self.max_age_days * 86400)
+
+
+# Global instance for shared use
+question_cache = QuestionCache()
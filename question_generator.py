@@ -1,16 +1,25 @@
 """
 Question generation utilities using transformer models.
+
+Heavy dependencies (transformers/torch, the retrieval backends, tqdm) are
+imported on first use so that importing this module stays cheap.
 """
 import logging
-from typing import List, Optional, Dict, Any
-from transformers import pipeline
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-import pandas as pd
-from tqdm import tqdm
+import threading
+from typing import Any, List, Optional
 
-from utils import clean_text, remove_duplicates_preserve_order, sanitize_question
+from utils import clean_text
+from postprocessing import postprocess_questions
 from config import Config
+from batching import BatchedPipeline
+from inference_server import InferenceClient
+from models import load_generation_pipeline
+from budget import GenerationBudget
+from dedup import NearDuplicateFilter
+from question_cache import decoding_profile, question_cache
+from question_bank import record_source
+from normalization import NORMALIZATION_VERSION
+from metrics import CHUNKS_TOTAL, INPUT_TOKENS_TOTAL, count_questions, timed
 
 logger = logging.getLogger(__name__)
 
@@ -24,53 +33,158 @@ class QuestionGenerator:
         Args:
             model_name: Name of the transformer model to use
         """
-        if model_name is None:
-            model_name = Config.QUESTION_GENERATOR_MODEL
+        self.model_name = model_name
+        self._pipeline: Optional[Any] = None
+        self._retriever: Optional[Any] = None
+        self._lock = threading.Lock()
+        self.question_cache = question_cache
+    
+    @property
+    def question_generator(self) -> Any:
+        """Generation pipeline callable, loaded on first use."""
+        if self._pipeline is None:
+            with self._lock:
+                if self._pipeline is None:
+                    self._pipeline = self._create_pipeline()
+        return self._pipeline
+    
+    def _create_pipeline(self) -> Any:
+        if Config.INFERENCE_SERVER_SOCKET:
+            # The model lives in the shared inference server process
+            logger.info(f"Question generator using inference server at {Config.INFERENCE_SERVER_SOCKET}")
+            return InferenceClient(Config.INFERENCE_SERVER_SOCKET)
         
-        try:
-            # Try to load the model with error handling
-            self.question_generator = pipeline(
-                "text2text-generation", 
-                model=model_name,
-                device=-1  # Force CPU usage
-            )
-            logger.info(f"Question generator initialized with model: {model_name}")
-        except Exception as e:
-            logger.error(f"Failed to initialize question generator with {model_name}: {str(e)}")
-            # Fallback to a simpler model if the main one fails
-            try:
-                logger.info("Attempting to use fallback model...")
-                self.question_generator = pipeline(
-                    "text2text-generation", 
-                    model="google/flan-t5-base",
-                    device=-1  # Force CPU usage
-                )
-                logger.info("Successfully initialized with fallback model: google/flan-t5-base")
-            except Exception as fallback_error:
-                logger.error(f"Fallback model also failed: {str(fallback_error)}")
-                raise RuntimeError("Could not initialize any question generation model")
+        generation_pipeline = load_generation_pipeline(self.model_name)
+        if Config.GENERATION_BATCHING_ENABLED:
+            # Concurrent requests in this process share model batches
+            generation_pipeline = BatchedPipeline(generation_pipeline)
+        return generation_pipeline
+    
+    @property
+    def retriever(self) -> Any:
+        """Chunk retrieval backend selected by Config.RETRIEVER."""
+        if self._retriever is None:
+            from retrieval import get_retriever
+            self._retriever = get_retriever()
+        return self._retriever
+    
+    def decoding_profile(self, **params: Any) -> str:
+        """
+        Identify the model and decoding parameters for the question cache.
+        
+        Args:
+            **params: Generation parameters that vary per call
+            
+        Returns:
+            str: Decoding profile identifier
+        """
+        # Cached questions are normalized, so normalization changes invalidate them
+        return decoding_profile(
+            model=self.model_name or Config.QUESTION_GENERATOR_MODEL,
+            do_sample=True,
+            temperature=0.7,
+            normalization=NORMALIZATION_VERSION,
+            **params
+        )
+    
+    def load(self) -> None:
+        """Load the model now rather than on the first request."""
+        self.question_generator
+    
+    def warm_up(self) -> None:
+        """Run one short generation so tokenizer and graph setup is paid before the first request."""
+        self.question_generator(
+            "Generate a question about: The sun is a star at the centre of the solar system.",
+            max_length=16,
+            num_beams=1,
+            num_return_sequences=1
+        )
+    
+    def cached_questions(
+        self,
+        text: str,
+        num_questions: int = None,
+        max_length: int = 100,
+        num_beams: int = None
+    ) -> Optional[List[str]]:
+        """
+        Look up questions generated earlier for a text with the same settings.
+        
+        Args:
+            text: Input text
+            num_questions: Number of questions requested
+            max_length: Maximum length of generated questions
+            num_beams: Number of beams for beam search (defaults to
+                Config.GENERATION_NUM_BEAMS)
+            
+        Returns:
+            Optional[List[str]]: Cached questions, or None on a miss
+        """
+        if num_questions is None:
+            num_questions = Config.MAX_QUESTIONS_PER_CHUNK
+        if num_beams is None:
+            num_beams = Config.GENERATION_NUM_BEAMS
+        profile = self.decoding_profile(max_length=max_length, num_beams=num_beams)
+        return self.question_cache.get(f"Generate a question about: {text}", profile, num_questions)
     
     def generate_questions_from_text(
         self, 
         text: str, 
         num_questions: int = None,
         max_length: int = 100,
-        num_beams: int = 5
+        num_beams: int = None
     ) -> List[str]:
         """
-        Generate questions from a given text.
+        Generate questions from a given text, reusing cached ones.
         
         Args:
             text: Input text to generate questions from
             num_questions: Number of questions to generate
             max_length: Maximum length of generated questions
-            num_beams: Number of beams for beam search
+            num_beams: Number of beams for beam search (defaults to
+                Config.GENERATION_NUM_BEAMS)
+            
+        Returns:
+            List[str]: List of generated questions
+        """
+        if not text or not text.strip():
+            logger.warning("Empty text provided for question generation")
+            return []
+        
+        cached = self.cached_questions(text, num_questions, max_length=max_length, num_beams=num_beams)
+        if cached is not None:
+            logger.info(f"Reused {len(cached)} cached questions for chunk")
+            return cached
+        return self.generate_uncached_questions(text, num_questions, max_length=max_length, num_beams=num_beams)
+    
+    @timed('generation')
+    def generate_uncached_questions(
+        self,
+        text: str,
+        num_questions: int = None,
+        max_length: int = 100,
+        num_beams: int = None
+    ) -> List[str]:
+        """
+        Run the model on a text and cache the questions, without a cache lookup.
+        
+        Callers that already looked the text up with ``cached_questions`` use
+        this after a miss, so the lookup is not repeated.
+        
+        Args:
+            text: Input text to generate questions from
+            num_questions: Number of questions to generate
+            max_length: Maximum length of generated questions
+            num_beams: Number of beams for beam search (defaults to
+                Config.GENERATION_NUM_BEAMS)
             
         Returns:
             List[str]: List of generated questions
         """
         if num_questions is None:
             num_questions = Config.MAX_QUESTIONS_PER_CHUNK
+        if num_beams is None:
+            num_beams = Config.GENERATION_NUM_BEAMS
         
         if not text or not text.strip():
             logger.warning("Empty text provided for question generation")
@@ -79,6 +193,8 @@ class QuestionGenerator:
         try:
             # Use a more generic prompt for better compatibility
             formatted_text = f"Generate a question about: {text}"
+            profile = self.decoding_profile(max_length=max_length, num_beams=num_beams)
+            INPUT_TOKENS_TOTAL.inc(len(formatted_text.split()))
             questions = self.question_generator(
                 formatted_text, 
                 max_length=max_length, 
@@ -88,18 +204,17 @@ class QuestionGenerator:
                 temperature=0.7
             )
             
-            # Extract and clean questions
-            generated_questions = []
-            for q in questions:
-                question_text = q.get('generated_text', '')
-                if question_text:
-                    sanitized = sanitize_question(question_text)
-                    if sanitized:
-                        generated_questions.append(sanitized)
-            
-            # Remove duplicates while preserving order
-            unique_questions = remove_duplicates_preserve_order(generated_questions)
+            # Clean, filter and deduplicate the batch
+            processed = postprocess_questions((q.get('generated_text', '') for q in questions), language='en')
+            unique_questions = processed.questions
+            count_questions(
+                'model',
+                kept=len(unique_questions),
+                sanitized=processed.rejected,
+                duplicate=processed.duplicates
+            )
             
+            self.question_cache.put(formatted_text, profile, num_questions, unique_questions)
             logger.info(f"Generated {len(unique_questions)} questions from text")
             return unique_questions
             
@@ -107,19 +222,23 @@ class QuestionGenerator:
             logger.error(f"Error generating questions from text: {str(e)}")
             return []
     
+    @timed('retrieval')
     def retrieve_relevant_chunks(
         self, 
         prompt: str, 
         text_chunks: List[str], 
-        top_n: int = None
+        top_n: int = None,
+        document_id: str = None
     ) -> List[str]:
         """
-        Retrieve the most relevant text chunks based on a prompt using TF-IDF.
+        Retrieve the most relevant text chunks based on a prompt.
         
         Args:
             prompt: The search prompt
             text_chunks: List of text chunks to search through
             top_n: Number of top chunks to return
+            document_id: Identifier of the source document, used by retrievers
+                that cache per-document data
             
         Returns:
             List[str]: List of relevant text chunks
@@ -136,22 +255,14 @@ class QuestionGenerator:
             return text_chunks[:top_n]
         
         try:
-            # Prepare documents for TF-IDF
-            documents = [prompt] + text_chunks
-            
-            # Create TF-IDF vectors
-            vectorizer = TfidfVectorizer()
-            tfidf_matrix = vectorizer.fit_transform(documents)
-            
-            # Calculate cosine similarities
-            cosine_similarities = cosine_similarity(
-                tfidf_matrix[0:1], 
-                tfidf_matrix[1:]
-            ).flatten()
-            
             # Get top N most similar chunks
-            top_n_indices = cosine_similarities.argsort()[-top_n:][::-1]
-            relevant_chunks = [text_chunks[i] for i in top_n_indices]
+            top_n_indices = self.retriever.rank(prompt, text_chunks, top_n, document_id=document_id)
+            if hasattr(text_chunks, 'select'):
+                # A ChunkStore keeps the offsets, so questions can be traced to their chunk
+                relevant_chunks = text_chunks.select(top_n_indices)
+            else:
+                relevant_chunks = [text_chunks[i] for i in top_n_indices]
+            CHUNKS_TOTAL.labels(stage='retrieved').inc(len(relevant_chunks))
             
             logger.info(f"Retrieved {len(relevant_chunks)} relevant chunks")
             return relevant_chunks
@@ -166,7 +277,8 @@ class QuestionGenerator:
         text_chunks: List[str],
         total_questions: int = None,
         top_n_chunks: int = None,
-        questions_per_chunk: int = None
+        questions_per_chunk: int = None,
+        document_id: str = None
     ) -> List[str]:
         """
         Generate questions using RAG (Retrieval-Augmented Generation) approach.
@@ -177,6 +289,7 @@ class QuestionGenerator:
             total_questions: Total number of questions to generate
             top_n_chunks: Number of top chunks to use
             questions_per_chunk: Number of questions per chunk
+            document_id: Identifier of the source document
             
         Returns:
             List[str]: List of generated questions
@@ -197,30 +310,19 @@ class QuestionGenerator:
             relevant_chunks = self.retrieve_relevant_chunks(
                 prompt, 
                 text_chunks, 
-                top_n=top_n_chunks
+                top_n=top_n_chunks,
+                document_id=document_id
             )
             
             if not relevant_chunks:
                 logger.warning("No relevant chunks found")
                 return []
             
-            # Generate questions from each relevant chunk
-            all_generated_questions = []
-            
-            for chunk in tqdm(relevant_chunks, desc="Generating questions"):
-                chunk_questions = self.generate_questions_from_text(
-                    chunk, 
-                    num_questions=questions_per_chunk
-                )
-                all_generated_questions.extend(chunk_questions)
-                
-                # Stop if we have enough questions
-                if len(all_generated_questions) >= total_questions:
-                    break
-            
-            # Remove duplicates and limit to requested number
-            unique_questions = remove_duplicates_preserve_order(all_generated_questions)
-            final_questions = unique_questions[:total_questions]
+            final_questions = self.generate_questions_from_chunks(
+                relevant_chunks,
+                total_questions=total_questions,
+                questions_per_chunk=questions_per_chunk
+            )
             
             logger.info(f"Generated {len(final_questions)} questions using RAG")
             return final_questions
@@ -228,8 +330,79 @@ class QuestionGenerator:
         except Exception as e:
             logger.error(f"Error in RAG question generation: {str(e)}")
             return []
+    
+    def generate_questions_from_chunks(
+        self,
+        relevant_chunks: List[str],
+        total_questions: int = None,
+        questions_per_chunk: int = None
+    ) -> List[str]:
+        """
+        Generate questions from already retrieved chunks, best chunk first.
+        
+        Args:
+            relevant_chunks: Chunks ordered by relevance
+            total_questions: Total number of questions to generate
+            questions_per_chunk: Number of questions per chunk
+            
+        Returns:
+            List[str]: List of generated questions
+        """
+        from tqdm import tqdm
+        
+        if total_questions is None:
+            total_questions = Config.DEFAULT_TOTAL_QUESTIONS
+        if questions_per_chunk is None:
+            questions_per_chunk = Config.MAX_QUESTIONS_PER_CHUNK
+        
+        # Generate questions from each relevant chunk, dropping near-duplicates
+        # as they arrive so the early stop counts only distinct questions; the
+        # budget sizes each chunk's request from the keep-rate so far
+        near_duplicates = NearDuplicateFilter()
+        budget = GenerationBudget(total_questions, per_chunk=questions_per_chunk)
+        
+        for position, chunk in enumerate(tqdm(relevant_chunks, desc="Generating questions")):
+            # Stop if we have enough questions
+            if budget.done:
+                break
+            
+            num_questions = budget.next_count(len(relevant_chunks) - position)
+            cached = self.cached_questions(chunk, num_questions)
+            chunk_questions = cached if cached is not None else self.generate_uncached_questions(
+                chunk, 
+                num_questions=num_questions
+            )
+            CHUNKS_TOTAL.labels(stage='generated').inc()
+            record_source(chunk_questions, relevant_chunks, position)
+            budget.record(num_questions, near_duplicates.extend(chunk_questions), cached=cached is not None)
+        
+        count_questions('model', near_duplicate=near_duplicates.dropped)
+        budget.report('model')
+        return near_duplicates.kept[:total_questions]
 
-# Global instance for backward compatibility
+    def pregenerate(self, text_chunks: List[str], num_questions: int = None) -> int:
+        """
+        Generate and cache questions for every chunk ahead of any prompt.
+        
+        Args:
+            text_chunks: Chunks of a document
+            num_questions: Sequences per chunk (defaults to
+                Config.GENERATION_MAX_RETURN_SEQUENCES, so later requests of
+                any size up to it are served from the cache)
+            
+        Returns:
+            int: Number of chunks processed
+        """
+        if num_questions is None:
+            num_questions = Config.GENERATION_MAX_RETURN_SEQUENCES
+        
+        for chunk in text_chunks:
+            self.generate_questions_from_text(chunk, num_questions=num_questions)
+        
+        logger.info(f"Pre-generated questions for {len(text_chunks)} chunks")
+        return len(text_chunks)
+
+# Global instance for backward compatibility (the model loads on first use)
 question_generator = QuestionGenerator()
 
 # Legacy functions for backward compatibility
@@ -246,7 +419,12 @@ def generate_questions(text: str, num_questions: int = 15) -> List[str]:
     """
     return question_generator.generate_questions_from_text(text, num_questions)
 
-def retrieve_relevant_chunks(prompt: str, text_chunks: List[str], top_n: int = 5) -> List[str]:
+def retrieve_relevant_chunks(
+    prompt: str,
+    text_chunks: List[str],
+    top_n: int = 5,
+    document_id: str = None
+) -> List[str]:
     """
     Retrieve relevant chunks (legacy function).
     
@@ -254,18 +432,20 @@ def retrieve_relevant_chunks(prompt: str, text_chunks: List[str], top_n: int = 5
         prompt: Search prompt
         text_chunks: Text chunks to search
         top_n: Number of top chunks
+        document_id: Identifier of the source document
         
     Returns:
         List[str]: Relevant chunks
     """
-    return question_generator.retrieve_relevant_chunks(prompt, text_chunks, top_n)
+    return question_generator.retrieve_relevant_chunks(prompt, text_chunks, top_n, document_id)
 
 def generate_questions_from_prompt_with_rag(
     prompt: str,
     text_chunks: List[str],
     total_questions: int = 20,
     top_n_chunks: int = 5,
-    questions_per_chunk: int = 2
+    questions_per_chunk: int = 2,
+    document_id: str = None
 ) -> List[str]:
     """
     Generate questions using RAG (legacy function).
@@ -276,10 +456,11 @@ def generate_questions_from_prompt_with_rag(
         total_questions: Total questions to generate
         top_n_chunks: Top chunks to use
         questions_per_chunk: Questions per chunk
+        document_id: Identifier of the source document
         
     Returns:
         List[str]: Generated questions
     """
     return question_generator.generate_questions_from_prompt_with_rag(
-        prompt, text_chunks, total_questions, top_n_chunks, questions_per_chunk
+        prompt, text_chunks, total_questions, top_n_chunks, questions_per_chunk, document_id
     ) 
\ No newline at end of file
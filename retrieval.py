@@ -0,0 +1,572 @@
+"""
+Retrieval backends that rank text chunks against a prompt.
+
+``QuestionGenerator.retrieve_relevant_chunks`` delegates to the retriever
+selected by ``Config.RETRIEVER``:
+
+- ``tfidf``: bag-of-words TF-IDF refit per request (the original behaviour)
+- ``dense``: sentence embeddings from a small local model; chunk vectors are
+  stored per document as a float16 matrix and memory-mapped on reuse
+- ``bm25``: BM25 blended with TF-IDF cosine, both scored from one inverted
+  index built once per document, so a query only touches the postings of
+  the prompt's terms
+"""
+import os
+import re
+import hashlib
+import itertools
+import logging
+import threading
+from abc import ABC, abstractmethod
+from collections import Counter, OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from config import Config
+from document_cache import document_cache
+
+logger = logging.getLogger(__name__)
+
+
+class Retriever(ABC):
+    """Base class for chunk retrieval backends."""
+    
+    name = 'base'
+    
+    @abstractmethod
+    def rank(self, prompt: str, text_chunks: Sequence[str], top_n: int, document_id: str = None) -> List[int]:
+        """
+        Rank chunks by relevance to a prompt.
+        
+        Args:
+            prompt: The search prompt
+            text_chunks: Chunks to search through
+            top_n: Number of chunk indices to return
+            document_id: Identifier of the document the chunks come from, used
+                by backends that cache per-document data
+            
+        Returns:
+            List[int]: Indices of the most relevant chunks, best first
+        """
+    
+    def prepare(self, text_chunks: Sequence[str], document_id: str) -> None:
+        """
+        Build and cache per-document data ahead of the first prompt.
+        
+        Args:
+            text_chunks: Chunks of the document
+            document_id: Document identifier
+        """
+
+
+def chunks_fingerprint(text_chunks: Sequence[str]) -> str:
+    """
+    Hash the chunking of a document, so cached data is rebuilt when it changes.
+    
+    Args:
+        text_chunks: Chunks of the document
+        
+    Returns:
+        str: Hex digest over all chunks
+    """
+    fingerprint = hashlib.sha256()
+    for chunk in text_chunks:
+        fingerprint.update(chunk.encode('utf-8'))
+        fingerprint.update(b'\x00')
+    return fingerprint.hexdigest()
+
+
+def top_k_indices(scores: np.ndarray, top_n: int) -> List[int]:
+    """
+    Select the indices of the highest scores, best first.
+    
+    Args:
+        scores: One score per chunk
+        top_n: Number of indices to return
+        
+    Returns:
+        List[int]: Indices of the top scores
+    """
+    top_n = min(top_n, len(scores))
+    if top_n <= 0:
+        return []
+    # argpartition is linear; only the selected scores get sorted
+    candidates = np.argpartition(-scores, top_n - 1)[:top_n]
+    return candidates[np.argsort(-scores[candidates], kind='stable')].tolist()
+
+
+class TfidfRetriever(Retriever):
+    """Bag-of-words TF-IDF retrieval, fitted on the prompt and chunks of each request."""
+    
+    name = 'tfidf'
+    
+    def rank(self, prompt: str, text_chunks: Sequence[str], top_n: int, document_id: str = None) -> List[int]:
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        from sklearn.metrics.pairwise import cosine_similarity
+        
+        # Stream the prompt and chunks to the vectorizer without copying them into a list
+        documents = itertools.chain([prompt], text_chunks)
+        
+        # Create TF-IDF vectors
+        vectorizer = TfidfVectorizer()
+        tfidf_matrix = vectorizer.fit_transform(documents)
+        
+        # Calculate cosine similarities
+        cosine_similarities = cosine_similarity(
+            tfidf_matrix[0:1], 
+            tfidf_matrix[1:]
+        ).flatten()
+        
+        return cosine_similarities.argsort()[-top_n:][::-1].tolist()
+
+
+class TransformerEmbedder:
+    """Mean-pooled, L2-normalised sentence embeddings from a local transformer model."""
+    
+    def __init__(self, model_name: str = None, batch_size: int = 32):
+        """
+        Load the embedding model.
+        
+        Args:
+            model_name: Hugging Face model name (defaults to Config.EMBEDDING_MODEL)
+            batch_size: Number of texts encoded per forward pass
+        """
+        from transformers import AutoModel, AutoTokenizer
+        
+        self.model_name = model_name or Config.EMBEDDING_MODEL
+        self.batch_size = batch_size
+        self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+        self.model = AutoModel.from_pretrained(self.model_name)
+        self.model.eval()
+        logger.info(f"Embedding model initialized: {self.model_name}")
+    
+    def __call__(self, texts: Sequence[str]) -> np.ndarray:
+        """
+        Encode texts into unit-length vectors.
+        
+        Args:
+            texts: Texts to encode
+            
+        Returns:
+            np.ndarray: float32 matrix with one row per text
+        """
+        import torch
+        
+        vectors = []
+        with torch.no_grad():
+            for start in range(0, len(texts), self.batch_size):
+                batch = self.tokenizer(
+                    list(texts[start:start + self.batch_size]),
+                    padding=True,
+                    truncation=True,
+                    max_length=256,
+                    return_tensors='pt'
+                )
+                hidden = self.model(**batch).last_hidden_state
+                mask = batch['attention_mask'].unsqueeze(-1).to(hidden.dtype)
+                pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1e-9)
+                vectors.append(torch.nn.functional.normalize(pooled, dim=1).numpy())
+        return np.vstack(vectors).astype(np.float32)
+
+
+class DenseRetriever(Retriever):
+    """Embedding-based semantic retrieval with per-document memory-mapped vectors."""
+    
+    name = 'dense'
+    
+    # Rows of the float16 matrix upcast to float32 at a time when scoring
+    BLOCK_ROWS = 4096
+    
+    def __init__(self, embedder: Callable[[Sequence[str]], np.ndarray] = None, cache=None):
+        """
+        Initialize the dense retriever.
+        
+        Args:
+            embedder: Callable mapping texts to unit-length vectors; a
+                ``TransformerEmbedder`` is created on first use when omitted
+            cache: Document cache for the chunk matrices (defaults to the global cache)
+        """
+        self._embedder = embedder
+        self.cache = cache or document_cache
+        self._lock = threading.Lock()
+    
+    @property
+    def embedder(self) -> Callable[[Sequence[str]], np.ndarray]:
+        """Embedding callable, loaded on first use."""
+        if self._embedder is None:
+            with self._lock:
+                if self._embedder is None:
+                    self._embedder = TransformerEmbedder()
+        return self._embedder
+    
+    def _model_slug(self) -> str:
+        model_name = getattr(self.embedder, 'model_name', type(self.embedder).__name__)
+        return hashlib.sha1(model_name.encode('utf-8')).hexdigest()[:12]
+    
+    def chunk_matrix(self, text_chunks: Sequence[str], document_id: str = None) -> np.ndarray:
+        """
+        Get the float16 embedding matrix of a document's chunks.
+        
+        The matrix is computed once per document, chunking and embedding model,
+        saved as ``.npy`` and memory-mapped on later requests.
+        
+        Args:
+            text_chunks: Chunks of the document
+            document_id: Document identifier; without one nothing is cached
+            
+        Returns:
+            np.ndarray: Matrix with one float16 row per chunk
+        """
+        if document_id is None:
+            return self.embedder(text_chunks).astype(np.float16)
+        
+        name = f"embeddings-{self._model_slug()}-{chunks_fingerprint(text_chunks)[:16]}.npy"
+        
+        path = self.cache.find(document_id, name)
+        if path:
+            return np.load(path, mmap_mode='r')
+        
+        matrix = self.embedder(text_chunks).astype(np.float16)
+        path = self.cache.path(document_id, name)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as fh:
+            np.save(fh, matrix)
+        os.replace(tmp_path, path)
+        logger.info(f"Cached {matrix.shape[0]} chunk embeddings for document {document_id[:12]}")
+        return np.load(path, mmap_mode='r')
+    
+    def prepare(self, text_chunks: Sequence[str], document_id: str) -> None:
+        self.chunk_matrix(text_chunks, document_id)
+    
+    def rank(self, prompt: str, text_chunks: Sequence[str], top_n: int, document_id: str = None) -> List[int]:
+        matrix = self.chunk_matrix(text_chunks, document_id)
+        query = np.asarray(self.embedder([prompt])[0], dtype=np.float32)
+        # Vectors are unit length, so the dot product is the cosine similarity.
+        # numpy has no BLAS path for float16, so the stored matrix is upcast to
+        # float32 one block of rows at a time
+        scores = np.empty(matrix.shape[0], dtype=np.float32)
+        for start in range(0, matrix.shape[0], self.BLOCK_ROWS):
+            stop = start + self.BLOCK_ROWS
+            scores[start:stop] = matrix[start:stop].astype(np.float32) @ query
+        return top_k_indices(scores, top_n)
+
+
+# Words of two or more letters; Devanagari vowel signs and viramas are kept
+# inside the word, while the danda (U+0964/U+0965) separates words
+TOKEN_PATTERN = re.compile(r'[\w\u0900-\u0963\u0966-\u097F]{2,}')
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lower-cased index terms.
+    
+    Args:
+        text: Text to tokenize
+        
+    Returns:
+        List[str]: Terms in order of appearance
+    """
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class SparseIndex:
+    """
+    Inverted index over a document's chunks in compact array form.
+    
+    Postings are stored CSR-style: the postings of term ``t`` are
+    ``chunk_ids[indptr[t]:indptr[t + 1]]`` with matching term frequencies in
+    ``term_freqs``. BM25 and TF-IDF statistics are precomputed at build time.
+    """
+    
+    def __init__(
+        self,
+        vocabulary: Dict[str, int],
+        indptr: np.ndarray,
+        chunk_ids: np.ndarray,
+        term_freqs: np.ndarray,
+        chunk_lengths: np.ndarray
+    ):
+        """
+        Initialize the index from its arrays; use ``build`` to index chunks.
+        
+        Args:
+            vocabulary: Term to term id
+            indptr: Offsets of each term's postings (length ``terms + 1``)
+            chunk_ids: Chunk id of every posting
+            term_freqs: Term frequency of every posting
+            chunk_lengths: Number of terms in every chunk
+        """
+        self.vocabulary = vocabulary
+        self.indptr = indptr
+        self.chunk_ids = chunk_ids
+        self.term_freqs = term_freqs
+        self.chunk_lengths = chunk_lengths
+        
+        num_chunks = len(chunk_lengths)
+        doc_freqs = np.diff(indptr).astype(np.float32)
+        self.avg_length = float(chunk_lengths.mean()) if num_chunks else 0.0
+        self.bm25_idf = np.log1p((num_chunks - doc_freqs + 0.5) / (doc_freqs + 0.5)).astype(np.float32)
+        # Smoothed idf, as scikit-learn's TfidfVectorizer computes it
+        self.tfidf_idf = (np.log((1.0 + num_chunks) / (1.0 + doc_freqs)) + 1.0).astype(np.float32)
+        
+        posting_terms = np.repeat(np.arange(len(doc_freqs)), np.diff(indptr))
+        squared = (term_freqs * self.tfidf_idf[posting_terms]) ** 2
+        self.tfidf_norms = np.sqrt(np.bincount(chunk_ids, weights=squared, minlength=num_chunks)).astype(np.float32)
+    
+    @classmethod
+    def build(cls, text_chunks: Sequence[str]) -> 'SparseIndex':
+        """
+        Index a document's chunks.
+        
+        Args:
+            text_chunks: Chunks to index
+            
+        Returns:
+            SparseIndex: The index
+        """
+        vocabulary: Dict[str, int] = {}
+        postings: List[List[int]] = []
+        frequencies: List[List[int]] = []
+        chunk_lengths = np.zeros(len(text_chunks), dtype=np.float32)
+        
+        for chunk_id, chunk in enumerate(text_chunks):
+            terms = tokenize(chunk)
+            chunk_lengths[chunk_id] = len(terms)
+            for term, count in Counter(terms).items():
+                term_id = vocabulary.setdefault(term, len(vocabulary))
+                if term_id == len(postings):
+                    postings.append([])
+                    frequencies.append([])
+                postings[term_id].append(chunk_id)
+                frequencies[term_id].append(count)
+        
+        indptr = np.zeros(len(postings) + 1, dtype=np.int64)
+        np.cumsum([len(p) for p in postings], out=indptr[1:])
+        chunk_ids = np.fromiter((c for p in postings for c in p), dtype=np.int32, count=int(indptr[-1]))
+        term_freqs = np.fromiter((f for fs in frequencies for f in fs), dtype=np.float32, count=int(indptr[-1]))
+        return cls(vocabulary, indptr, chunk_ids, term_freqs, chunk_lengths)
+    
+    def save(self, path: str) -> None:
+        """
+        Write the index to an ``.npz`` file.
+        
+        Args:
+            path: Destination path
+        """
+        terms = np.array(sorted(self.vocabulary, key=self.vocabulary.get))
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as fh:
+            np.savez(
+                fh,
+                terms=terms,
+                indptr=self.indptr,
+                chunk_ids=self.chunk_ids,
+                term_freqs=self.term_freqs,
+                chunk_lengths=self.chunk_lengths
+            )
+        os.replace(tmp_path, path)
+    
+    @classmethod
+    def load(cls, path: str) -> 'SparseIndex':
+        """
+        Read an index written by ``save``.
+        
+        Args:
+            path: Path to the ``.npz`` file
+            
+        Returns:
+            SparseIndex: The index
+        """
+        with np.load(path) as data:
+            vocabulary = {term: term_id for term_id, term in enumerate(data['terms'].tolist())}
+            return cls(vocabulary, data['indptr'], data['chunk_ids'], data['term_freqs'], data['chunk_lengths'])
+    
+    def score(self, prompt: str, k1: float = 1.5, b: float = 0.75, bm25_weight: float = 0.5):
+        """
+        Score the chunks containing any of the prompt's terms.
+        
+        Only the postings of the prompt's terms are read, so the cost grows
+        with the prompt rather than with the number of chunks.
+        
+        Args:
+            prompt: The search prompt
+            k1: BM25 term frequency saturation
+            b: BM25 length normalisation
+            bm25_weight: Share of the max-normalised BM25 score in the blend;
+                the rest is the TF-IDF cosine similarity
+            
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Candidate chunk ids and their scores
+        """
+        query = Counter(term for term in tokenize(prompt) if term in self.vocabulary)
+        if not query:
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32)
+        
+        ids, bm25_parts, tfidf_parts = [], [], []
+        query_norm = 0.0
+        for term, query_count in query.items():
+            term_id = self.vocabulary[term]
+            start, end = self.indptr[term_id], self.indptr[term_id + 1]
+            chunk_ids = self.chunk_ids[start:end]
+            tf = self.term_freqs[start:end]
+            lengths = self.chunk_lengths[chunk_ids]
+            
+            saturation = tf * (k1 + 1) / (tf + k1 * (1 - b + b * lengths / max(self.avg_length, 1e-9)))
+            bm25_parts.append(self.bm25_idf[term_id] * saturation)
+            query_weight = query_count * self.tfidf_idf[term_id]
+            tfidf_parts.append(tf * self.tfidf_idf[term_id] * query_weight)
+            query_norm += query_weight ** 2
+            ids.append(chunk_ids)
+        
+        candidates, inverse = np.unique(np.concatenate(ids), return_inverse=True)
+        bm25 = np.bincount(inverse, weights=np.concatenate(bm25_parts), minlength=len(candidates))
+        dot = np.bincount(inverse, weights=np.concatenate(tfidf_parts), minlength=len(candidates))
+        cosine = dot / (self.tfidf_norms[candidates] * np.sqrt(query_norm) + 1e-12)
+        
+        scores = bm25_weight * bm25 / max(bm25.max(), 1e-12) + (1 - bm25_weight) * cosine
+        return candidates, scores.astype(np.float32)
+    
+    def doc_freq(self, term: str) -> int:
+        """
+        Count the chunks containing a term.
+        
+        Args:
+            term: Index term
+            
+        Returns:
+            int: Number of chunks with the term
+        """
+        term_id = self.vocabulary.get(term)
+        return 0 if term_id is None else int(self.indptr[term_id + 1] - self.indptr[term_id])
+    
+    def bm25(self, terms: Sequence[str], idf: Dict[str, float], avg_length: float, k1: float = 1.5, b: float = 0.75):
+        """
+        Score chunks with BM25 using externally supplied collection statistics.
+        
+        Used when this index is one segment of a larger collection, whose idf
+        and average chunk length differ from the segment's own.
+        
+        Args:
+            terms: Distinct query terms
+            idf: BM25 idf of each query term over the whole collection
+            avg_length: Average chunk length over the whole collection
+            k1: BM25 term frequency saturation
+            b: BM25 length normalisation
+            
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Candidate chunk ids and their scores
+        """
+        ids, parts = [], []
+        for term in terms:
+            term_id = self.vocabulary.get(term)
+            if term_id is None:
+                continue
+            start, end = self.indptr[term_id], self.indptr[term_id + 1]
+            chunk_ids = self.chunk_ids[start:end]
+            tf = self.term_freqs[start:end]
+            lengths = self.chunk_lengths[chunk_ids]
+            parts.append(idf[term] * tf * (k1 + 1) / (tf + k1 * (1 - b + b * lengths / max(avg_length, 1e-9))))
+            ids.append(chunk_ids)
+        
+        if not ids:
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32)
+        candidates, inverse = np.unique(np.concatenate(ids), return_inverse=True)
+        scores = np.bincount(inverse, weights=np.concatenate(parts), minlength=len(candidates))
+        return candidates, scores.astype(np.float32)
+
+
+class BM25Retriever(Retriever):
+    """Hybrid BM25 + TF-IDF retrieval over an inverted index built once per document."""
+    
+    name = 'bm25'
+    
+    def __init__(self, cache=None, max_cached_indexes: int = None):
+        """
+        Initialize the BM25 retriever.
+        
+        Args:
+            cache: Document cache for persisted indexes (defaults to the global cache)
+            max_cached_indexes: Indexes kept in memory (defaults to Config.RETRIEVAL_INDEX_CACHE_SIZE)
+        """
+        self.cache = cache or document_cache
+        self.max_cached_indexes = max_cached_indexes or Config.RETRIEVAL_INDEX_CACHE_SIZE
+        self._indexes: 'OrderedDict[str, SparseIndex]' = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get_index(self, text_chunks: Sequence[str], document_id: str = None) -> SparseIndex:
+        """
+        Get the index of a document's chunks, building it on first use.
+        
+        Args:
+            text_chunks: Chunks of the document
+            document_id: Document identifier; without one the index is not cached
+            
+        Returns:
+            SparseIndex: The index
+        """
+        if document_id is None:
+            return SparseIndex.build(text_chunks)
+        
+        key = f"{document_id}-{chunks_fingerprint(text_chunks)[:16]}"
+        with self._lock:
+            if key in self._indexes:
+                self._indexes.move_to_end(key)
+                return self._indexes[key]
+        
+        name = f"bm25-{key.split('-')[-1]}.npz"
+        path = self.cache.find(document_id, name)
+        if path:
+            index = SparseIndex.load(path)
+        else:
+            index = SparseIndex.build(text_chunks)
+            index.save(self.cache.path(document_id, name))
+            logger.info(f"Built BM25 index over {len(text_chunks)} chunks for document {document_id[:12]}")
+        
+        with self._lock:
+            self._indexes[key] = index
+            while len(self._indexes) > self.max_cached_indexes:
+                self._indexes.popitem(last=False)
+        return index
+    
+    def prepare(self, text_chunks: Sequence[str], document_id: str) -> None:
+        self.get_index(text_chunks, document_id)
+    
+    def rank(self, prompt: str, text_chunks: Sequence[str], top_n: int, document_id: str = None) -> List[int]:
+        index = self.get_index(text_chunks, document_id)
+        candidates, scores = index.score(
+            prompt, k1=Config.BM25_K1, b=Config.BM25_B, bm25_weight=Config.BM25_WEIGHT
+        )
+        ranked = candidates[top_k_indices(scores, top_n)].tolist()
+        
+        # Fill up with unmatched chunks in document order, as TF-IDF ties would
+        if len(ranked) < top_n:
+            matched = set(ranked)
+            ranked.extend(i for i in range(len(text_chunks)) if i not in matched)
+        return ranked[:top_n]
+
+
+RETRIEVERS: Dict[str, Callable[[], Retriever]] = {
+    TfidfRetriever.name: TfidfRetriever,
+    DenseRetriever.name: DenseRetriever,
+    BM25Retriever.name: BM25Retriever
+}
+
+
+def get_retriever(name: str = None) -> Retriever:
+    """
+    Create the retriever backend with the given name.
+    
+    Args:
+        name: Backend name (defaults to Config.RETRIEVER)
+        
+    Returns:
+        Retriever: The retriever instance
+        
+    Raises:
+        ValueError: If the backend is unknown
+    """
+    name = (name or Config.RETRIEVER).lower()
+    if name not in RETRIEVERS:
+        raise ValueError(f"Unknown retriever: {name}. Choose from {', '.join(RETRIEVERS)}")
+    return RETRIEVERS[name]()
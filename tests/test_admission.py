@@ -0,0 +1,163 @@
+"""
+Tests for admission control of generation requests.
+"""
+import io
+import os
+import time
+import threading
+import pytest
+import admission
+from admission import AdmissionController, AdmissionRejected
+from config import Config
+
+
+@pytest.fixture
+def controller(tmp_path):
+    """Controller with two units, one request per client and no waiting."""
+    return AdmissionController(
+        root=str(tmp_path / 'admission'),
+        global_capacity=2,
+        language_capacity={'sanskrit': 1},
+        client_concurrency=1,
+        max_wait=0,
+        retry_after=7,
+        enabled=True
+    )
+
+
+class TestAdmissionController:
+    """Test capacity limits, fairness and cost estimates."""
+    
+    def test_rejects_when_capacity_is_taken(self, controller):
+        """Test that a request is rejected while all units are held."""
+        with controller.admit('english', 'a', cost=2):
+            with pytest.raises(AdmissionRejected) as excinfo:
+                with controller.admit('english', 'b', cost=1):
+                    pass
+        assert excinfo.value.reason == 'capacity'
+        assert excinfo.value.retry_after == 7
+    
+    def test_capacity_released_after_request(self, controller):
+        """Test that units are given back, also when the request fails."""
+        with pytest.raises(RuntimeError):
+            with controller.admit('english', 'a', cost=2):
+                raise RuntimeError("generation failed")
+        with controller.admit('english', 'b', cost=2):
+            pass
+    
+    def test_language_capacity(self, controller):
+        """Test that a language limit leaves room for other languages."""
+        with controller.admit('sanskrit', 'a', cost=1):
+            with pytest.raises(AdmissionRejected):
+                with controller.admit('sanskrit', 'b', cost=1):
+                    pass
+            with controller.admit('hindi', 'c', cost=1):
+                pass
+    
+    def test_client_concurrency(self, controller):
+        """Test that a client gets one request in flight while others still get in."""
+        with controller.admit('english', 'a', cost=1):
+            with pytest.raises(AdmissionRejected) as excinfo:
+                with controller.admit('english', 'a', cost=1):
+                    pass
+            assert excinfo.value.reason == 'client'
+            with controller.admit('english', 'b', cost=1):
+                pass
+    
+    def test_client_slots_are_bounded(self, controller, monkeypatch):
+        """Test that clients map to a fixed set of lock buckets."""
+        monkeypatch.setattr(admission, 'CLIENT_BUCKETS', 4)
+        names = {controller._client_pool(f"session-{i}").name for i in range(50)}
+        assert len(names) <= 4
+        assert controller._client_pool('a').name == controller._client_pool('a').name
+    
+    def test_head_of_queue_is_not_starved(self, controller):
+        """Test that a waiting expensive request keeps freed units from later cheap ones."""
+        held = controller._pool('global', 2).try_acquire(1)
+        admitted = threading.Event()
+        
+        def expensive():
+            waiting = AdmissionController(
+                root=controller.root, global_capacity=2, client_concurrency=0, max_wait=5, enabled=True
+            )
+            with waiting.admit('english', 'a', cost=2):
+                admitted.set()
+        
+        thread = threading.Thread(target=expensive)
+        thread.start()
+        gate = controller._pool('queue-global', 1)
+        while (turn := gate.try_acquire(1)) is not None:
+            admission.SlotPool.release(turn)
+            time.sleep(0.01)
+        try:
+            controller.max_wait = 0.3
+            with pytest.raises(AdmissionRejected):
+                with controller.admit('hindi', 'b', cost=1):
+                    pass
+            assert not admitted.is_set()
+        finally:
+            admission.SlotPool.release(held)
+        thread.join(5)
+        assert admitted.is_set()
+    
+    def test_large_request_runs_alone(self, controller):
+        """Test that a cost above the capacity is clamped instead of never admitted."""
+        with controller.admit('english', 'a', cost=10):
+            pass
+    
+    def test_waits_for_capacity(self, controller):
+        """Test that a request waits up to max_wait for a unit to free up."""
+        controller.max_wait = 2
+        held = controller._pool('global', 2).try_acquire(2)
+        timer = threading.Timer(0.2, admission.SlotPool.release, [held])
+        timer.start()
+        with controller.admit('english', 'a', cost=1):
+            pass
+        timer.join()
+    
+    def test_disabled(self, controller):
+        """Test that a disabled controller admits everything."""
+        controller.enabled = False
+        with controller.admit('english', 'a', cost=2):
+            with controller.admit('english', 'a', cost=2):
+                pass
+    
+    def test_estimate_cost(self, controller, monkeypatch):
+        """Test the cost estimate from pages and questions."""
+        monkeypatch.setattr(Config, 'ADMISSION_PAGES_PER_UNIT', 100)
+        monkeypatch.setattr(Config, 'ADMISSION_QUESTIONS_PER_UNIT', 20)
+        monkeypatch.setattr(admission, 'count_pages', lambda path: 150)
+        assert controller.estimate_cost('doc.pdf', 15) == 4
+        assert controller.estimate_cost(None, 40) == 3
+        assert controller.estimate_cost(None, 0) == 1
+
+
+class TestProcessAdmission:
+    """Test how /process answers requests that are not admitted."""
+    
+    def test_process_returns_429(self, controller, tmp_path, monkeypatch):
+        """Test that a rejected upload gets 429 with Retry-After and is removed."""
+        import fitz
+        import app as app_module
+        
+        monkeypatch.setattr(Config, 'UPLOAD_FOLDER', str(tmp_path / 'uploads'))
+        os.makedirs(Config.UPLOAD_FOLDER)
+        monkeypatch.setattr(app_module, 'admission_controller', controller)
+        
+        pdf = fitz.open()
+        pdf.new_page().insert_text((72, 72), "Photosynthesis converts light into energy.")
+        data = pdf.tobytes()
+        
+        client = app_module.app.test_client()
+        with client.session_transaction() as session:
+            session['language'] = 'hindi'
+        with controller.admit('hindi', 'other', cost=2):
+            response = client.post('/process', data={
+                'prompt': 'photosynthesis',
+                'total_questions': '5',
+                'file': (io.BytesIO(data), 'lecture.pdf')
+            }, content_type='multipart/form-data')
+        
+        assert response.status_code == 429
+        assert response.headers['Retry-After'] == '7'
+        assert os.listdir(Config.UPLOAD_FOLDER) == []
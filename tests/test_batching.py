@@ -0,0 +1,127 @@
+"""
+Tests for dynamic micro-batching and the inference server.
+"""
+import os
+import threading
+import pytest
+from batching import BatchedPipeline, MicroBatcher
+from inference_server import InferenceClient, InferenceServer
+
+
+class RecordingBatch:
+    """Batch function that records the batches it receives."""
+    
+    def __init__(self):
+        self.batches = []
+        self.release = threading.Event()
+    
+    def __call__(self, key, items):
+        self.release.wait(5)
+        self.batches.append((key, list(items)))
+        return [f"{key}:{item}" for item in items]
+
+
+class TestMicroBatcher:
+    """Test batch collection and result routing."""
+    
+    def test_single_item(self):
+        """Test that a lone item is processed after the wait window."""
+        run = RecordingBatch()
+        run.release.set()
+        batcher = MicroBatcher(run, max_batch_size=4, max_wait_ms=1)
+        assert batcher.submit('a', key='k').result(timeout=5) == 'k:a'
+    
+    def test_concurrent_items_share_a_batch(self):
+        """Test that items queued while the model is busy are batched together."""
+        run = RecordingBatch()
+        batcher = MicroBatcher(run, max_batch_size=8, max_wait_ms=1)
+        first = batcher.submit(0, key='k')
+        # The first batch is blocked, so the following items accumulate
+        futures = [batcher.submit(i, key='k') for i in range(1, 5)]
+        run.release.set()
+        assert first.result(timeout=5) == 'k:0'
+        assert [f.result(timeout=5) for f in futures] == [f"k:{i}" for i in range(1, 5)]
+        assert any({1, 2, 3, 4} <= set(items) for _, items in run.batches)
+    
+    def test_groups_by_key(self):
+        """Test that items with different keys are never mixed."""
+        run = RecordingBatch()
+        batcher = MicroBatcher(run, max_batch_size=8, max_wait_ms=50)
+        futures = [batcher.submit(i, key=i % 2) for i in range(4)]
+        run.release.set()
+        assert [f.result(timeout=5) for f in futures] == ['0:0', '1:1', '0:2', '1:3']
+        for key, items in run.batches:
+            assert all(item % 2 == key for item in items)
+    
+    def test_max_batch_size(self):
+        """Test that batches never exceed the maximum size."""
+        run = RecordingBatch()
+        batcher = MicroBatcher(run, max_batch_size=2, max_wait_ms=20)
+        futures = [batcher.submit(i) for i in range(5)]
+        run.release.set()
+        for future in futures:
+            future.result(timeout=5)
+        assert max(len(items) for _, items in run.batches) <= 2
+    
+    def test_errors_reach_every_caller(self):
+        """Test that a failing batch fails each of its futures."""
+        def broken(key, items):
+            raise ValueError("model crashed")
+        
+        batcher = MicroBatcher(broken, max_batch_size=4, max_wait_ms=1)
+        with pytest.raises(ValueError):
+            batcher.submit('a').result(timeout=5)
+
+
+class FakePipeline:
+    """Stands in for the Hugging Face pipeline."""
+    
+    def __call__(self, texts, batch_size=1, num_return_sequences=1, **kwargs):
+        outputs = [
+            [{'generated_text': f"{text}?{i}"} for i in range(num_return_sequences)]
+            for text in texts
+        ]
+        return [o[0] for o in outputs] if num_return_sequences == 1 else outputs
+
+
+class TestInferenceServer:
+    """Test the socket round trip between client and server."""
+    
+    def test_round_trip(self, tmp_path):
+        """Test that clients receive pipeline-shaped results."""
+        socket_path = os.path.join(str(tmp_path), 'qg.sock')
+        server = InferenceServer(address=socket_path, generation_pipeline=FakePipeline())
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            client = InferenceClient(socket_path, connect_timeout=5)
+            assert client("hello", num_return_sequences=2) == [
+                {'generated_text': 'hello?0'},
+                {'generated_text': 'hello?1'}
+            ]
+            assert client("hi", num_return_sequences=1) == [{'generated_text': 'hi?0'}]
+        finally:
+            server.shutdown()
+    
+    def test_client_gives_up_without_server(self, tmp_path):
+        """Test that an unreachable server raises after the connect timeout."""
+        client = InferenceClient(os.path.join(str(tmp_path), 'missing.sock'), connect_timeout=0)
+        with pytest.raises(RuntimeError):
+            client("hello")
+
+
+class TestBatchedPipeline:
+    """Test the pipeline wrapper."""
+    
+    def test_matches_pipeline_output_shape(self):
+        """Test that results look like a direct pipeline call."""
+        pipeline = BatchedPipeline(FakePipeline(), max_batch_size=4, max_wait_ms=1)
+        assert pipeline("a", num_return_sequences=1) == [{'generated_text': 'a?0'}]
+        assert len(pipeline("b", num_return_sequences=3)) == 3
+    
+    def test_concurrent_callers_get_their_own_results(self):
+        """Test that results are routed back to the right caller."""
+        pipeline = BatchedPipeline(FakePipeline(), max_batch_size=8, max_wait_ms=20)
+        futures = [pipeline.submit(f"text{i}", num_return_sequences=2) for i in range(6)]
+        for i, future in enumerate(futures):
+            assert future.result(timeout=5)[1] == {'generated_text': f"text{i}?1"}
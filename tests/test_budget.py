@@ -0,0 +1,73 @@
+"""
+Tests for the adaptive generation budget.
+"""
+import pytest
+from budget import GenerationBudget
+
+
+class TestGenerationBudget:
+    """Test how many sequences are requested per chunk."""
+    
+    def test_starts_with_preferred_count(self):
+        """Test that the first chunk asks for the preferred count, or more if chunks are scarce."""
+        budget = GenerationBudget(20, per_chunk=3, max_per_chunk=5, prior_keep_rate=0.7)
+        assert budget.next_count(remaining_chunks=5) == 5  # 20 needed over 5 chunks
+        budget = GenerationBudget(6, per_chunk=3, max_per_chunk=5, prior_keep_rate=0.7)
+        assert budget.next_count(remaining_chunks=5) == 3
+    
+    def test_tail_requests_only_what_is_missing(self):
+        """Test that overshoot is avoided near the target."""
+        budget = GenerationBudget(10, per_chunk=3, max_per_chunk=5, prior_keep_rate=1.0)
+        budget.record(generated=9, kept=9)
+        assert budget.remaining == 1
+        assert budget.next_count(remaining_chunks=3) == 1
+    
+    def test_low_keep_rate_requests_more(self):
+        """Test that a poor keep-rate raises the request up to the maximum."""
+        budget = GenerationBudget(10, per_chunk=2, max_per_chunk=5, prior_keep_rate=0.7)
+        budget.record(generated=10, kept=2)
+        assert budget.keep_rate < 0.3
+        assert budget.next_count(remaining_chunks=2) == 5
+    
+    def test_done_and_wasted(self):
+        """Test completion and the wasted sequence count."""
+        budget = GenerationBudget(4, per_chunk=3)
+        budget.record(generated=3, kept=2)
+        assert not budget.done
+        budget.record(generated=3, kept=3)
+        assert budget.done
+        assert budget.next_count() == 0
+        assert budget.wasted == 2
+    
+    def test_non_adaptive_uses_fixed_count(self):
+        """Test that the adaptive controller can be switched off."""
+        budget = GenerationBudget(10, per_chunk=3, max_per_chunk=5, adaptive=False)
+        budget.record(generated=9, kept=9)
+        assert budget.next_count(remaining_chunks=1) == 3
+    
+    @pytest.mark.parametrize('keep_rate', [0.0, 1.0])
+    def test_keep_rate_is_bounded(self, keep_rate):
+        """Test that the estimate stays within [0.1, 1]."""
+        budget = GenerationBudget(10, prior_keep_rate=keep_rate, prior_weight=1.0)
+        budget.record(generated=100, kept=int(100 * keep_rate))
+        assert 0.1 <= budget.keep_rate <= 1.0
+    
+    def test_capped_at_beam_count(self, monkeypatch):
+        """Test that no more sequences are requested than beam search can return."""
+        from config import Config
+        
+        monkeypatch.setattr(Config, 'GENERATION_NUM_BEAMS', 4)
+        budget = GenerationBudget(40, per_chunk=6, max_per_chunk=8)
+        assert budget.max_per_chunk == budget.per_chunk == 4
+        assert budget.next_count(remaining_chunks=1) == 4
+    
+    def test_cache_hits_are_not_generated(self):
+        """Test that questions from the cache count towards the target only."""
+        budget = GenerationBudget(6, per_chunk=3, prior_keep_rate=0.5)
+        budget.record(generated=3, kept=3, cached=True)
+        assert budget.generated == 0
+        assert budget.remaining == 3
+        assert budget.keep_rate == 0.5
+        budget.record(generated=3, kept=3)
+        assert budget.done
+        assert budget.wasted == 0
@@ -0,0 +1,140 @@
+"""
+Tests for the offset-based chunk store.
+"""
+import pytest
+from chunk_store import ChunkStore
+from document_cache import document_cache
+from page_cache import page_cache
+from utils import split_text_into_chunks
+
+PAGES = [
+    "The monsoon brings heavy rainfall. Rivers such as the Ganga depend on it.",
+    "",
+    "भारत एक विशाल देश है। गंगा एक पवित्र नदी है। Photosynthesis converts sunlight into glucose."
+]
+
+
+class TestChunkStore:
+    """Test chunking, metadata and serialization."""
+    
+    @pytest.mark.parametrize('chunk_size', [7, 20, 64, 1000])
+    def test_matches_split_text_into_chunks(self, chunk_size):
+        """Test that chunks are identical to the string-based splitter."""
+        store = ChunkStore.from_pages(PAGES, chunk_size)
+        expected = split_text_into_chunks(' '.join(page for page in PAGES if page), chunk_size)
+        assert list(store) == expected
+        assert store == expected
+        assert len(store) == len(expected)
+    
+    def test_indexing_and_slicing(self):
+        """Test that chunks are sliced lazily like list items."""
+        store = ChunkStore.from_pages(PAGES, 20)
+        chunks = list(store)
+        assert store[0] == chunks[0]
+        assert store[-1] == chunks[-1]
+        assert store[1:3] == chunks[1:3]
+        assert store[::-1] == chunks[::-1]
+    
+    def test_select_keeps_locations(self):
+        """Test that selected chunks keep their offsets and pages in the document."""
+        store = ChunkStore.from_pages(PAGES, 40)
+        selected = store.select([len(store) - 1, 0])
+        assert list(selected) == [store[-1], store[0]]
+        assert selected.text is store.text
+        assert selected.location(0) == store.location(len(store) - 1)
+        start, end, page = selected.location(0)
+        assert store.text[start:end] == store[-1]
+        assert page == 2
+    
+    def test_page_and_sentence_ids(self):
+        """Test that each chunk knows the page and sentence it starts in."""
+        store = ChunkStore.from_pages(PAGES, 1000)
+        assert store.page_ids.tolist() == [0]
+        
+        store = ChunkStore.from_pages(PAGES, 40)
+        first_page_chunks = -(-len(PAGES[0]) // 40)
+        assert store.page_ids.tolist()[:first_page_chunks] == [0] * first_page_chunks
+        assert store.page_ids.tolist()[-1] == 2  # the empty page keeps its number
+        assert store.sentence_ids.tolist() == sorted(store.sentence_ids.tolist())
+        assert store.sentence_ids[0] == 0
+        assert store.sentence_ids[-1] >= 3  # sentences ending with '.' and '।' both count
+    
+    def test_save_and_load(self, tmp_path):
+        """Test that a store round-trips through the document cache format."""
+        store = ChunkStore.from_pages(PAGES, 20)
+        path = str(tmp_path / 'chunks.npz')
+        store.save(path)
+        loaded = ChunkStore.load(path)
+        assert loaded == store
+        assert loaded.page_ids.tolist() == store.page_ids.tolist()
+        assert loaded.sentence_ids.tolist() == store.sentence_ids.tolist()
+    
+    def test_from_chunks(self):
+        """Test packing existing chunk strings."""
+        store = ChunkStore.from_chunks(["first chunk", "second chunk"])
+        assert list(store) == ["first chunk", "second chunk"]
+        assert ChunkStore.from_chunks(store) is store
+        assert not ChunkStore.from_chunks([])
+    
+    def test_pdf_chunks_are_cached(self, tmp_path, monkeypatch):
+        """Test that extracted chunks are stored once per document."""
+        fitz = pytest.importorskip('fitz')
+        from pdf_processor import PDFProcessor
+        
+        monkeypatch.setattr(document_cache, 'root', str(tmp_path / 'cache'))
+        monkeypatch.setattr(page_cache, 'root', str(tmp_path / 'pages'))
+        pdf = fitz.open()
+        for text in ("The monsoon brings rain.", "Akbar ruled the Mughal empire."):
+            pdf.new_page().insert_text((72, 72), text)
+        path = str(tmp_path / 'lecture.pdf')
+        pdf.save(path)
+        
+        processor = PDFProcessor()
+        chunks = processor.extract_text_chunks(path, chunk_size=30)
+        assert isinstance(chunks, ChunkStore)
+        assert chunks.page_ids.tolist()[-1] == 1
+        
+        monkeypatch.setattr(processor, 'extract_pages', lambda *args: pytest.fail("extracted twice"))
+        assert processor.extract_text_chunks(path, chunk_size=30) == chunks
+        
+        # Chunks cached under older normalization rules are not reused
+        import pdf_processor
+        monkeypatch.setattr(pdf_processor, 'NORMALIZATION_VERSION', pdf_processor.NORMALIZATION_VERSION + 1)
+        with pytest.raises(pytest.fail.Exception):
+            processor.extract_text_chunks(path, chunk_size=30)
+    
+    def test_pdf_page_selection(self, tmp_path, monkeypatch):
+        """Test that only selected pages or outline chapters are extracted."""
+        fitz = pytest.importorskip('fitz')
+        from pdf_processor import PDFProcessor
+        
+        monkeypatch.setattr(document_cache, 'root', str(tmp_path / 'cache'))
+        monkeypatch.setattr(page_cache, 'root', str(tmp_path / 'pages'))
+        pdf = fitz.open()
+        for text in ("Introduction to rivers.", "The Ganga flows east.", "Akbar ruled the Mughal empire."):
+            pdf.new_page().insert_text((72, 72), text)
+        pdf.set_toc([[1, "Geography", 1], [2, "Rivers", 2], [1, "History", 3]])
+        path = str(tmp_path / 'lecture.pdf')
+        pdf.save(path)
+        
+        processor = PDFProcessor()
+        outline = processor.extract_outline(path)
+        assert [(c['title'], c['first_page'], c['last_page']) for c in outline] == [
+            ("Geography", 1, 2), ("Rivers", 2, 2), ("History", 3, 3)
+        ]
+        assert processor.select_pages(path, chapter=2) == [2]
+        assert processor.select_pages(path, page_ranges="1-2") == [0, 1]
+        assert processor.select_pages(path) is None
+        with pytest.raises(ValueError):
+            processor.select_pages(path, chapter=5)
+        
+        chunks = processor.extract_text_chunks(path, pages=[2])
+        assert list(chunks) == ["Akbar ruled the Mughal empire."]
+        assert chunks.page_ids.tolist() == [2]
+        
+        # Once the whole document has been extracted, selections reuse its pages
+        processor.extract_text_chunks(path)
+        monkeypatch.setattr(processor, 'extract_clean_pages', lambda *args: pytest.fail("extracted again"))
+        selected = processor.extract_text_chunks(path, pages=[1])
+        assert list(selected) == ["The Ganga flows east."]
+        assert selected.page_ids.tolist() == [1]
@@ -0,0 +1,161 @@
+"""
+Tests for cross-document corpora.
+"""
+import pytest
+import pdf_processor
+from corpus import Corpus, validate_corpus_name
+from document_cache import DocumentCache
+
+DOCUMENTS = {
+    'geography.pdf': [
+        "The monsoon brings heavy rainfall to India between June and September.",
+        "Rivers such as the Ganga depend on monsoon rains and Himalayan snow."
+    ],
+    'biology.pdf': [
+        "Photosynthesis converts sunlight, water and carbon dioxide into glucose.",
+        "Chlorophyll absorbs sunlight in the leaves of green plants."
+    ],
+    'history.pdf': [
+        "The Mughal emperor Akbar expanded the empire across northern India."
+    ]
+}
+
+
+@pytest.fixture
+def extractions(monkeypatch):
+    """Serve fixed chunks per file name and record which files were extracted."""
+    calls = []
+    
+    def fake_extract(pdf_path, *args):
+        calls.append(pdf_path)
+        return list(DOCUMENTS.get(pdf_path.rsplit('/', 1)[-1], []))
+    
+    monkeypatch.setattr(pdf_processor.pdf_processor, 'extract_text_chunks', fake_extract)
+    return calls
+
+
+@pytest.fixture
+def pdfs(tmp_path):
+    """Write one small distinct file per document."""
+    paths = {}
+    for filename in list(DOCUMENTS) + ['empty.pdf']:
+        path = tmp_path / filename
+        path.write_bytes(f"%PDF-1.4 {filename}".encode())
+        paths[filename] = str(path)
+    return paths
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    return Corpus('course-101', root=str(tmp_path / 'corpora'), cache=DocumentCache(str(tmp_path / 'cache')))
+
+
+class TestCorpus:
+    """Test document registration and corpus-wide search."""
+    
+    def test_validate_corpus_name(self):
+        """Test that only simple names are accepted."""
+        assert validate_corpus_name('course-101_a')
+        assert not validate_corpus_name('')
+        assert not validate_corpus_name('../etc')
+        assert not validate_corpus_name('a/b')
+        with pytest.raises(ValueError):
+            Corpus('../escape')
+    
+    def test_search_spans_documents(self, corpus, pdfs, extractions):
+        """Test that the best chunks are returned across all documents."""
+        for filename in DOCUMENTS:
+            corpus.add_document(pdfs[filename], filename=filename)
+        
+        hits = corpus.search("monsoon rainfall", top_n=2)
+        assert [text for _, _, text in hits] == DOCUMENTS['geography.pdf']
+        
+        hits = corpus.search("sunlight", top_n=5)
+        assert {text for _, _, text in hits} == set(DOCUMENTS['biology.pdf'])
+        
+        hits = corpus.search("India", top_n=5)
+        texts = {text for _, _, text in hits}
+        assert DOCUMENTS['history.pdf'][0] in texts
+        assert DOCUMENTS['geography.pdf'][0] in texts
+    
+    def test_remove_document(self, corpus, pdfs, extractions):
+        """Test that removed documents no longer appear in results."""
+        entries = [corpus.add_document(pdfs[filename]) for filename in DOCUMENTS]
+        geography_id = entries[0]['document_id']
+        
+        assert corpus.remove_document(geography_id)
+        assert not corpus.remove_document(geography_id)
+        assert geography_id not in corpus.documents()
+        assert corpus.search("monsoon", top_n=5) == []
+    
+    def test_documents_are_indexed_once(self, corpus, tmp_path, pdfs, extractions):
+        """Test that re-adding a document, even to another corpus, reuses its index."""
+        corpus.add_document(pdfs['geography.pdf'])
+        corpus.add_document(pdfs['geography.pdf'])
+        other = Corpus('course-102', root=str(tmp_path / 'corpora'), cache=corpus.cache)
+        other.add_document(pdfs['geography.pdf'])
+        
+        assert len(extractions) == 1
+        assert len(corpus.documents()) == 1
+        assert other.search("Ganga", top_n=1)[0][2] == DOCUMENTS['geography.pdf'][1]
+    
+    def test_changes_are_visible_to_other_instances(self, corpus, tmp_path, pdfs, extractions):
+        """Test that another worker's view picks up added documents."""
+        reader = Corpus('course-101', root=str(tmp_path / 'corpora'), cache=corpus.cache)
+        assert reader.search("Akbar") == []
+        
+        corpus.add_document(pdfs['history.pdf'])
+        assert reader.search("Akbar", top_n=1)[0][2] == DOCUMENTS['history.pdf'][0]
+    
+    def test_empty_document_is_not_added(self, corpus, pdfs, extractions):
+        """Test that documents without text are rejected."""
+        assert corpus.add_document(pdfs['empty.pdf']) is None
+        assert corpus.documents() == {}
+    
+    def test_documents_use_their_language_extractor(self, corpus, pdfs, extractions, monkeypatch):
+        """Test that a document is chunked by the generator of its language."""
+        from languages.hindi import HindiQuestionGenerator
+        
+        hindi_pages = ["भारत में मानसून जून से सितंबर तक भारी वर्षा लाता है।"]
+        monkeypatch.setattr(HindiQuestionGenerator, 'extract_pages_from_pdf', lambda self, pdf_path: hindi_pages)
+        
+        entry = corpus.add_document(pdfs['geography.pdf'], language='hindi')
+        assert extractions == []
+        assert entry['language'] == 'hindi'
+        assert corpus.search("मानसून", top_n=1)[0][2] == hindi_pages[0]
+        
+        # The English chunks of the same file are cached separately
+        corpus.add_document(pdfs['geography.pdf'], language='english')
+        assert len(extractions) == 1
+        assert corpus.search("Ganga", top_n=1)[0][2] == DOCUMENTS['geography.pdf'][1]
+        
+        with pytest.raises(ValueError):
+            corpus.add_document(pdfs['history.pdf'], language='klingon')
+
+
+class TestCorpusRoutes:
+    """Test that corpus changes need the admin token."""
+    
+    def test_changes_require_admin_token(self, monkeypatch):
+        """Test that adding or removing documents is refused without the token."""
+        import app as app_module
+        
+        client = app_module.app.test_client()
+        monkeypatch.setitem(app_module.app.config, 'ADMIN_TOKEN', None)
+        assert client.delete('/corpus/physics/documents/abc').status_code == 403
+        
+        monkeypatch.setitem(app_module.app.config, 'ADMIN_TOKEN', 'secret')
+        assert client.post('/corpus/physics/documents').status_code == 403
+        assert client.delete('/corpus/physics/documents/abc', headers={'X-Admin-Token': 'wrong'}).status_code == 403
+        
+        removed = []
+        
+        class FakeCorpus:
+            def remove_document(self, document_id):
+                removed.append(document_id)
+                return True
+        
+        monkeypatch.setattr(app_module, 'get_corpus', lambda name: FakeCorpus())
+        response = client.delete('/corpus/physics/documents/abc', headers={'X-Admin-Token': 'secret'})
+        assert response.status_code == 200
+        assert removed == ['abc']
@@ -0,0 +1,102 @@
+"""
+Tests for near-duplicate question detection.
+"""
+import pytest
+from dedup import (
+    NearDuplicateFilter,
+    grapheme_clusters,
+    normalize_for_comparison,
+    remove_near_duplicates,
+    shingles
+)
+from question_cache import QuestionCache
+from question_generator import QuestionGenerator
+
+
+class TestNormalization:
+    """Test text preparation for similarity comparison."""
+    
+    def test_normalize_strips_case_and_punctuation(self):
+        """Test that case, punctuation and spacing are ignored."""
+        assert normalize_for_comparison("What  is the Monsoon?") == "what is the monsoon"
+    
+    def test_devanagari_clusters_keep_marks(self):
+        """Test that vowel signs and conjuncts stay with their consonant."""
+        assert grapheme_clusters("क्षेत्र") == ["क्षे", "त्र"]
+        assert grapheme_clusters("भारत") == ["भा", "र", "त"]
+    
+    def test_shingles_of_short_text(self):
+        """Test that texts shorter than the n-gram size form one shingle."""
+        assert shingles("ab", size=3) == {"ab"}
+        assert shingles("", size=3) == set()
+
+
+class TestNearDuplicateFilter:
+    """Test the incremental near-duplicate filter."""
+    
+    def test_exact_and_near_duplicates_are_dropped(self):
+        """Test that rephrasings differing by a word are dropped."""
+        near_duplicates = NearDuplicateFilter(threshold=0.7)
+        assert near_duplicates.add("What causes the monsoon rains in India?")
+        assert not near_duplicates.add("what causes the monsoon rains in India")
+        assert not near_duplicates.add("What causes the monsoon rain in India?")
+        assert near_duplicates.add("Who founded the Mughal empire?")
+        assert near_duplicates.kept == [
+            "What causes the monsoon rains in India?",
+            "Who founded the Mughal empire?"
+        ]
+        assert near_duplicates.dropped == 2
+    
+    def test_devanagari_near_duplicates(self):
+        """Test that Devanagari questions differing by a matra are dropped."""
+        questions = [
+            "भारत की राजधानी क्या है?",
+            "भारत की राजधानि क्या है?",
+            "गंगा नदी कहाँ से निकलती है?"
+        ]
+        assert remove_near_duplicates(questions, threshold=0.7) == [questions[0], questions[2]]
+    
+    def test_threshold_one_only_drops_exact_duplicates(self):
+        """Test that a threshold of 1.0 keeps near-duplicates."""
+        questions = [
+            "What causes the monsoon rains in India?",
+            "What causes the monsoon rain in India?",
+            "What causes the monsoon rains in India?"
+        ]
+        assert remove_near_duplicates(questions, threshold=1.0) == questions[:2]
+    
+    @pytest.mark.parametrize('threshold', [0.5, 0.7, 0.9])
+    def test_distinct_questions_are_kept(self, threshold):
+        """Test that unrelated questions are never dropped."""
+        questions = [
+            "What is photosynthesis?",
+            "Who was the emperor Akbar?",
+            "Where does the Ganga river begin?",
+            "When does the monsoon reach Kerala?"
+        ]
+        assert remove_near_duplicates(questions, threshold=threshold) == questions
+
+
+class TestGenerationLoop:
+    """Test near-duplicate filtering inside the chunk generation loop."""
+    
+    def test_early_stop_counts_distinct_questions(self):
+        """Test that near-duplicates do not count towards the requested total."""
+        calls = []
+        
+        def fake_pipeline(text, num_return_sequences=1, **kwargs):
+            calls.append(text)
+            topic = text.rsplit(':', 1)[-1].strip()
+            return [
+                {'generated_text': f"What is known about {topic}?"},
+                {'generated_text': f"What is known about the {topic}?"}
+            ]
+        
+        generator = QuestionGenerator()
+        generator._pipeline = fake_pipeline
+        generator.question_cache = QuestionCache(enabled=False)
+        chunks = ["the monsoon", "the Ganga river", "the Mughal empire", "photosynthesis"]
+        
+        questions = generator.generate_questions_from_chunks(chunks, total_questions=2, questions_per_chunk=2)
+        assert questions == ["What is known about the monsoon?", "What is known about the Ganga river?"]
+        assert len(calls) == 2
@@ -0,0 +1,182 @@
+"""
+Tests for uploaded documents and their background preparation.
+"""
+import threading
+import pytest
+import documents
+from config import Config
+from document_cache import document_cache
+
+
+class FakeGenerator:
+    """Language generator stand-in whose preparation can be held back."""
+    
+    def __init__(self):
+        self.release = threading.Event()
+        self.prepared = []
+    
+    def prepare(self, pdf_path, document_id=None):
+        self.release.wait(5)
+        self.prepared.append((pdf_path, document_id))
+        return 3
+
+
+@pytest.fixture
+def upload(tmp_path, monkeypatch):
+    """Point uploads and the document cache at a temporary directory."""
+    monkeypatch.setattr(Config, 'UPLOAD_FOLDER', str(tmp_path / 'uploads'))
+    monkeypatch.setattr(document_cache, 'root', str(tmp_path / 'cache'))
+    (tmp_path / 'uploads').mkdir()
+    path = tmp_path / 'uploads' / 'lecture.pdf'
+    path.write_bytes(b"%PDF-1.4 lecture")
+    return str(path)
+
+
+class TestDocuments:
+    """Test storing uploads and preparing them in the background."""
+    
+    def test_store_upload_is_content_addressed(self, upload):
+        """Test that uploads are renamed to their document id."""
+        document_id = documents.store_upload(upload)
+        assert documents.validate_document_id(document_id)
+        assert documents.document_path(document_id).endswith(f"{document_id}.pdf")
+        assert documents.document_status(document_id)['state'] == 'uploaded'
+    
+    def test_unknown_or_malformed_ids(self, upload):
+        """Test that only stored, well-formed ids resolve."""
+        assert documents.document_path('../../etc/passwd') is None
+        assert documents.document_path('0' * 64) is None
+        assert documents.document_status('0' * 64) is None
+    
+    def test_background_preparation(self, upload):
+        """Test the preparation lifecycle and waiting for it."""
+        document_id = documents.store_upload(upload)
+        generator = FakeGenerator()
+        
+        job = documents.prepare_in_background(document_id, 'english', generator)
+        assert documents.prepare_in_background(document_id, 'english', generator) is job
+        assert not documents.wait_until_prepared(document_id, timeout=0.05)
+        
+        generator.release.set()
+        assert documents.wait_until_prepared(document_id, timeout=5)
+        assert job.result() == 3
+        assert generator.prepared == [(documents.document_path(document_id), document_id)]
+        
+        status = documents.document_status(document_id)
+        assert status['state'] == 'ready'
+        assert status['language'] == 'english'
+    
+    def test_failed_preparation(self, upload):
+        """Test that a failing preparation is reported."""
+        class BrokenGenerator:
+            def prepare(self, pdf_path, document_id=None):
+                raise RuntimeError("broken PDF")
+        
+        document_id = documents.store_upload(upload)
+        job = documents.prepare_in_background(document_id, 'hindi', BrokenGenerator())
+        with pytest.raises(RuntimeError):
+            job.result(timeout=5)
+        assert documents.document_status(document_id)['state'] == 'failed'
+    
+    def test_expire_documents(self, upload, monkeypatch):
+        """Test that documents unused for the TTL are deleted, used ones kept."""
+        import os
+        import time
+        
+        monkeypatch.setattr(Config, 'DOCUMENT_TTL_HOURS', 1)
+        document_id = documents.store_upload(upload)
+        path = documents.document_path(document_id)
+        stale = os.path.join(Config.UPLOAD_FOLDER, 'abandoned.pdf')
+        open(stale, 'wb').close()
+        old = time.time() - 7200
+        os.utime(path, (old, old))
+        os.utime(stale, (old, old))
+        
+        documents.touch_document(document_id)
+        assert documents.expire_documents(force=True) == 1
+        assert documents.document_path(document_id) == path
+        assert not os.path.exists(stale)
+        
+        os.utime(path, (old, old))
+        assert documents.expire_documents() == 0
+        assert documents.expire_documents(force=True) == 1
+        assert documents.document_path(document_id) is None
+        
+        monkeypatch.setattr(Config, 'DOCUMENT_TTL_HOURS', 0)
+        assert documents.expire_documents(force=True) == 0
+    
+    def test_expire_documents_removes_cached_artefacts(self, upload, monkeypatch):
+        """Test that an expired document's cache directory goes with it."""
+        import os
+        import time
+        
+        monkeypatch.setattr(Config, 'DOCUMENT_TTL_HOURS', 1)
+        document_id = documents.store_upload(upload)
+        cache_dir = document_cache.document_dir(document_id)
+        for name in ('chunks-500-n2.npz', 'embeddings-model-abc.npy', documents.STATUS_NAME):
+            open(os.path.join(cache_dir, name), 'wb').close()
+        one_shot_dir = document_cache.document_dir('b' * 64)
+        open(os.path.join(one_shot_dir, 'chunks-500-n2.npz'), 'wb').close()
+        open(os.path.join(one_shot_dir, 'corpus-chunks-english.npz'), 'wb').close()
+        
+        old = time.time() - 7200
+        for path in [documents.document_path(document_id), one_shot_dir, cache_dir] + [
+            os.path.join(directory, name)
+            for directory in (cache_dir, one_shot_dir) for name in os.listdir(directory)
+        ]:
+            os.utime(path, (old, old))
+        
+        assert documents.expire_documents(force=True) == 1
+        assert not os.path.exists(cache_dir)
+        assert os.listdir(one_shot_dir) == ['corpus-chunks-english.npz']
+    
+    def test_process_keeps_stored_document(self, upload, monkeypatch):
+        """Test that /process deletes one-shot uploads but not stored documents."""
+        import io
+        import os
+        fitz = pytest.importorskip('fitz')
+        import app as app_module
+        from question_bank import QuestionBank
+        
+        monkeypatch.setattr(app_module, 'question_bank', QuestionBank(enabled=False))
+        monkeypatch.setattr(
+            app_module, 'generate_questions_for_language',
+            lambda *args, **kwargs: ["What do plants make from light?"]
+        )
+        pdf = fitz.open()
+        pdf.new_page().insert_text((72, 72), "Plants make food from light.")
+        data = pdf.tobytes()
+        with open(upload, 'wb') as fh:
+            fh.write(data)
+        document_id = documents.store_upload(upload)
+        
+        client = app_module.app.test_client()
+        with client.session_transaction() as session:
+            session['language'] = 'english'
+        response = client.post('/process', data={'prompt': 'plants', 'document_id': document_id})
+        assert response.status_code == 200
+        assert documents.document_path(document_id) is not None
+        
+        response = client.post('/process', data={
+            'prompt': 'plants',
+            'file': (io.BytesIO(data), 'lecture.pdf')
+        }, content_type='multipart/form-data')
+        assert response.status_code == 200
+        assert os.listdir(Config.UPLOAD_FOLDER) == [f"{document_id}.pdf"]
+    
+    def test_pregeneration_is_queued_once_outside_preparation(self, monkeypatch):
+        """Test that preparing a document queues pre-generation once and does not run it."""
+        import background
+        from languages import english
+        
+        queued = []
+        monkeypatch.setattr(Config, 'PREGENERATE_QUESTIONS', True)
+        monkeypatch.setattr(english, 'extract_clean_text_chunks_from_pdf', lambda path, pages=None: ["chunk"])
+        monkeypatch.setattr(english.core_question_generator.retriever, 'prepare', lambda chunks, document_id: None)
+        monkeypatch.setattr(english.core_question_generator, 'pregenerate', lambda chunks: pytest.fail("ran inline"))
+        monkeypatch.setattr(background, 'submit_to', lambda pool, name, fn, *args: queued.append((pool, args)))
+        
+        generator = english.EnglishQuestionGenerator()
+        assert generator.prepare('doc.pdf', document_id='a' * 64) == 1
+        assert generator.prepare('doc.pdf', document_id='a' * 64) == 1
+        assert queued == [(background.PREGENERATE_POOL, (["chunk"],))]
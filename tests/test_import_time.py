@@ -0,0 +1,48 @@
+"""
+Import-time checks: importing the app must not pull in heavy dependencies.
+"""
+import sys
+import subprocess
+import pytest
+from benchmarks.bench_import_time import ROOT, measure_import_times
+
+HEAVY_MODULES = ('torch', 'transformers', 'sklearn', 'pandas', 'googletrans', 'pdfplumber', 'fitz', 'tqdm')
+
+# Generous enough for slow CI machines; the heavy imports alone cost seconds
+IMPORT_TIME_BUDGET_MS = 1500
+
+
+def _loaded_heavy_modules(statement: str) -> list:
+    code = (
+        f"{statement}\n"
+        "import sys\n"
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    result = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, check=True)
+    output = result.stdout.strip().splitlines()
+    return [m for m in output[-1].split(',') if m] if output else []
+
+
+class TestImportTime:
+    """Track the cold-start cost of importing the application."""
+    
+    def test_app_import_skips_heavy_dependencies(self):
+        """Test that importing the app defers ML and PDF libraries."""
+        assert _loaded_heavy_modules("import app") == []
+    
+    def test_app_import_within_budget(self):
+        """Test that importing the app stays within the time budget."""
+        times = measure_import_times("import app")
+        assert times['app'] / 1000 < IMPORT_TIME_BUDGET_MS
+    
+    def test_hindi_generation_does_not_load_torch(self):
+        """Test that the Hindi rule engine works without loading ML libraries."""
+        statement = (
+            "import app\n"
+            "generator = app.get_language_generator('hindi')\n"
+            "generator.process_sentences(generator.split_text_into_sentences('राम ने पुस्तक पढ़ी। सीता घर गई।'))"
+        )
+        loaded = _loaded_heavy_modules(statement)
+        assert 'torch' not in loaded
+        assert 'transformers' not in loaded
+        assert 'sklearn' not in loaded
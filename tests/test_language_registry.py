@@ -0,0 +1,84 @@
+"""
+Tests for the language generator registry.
+"""
+import pytest
+
+from config import Config
+from languages import registry
+from utils import validate_language, get_language_code
+
+
+@pytest.fixture
+def isolated_registry(monkeypatch):
+    """Give each test its own copy of the registry."""
+    monkeypatch.setattr(registry, '_specs', dict(registry.registered_languages()))
+    monkeypatch.setattr(registry, '_generators', {})
+    monkeypatch.setattr(Config, 'ENABLED_LANGUAGES', [])
+    return registry
+
+
+class TestLanguageRegistry:
+    """Test registration, filtering and lazy instantiation."""
+    
+    def test_builtin_languages_registered(self, isolated_registry):
+        """Test that the shipped languages are registered with their codes."""
+        specs = isolated_registry.available_languages()
+        assert list(specs) == ['english', 'hindi', 'sanskrit']
+        assert specs['hindi'].code == 'hi'
+        assert 'torch' not in specs['hindi'].requires
+    
+    def test_register_new_language(self, isolated_registry):
+        """Test that a decorated class becomes available without other changes."""
+        @isolated_registry.register_language('Marathi', 'mr', capabilities=('rules',))
+        class MarathiQuestionGenerator:
+            pass
+        
+        spec = isolated_registry.get_language_spec('MARATHI')
+        assert spec.factory is MarathiQuestionGenerator
+        assert spec.display_name == 'Marathi'
+        assert validate_language('marathi') is True
+        assert get_language_code('marathi') == 'mr'
+    
+    def test_enabled_languages_filter(self, isolated_registry, monkeypatch):
+        """Test that ENABLED_LANGUAGES restricts the served languages."""
+        monkeypatch.setattr(Config, 'ENABLED_LANGUAGES', ['hindi'])
+        assert list(isolated_registry.available_languages()) == ['hindi']
+        assert validate_language('english') is False
+        assert isolated_registry.get_language_generator('english') is None
+    
+    def test_generator_created_once(self, isolated_registry):
+        """Test that the generator is created on first use and then reused."""
+        created = []
+        
+        @isolated_registry.register_language('tamil', 'ta')
+        class TamilQuestionGenerator:
+            def __init__(self):
+                created.append(self)
+        
+        assert created == []
+        first = isolated_registry.get_language_generator('tamil')
+        second = isolated_registry.get_language_generator('Tamil')
+        assert first is second
+        assert len(created) == 1
+    
+    def test_missing_dependencies(self, isolated_registry):
+        """Test reporting of packages a language needs but cannot import."""
+        @isolated_registry.register_language('test', 'xx', requires=('json', 'no_such_package_xyz'))
+        class TestQuestionGenerator:
+            pass
+        
+        spec = isolated_registry.get_language_spec('test')
+        assert spec.missing_dependencies() == ['no_such_package_xyz']
+        assert spec.to_dict()['missing_dependencies'] == ['no_such_package_xyz']
+    
+    def test_legacy_globals_share_registry_instance(self, isolated_registry):
+        """Test that the legacy module globals are the registry's generators."""
+        from languages import english, hindi, sanskrit
+        
+        assert 'hindi_generator' not in vars(hindi)
+        assert hindi.hindi_generator is isolated_registry.get_language_generator('hindi')
+        assert hindi.hindi_generator is hindi.hindi_generator
+        assert english.english_generator is isolated_registry.get_language_generator('english')
+        assert sanskrit.sanskrit_generator is isolated_registry.get_language_generator('sanskrit')
+        with pytest.raises(AttributeError):
+            hindi.no_such_generator
@@ -0,0 +1,66 @@
+"""
+Tests for the startup lifecycle and readiness state.
+"""
+import importlib
+import pytest
+import lifecycle
+from config import Config
+
+
+@pytest.fixture
+def fresh_lifecycle():
+    """Provide a lifecycle module with a clean state."""
+    return importlib.reload(lifecycle)
+
+
+class WarmGenerator:
+    def __init__(self):
+        self.calls = 0
+    
+    def warm_up(self):
+        self.calls += 1
+
+
+class BrokenGenerator:
+    def warm_up(self):
+        raise RuntimeError("model missing")
+
+
+class TestLifecycle:
+    """Test lifecycle transitions."""
+    
+    def test_not_ready_until_warmed_up(self, fresh_lifecycle, monkeypatch):
+        """Test that loading alone does not make the process ready."""
+        monkeypatch.setattr(Config, 'WARMUP_ENABLED', True)
+        fresh_lifecycle.mark_models_loaded()
+        assert fresh_lifecycle.is_ready() is False
+        assert fresh_lifecycle.readiness()['status'] == fresh_lifecycle.LOADED
+        
+        generator = WarmGenerator()
+        assert fresh_lifecycle.warm_up({'english': generator, 'hindi': object()}) is True
+        assert fresh_lifecycle.is_ready() is True
+        assert generator.calls == 1
+        assert 'english' in fresh_lifecycle.readiness()['warm_up_seconds']
+    
+    def test_warm_up_runs_once(self, fresh_lifecycle, monkeypatch):
+        """Test that a ready process does not warm up again."""
+        monkeypatch.setattr(Config, 'WARMUP_ENABLED', True)
+        generator = WarmGenerator()
+        fresh_lifecycle.warm_up({'english': generator})
+        fresh_lifecycle.warm_up({'english': generator})
+        assert generator.calls == 1
+    
+    def test_failed_warm_up(self, fresh_lifecycle, monkeypatch):
+        """Test that a failing warm-up reports the error and stays not ready."""
+        monkeypatch.setattr(Config, 'WARMUP_ENABLED', True)
+        assert fresh_lifecycle.warm_up({'english': BrokenGenerator()}) is False
+        state = fresh_lifecycle.readiness()
+        assert state['status'] == fresh_lifecycle.FAILED
+        assert 'model missing' in state['error']
+    
+    def test_warm_up_disabled(self, fresh_lifecycle, monkeypatch):
+        """Test that disabling warm-up marks the process ready directly."""
+        monkeypatch.setattr(Config, 'WARMUP_ENABLED', False)
+        generator = WarmGenerator()
+        assert fresh_lifecycle.warm_up({'english': generator}) is True
+        assert generator.calls == 0
@@ -0,0 +1,79 @@
+"""
+Tests for memory accounting.
+"""
+import sys
+import logging
+import tracemalloc
+import pytest
+import memory
+from config import Config
+from metrics import timed
+
+
+class TestRequestMemory:
+    """Test per-request peak RSS measurement."""
+    
+    def test_rss_is_reported(self):
+        """Test that the current RSS is known on supported platforms."""
+        assert memory.current_rss() > 0
+        assert memory.peak_rss() >= memory.current_rss() or not sys.platform.startswith('linux')
+    
+    @pytest.mark.skipif(not memory.reset_peak_rss(), reason="needs /proc/self/clear_refs")
+    def test_peak_covers_allocations_inside_the_request(self):
+        """Test that memory freed before the request ends still counts."""
+        with memory.RequestMemory('english') as measured:
+            block = bytearray(64 * memory.MB)
+            block[::4096] = b'x' * len(block[::4096])
+            del block
+        assert measured.peak - measured.start_rss >= 48 * memory.MB
+        assert measured.end_rss < measured.peak
+    
+    def test_peak_is_reset_only_when_no_request_is_in_flight(self, monkeypatch):
+        """Test that an overlapping request does not reset the mark under another."""
+        resets = []
+        monkeypatch.setattr(memory, 'reset_peak_rss', lambda: resets.append(1) or True)
+        
+        with memory.RequestMemory('english'):
+            with memory.RequestMemory('hindi') as inner:
+                pass
+            assert inner._peak_reset
+            assert len(resets) == 1
+        with memory.RequestMemory('english'):
+            pass
+        assert len(resets) == 2
+        assert memory._in_flight == 0
+    
+    def test_should_recycle(self, monkeypatch):
+        """Test the worker recycling threshold."""
+        monkeypatch.setattr(Config, 'WORKER_MAX_RSS_MB', 0)
+        assert not memory.should_recycle(10 ** 12)
+        monkeypatch.setattr(Config, 'WORKER_MAX_RSS_MB', 512)
+        assert not memory.should_recycle(256 * memory.MB)
+        assert memory.should_recycle(600 * memory.MB)
+
+
+class TestStageMemoryTrace:
+    """Test tracemalloc snapshots around timed stages."""
+    
+    def test_stage_growth_is_logged(self, monkeypatch, caplog):
+        """Test that the allocating line of a stage is reported."""
+        monkeypatch.setattr(Config, 'MEMORY_TRACE_STAGES', True)
+        was_tracing = tracemalloc.is_tracing()
+        retained = []
+        try:
+            with caplog.at_level(logging.INFO, logger='memory'):
+                with timed('test_stage'):
+                    retained.append([str(i) * 10 for i in range(20000)])
+        finally:
+            if not was_tracing:
+                tracemalloc.stop()
+        message = next(record.getMessage() for record in caplog.records if 'test_stage' in record.getMessage())
+        assert 'test_memory.py' in message
+        assert 'no growth' not in message
+    
+    def test_disabled_by_default(self, monkeypatch):
+        """Test that stages are not traced unless enabled."""
+        monkeypatch.setattr(Config, 'MEMORY_TRACE_STAGES', False)
+        with timed('test_stage') as timer:
+            pass
+        assert timer._memory is None
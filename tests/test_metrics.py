@@ -0,0 +1,61 @@
+"""
+Tests for instrumentation helpers.
+"""
+import pytest
+from prometheus_client import REGISTRY
+from metrics import timed, count_questions, generate_metrics
+
+
+def _sample(name, labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+class TestStageTimer:
+    """Test stage timers."""
+    
+    def test_context_manager_observes_duration(self):
+        """Test that a timed block records one observation."""
+        before = _sample('qg_stage_duration_seconds_count', {'stage': 'test_ctx'})
+        with timed('test_ctx') as timer:
+            pass
+        after = _sample('qg_stage_duration_seconds_count', {'stage': 'test_ctx'})
+        assert after == before + 1
+        assert timer.elapsed >= 0
+    
+    def test_decorator_observes_each_call(self):
+        """Test that a decorated function records every call."""
+        @timed('test_decorator')
+        def work(value):
+            return value * 2
+        
+        before = _sample('qg_stage_duration_seconds_count', {'stage': 'test_decorator'})
+        assert work(2) == 4
+        assert work(3) == 6
+        after = _sample('qg_stage_duration_seconds_count', {'stage': 'test_decorator'})
+        assert after == before + 2
+    
+    def test_errors_are_counted_and_reraised(self):
+        """Test that exceptions propagate and increment the error counter."""
+        before = _sample('qg_stage_errors_total', {'stage': 'test_error'})
+        with pytest.raises(ValueError):
+            with timed('test_error'):
+                raise ValueError("boom")
+        assert _sample('qg_stage_errors_total', {'stage': 'test_error'}) == before + 1
+
+
+class TestCounters:
+    """Test question counters and exposition."""
+    
+    def test_count_questions(self):
+        """Test kept and sanitized outcomes are recorded separately."""
+        labels = {'source': 'test', 'outcome': 'kept'}
+        before = _sample('qg_questions_total', labels)
+        count_questions('test', kept=3, sanitized=2)
+        assert _sample('qg_questions_total', labels) == before + 3
+        assert _sample('qg_questions_total', {'source': 'test', 'outcome': 'sanitized'}) >= 2
+    
+    def test_generate_metrics(self):
+        """Test the exposition contains the pipeline metrics."""
+        body, content_type = generate_metrics()
+        assert b'qg_stage_duration_seconds' in body
+        assert content_type.startswith('text/plain')
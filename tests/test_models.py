@@ -0,0 +1,80 @@
+"""
+Tests for the CPU thread policy and the stub generation backend.
+"""
+import pytest
+import models
+from config import Config
+
+
+@pytest.fixture
+def eight_cores(monkeypatch):
+    """Pretend the machine has eight cores and no overrides are configured."""
+    monkeypatch.setattr(models, 'available_cores', lambda: list(range(8)))
+    monkeypatch.setattr(Config, 'TORCH_INTRA_OP_THREADS', 0)
+    monkeypatch.setattr(Config, 'TORCH_INTER_OP_THREADS', 0)
+    monkeypatch.setattr(Config, 'TORCH_PIN_CORES', False)
+
+
+class TestCpuThreadPolicy:
+    """Test thread policy derivation."""
+    
+    def test_splits_cores_between_workers(self, eight_cores):
+        """Test that each worker gets its share of the cores."""
+        policy = models.cpu_thread_policy(workers=4)
+        assert policy['intra_op_threads'] == 2
+        assert policy['inter_op_threads'] == 1
+        assert policy['cores'] == []
+    
+    def test_at_least_one_thread(self, eight_cores):
+        """Test that more workers than cores still get one thread each."""
+        assert models.cpu_thread_policy(workers=16)['intra_op_threads'] == 1
+    
+    def test_overrides(self, eight_cores, monkeypatch):
+        """Test explicit thread counts from the configuration."""
+        monkeypatch.setattr(Config, 'TORCH_INTRA_OP_THREADS', 3)
+        monkeypatch.setattr(Config, 'TORCH_INTER_OP_THREADS', 2)
+        policy = models.cpu_thread_policy(workers=4)
+        assert policy['intra_op_threads'] == 3
+        assert policy['inter_op_threads'] == 2
+    
+    def test_gunicorn_uses_the_same_worker_count(self):
+        """Test that gunicorn starts as many workers as the policy divides cores by."""
+        import os
+        import runpy
+        
+        settings = runpy.run_path(os.path.join(os.path.dirname(models.__file__), 'gunicorn.conf.py'))
+        assert settings['workers'] == Config.WEB_CONCURRENCY
+    
+    def test_pinning_gives_disjoint_cores(self, eight_cores, monkeypatch):
+        """Test that pinned workers do not share cores."""
+        monkeypatch.setattr(Config, 'TORCH_PIN_CORES', True)
+        slots = [models.cpu_thread_policy(worker_slot=i, workers=4)['cores'] for i in range(4)]
+        assert slots[0] == [0, 1]
+        assert slots[3] == [6, 7]
+        assert len({core for cores in slots for core in cores}) == 8
+
+
+class TestStubPipeline:
+    """Test the deterministic stand-in for the generation pipeline."""
+    
+    def test_deterministic_questions(self):
+        """Test that equal inputs give equal, distinct questions."""
+        stub = models.StubPipeline(latency_ms=0)
+        text = "Generate a question about: Photosynthesis happens in chloroplasts of green leaves."
+        first = stub(text, num_return_sequences=3, num_beams=5)
+        assert first == stub(text, num_return_sequences=3)
+        assert len({output['generated_text'] for output in first}) == 3
+        assert all(output['generated_text'].endswith('?') for output in first)
+    
+    def test_batch_output_shape(self):
+        """Test that batches are shaped like the Hugging Face pipeline's output."""
+        stub = models.StubPipeline(latency_ms=0)
+        single = stub(["Generate a question about: rivers", "Generate a question about: mountains"])
+        assert all(isinstance(output, dict) for output in single)
+        several = stub(["Generate a question about: rivers"], num_return_sequences=2)
+        assert len(several[0]) == 2
+    
+    def test_selected_by_config(self, monkeypatch):
+        """Test that the stub backend loads without transformers."""
+        monkeypatch.setattr(Config, 'GENERATION_BACKEND', 'stub')
+        assert isinstance(models.load_generation_pipeline(), models.StubPipeline)
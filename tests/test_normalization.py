@@ -0,0 +1,43 @@
+"""
+Tests for script-aware text normalization.
+"""
+import unicodedata
+from normalization import normalize_text, sentence_split_pattern
+from utils import clean_text
+
+
+class TestNormalization:
+    """Test normalization per language."""
+    
+    def test_urls_and_symbols(self):
+        """Test that URLs and unsupported characters are removed in one pass."""
+        assert normalize_text("  What is  http://x.org the «capital» of\nFrance? ", 'en') == "What is the capital of France?"
+        assert normalize_text("See index.html for more") == "See for more"
+        assert normalize_text("") == normalize_text(None) == ""
+    
+    def test_devanagari_marks_and_dandas(self):
+        """Test that matras, virama, nukta and dandas survive."""
+        text = "भारत एक विशाल देश है। गंगा पवित्र नदी है॥ क्षत्रिय ज़मीन"
+        assert normalize_text(text, 'hi') == text
+        assert normalize_text(text, 'sa') == text
+        assert normalize_text(text) == text
+        assert clean_text(text) == text
+    
+    def test_latin_whitelist(self):
+        """Test that English text keeps the original whitelist."""
+        assert normalize_text("Rama — the king। ok", 'en') == "Rama the king ok"
+    
+    def test_nfc(self):
+        """Test that decomposed text is composed."""
+        decomposed = unicodedata.normalize('NFD', "café")
+        assert normalize_text(decomposed, 'en') == "café"
+    
+    def test_sentence_split(self):
+        """Test that Hindi text splits at dandas but not at dots."""
+        text = normalize_text("राम ने रावण को मारा। डॉ. शर्मा दिल्ली में रहते हैं।\nसीता कौन थी?", 'hi')
+        assert sentence_split_pattern('hi').split(text) == [
+            "राम ने रावण को मारा।",
+            "डॉ. शर्मा दिल्ली में रहते हैं।",
+            "सीता कौन थी?"
+        ]
+        assert sentence_split_pattern('en').split("One. Two!") == ["One.", "Two!"]
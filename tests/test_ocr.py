@@ -0,0 +1,85 @@
+"""
+Tests for the OCR fallback on pages without a text layer.
+"""
+import pytest
+import ocr
+from config import Config
+from page_cache import page_cache
+
+fitz = pytest.importorskip('fitz')
+pytest.importorskip('PIL')
+
+
+def make_pdf(path, pages):
+    """Write a PDF with a text page for each string and a scanned page for each None."""
+    pdf = fitz.open()
+    for number, text in enumerate(pages):
+        page = pdf.new_page()
+        if text is None:
+            scan = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 60, 40), False)
+            scan.clear_with(100 + number)
+            page.insert_image(fitz.Rect(72, 72, 372, 272), pixmap=scan)
+        else:
+            page.insert_text((72, 72), text)
+    pdf.save(str(path))
+    return str(path)
+
+
+@pytest.fixture
+def tesseract(monkeypatch, tmp_path):
+    """Stand in for Tesseract and keep OCR in-process with a private page cache."""
+    calls = []
+    
+    def recognize(image, languages):
+        calls.append((image.size, languages))
+        return f"scanned page {len(calls)}"
+    
+    monkeypatch.setattr(ocr, 'ocr_languages', lambda: 'hin+san+eng')
+    monkeypatch.setattr(ocr, '_recognize', recognize)
+    monkeypatch.setattr(Config, 'OCR_ENABLED', True)
+    monkeypatch.setattr(Config, 'OCR_WORKERS', 1)
+    monkeypatch.setattr(Config, 'OCR_DPI', 144)
+    monkeypatch.setattr(page_cache, 'root', str(tmp_path / 'pages'))
+    return calls
+
+
+class TestOcr:
+    """Test which pages are OCR'd and that results are cached."""
+    
+    def test_only_pages_without_text(self, tmp_path, tesseract):
+        """Test that pages with text are left alone and scans are OCR'd once."""
+        path = make_pdf(tmp_path / 'book.pdf', ["Printed page.", None, None])
+        
+        texts = ocr.fill_empty_pages(path, ["Printed page", "", ""])
+        assert texts == ["Printed page", "scanned page 1", "scanned page 2"]
+        assert [languages for _, languages in tesseract] == ['hin+san+eng', 'hin+san+eng']
+        assert tesseract[0][0] == (1190, 1684)  # A4 at 144 dpi
+        
+        again = ocr.fill_empty_pages(path, ["Printed page", "", ""])
+        assert again == texts
+        assert len(tesseract) == 2
+    
+    def test_respects_page_selection(self, tmp_path, tesseract):
+        """Test that scanned pages outside the selection are not OCR'd."""
+        path = make_pdf(tmp_path / 'book.pdf', [None, None])
+        assert ocr.fill_empty_pages(path, ["", ""], pages=[1]) == ["", "scanned page 1"]
+        assert len(tesseract) == 1
+    
+    def test_unavailable(self, tmp_path, tesseract, monkeypatch):
+        """Test that pages stay empty when Tesseract is missing."""
+        monkeypatch.setattr(ocr, 'ocr_languages', lambda: '')
+        path = make_pdf(tmp_path / 'book.pdf', [None])
+        assert ocr.fill_empty_pages(path, [""]) == [""]
+        assert tesseract == []
+    
+    def test_has_text_layer(self, tmp_path):
+        """Test detection of fully scanned documents."""
+        assert not ocr.has_text_layer(make_pdf(tmp_path / 'scan.pdf', [None, None]))
+        assert ocr.has_text_layer(make_pdf(tmp_path / 'mixed.pdf', [None, "Printed page."]))
+    
+    def test_hindi_extraction_uses_ocr(self, tmp_path, tesseract):
+        """Test that the Hindi extractor falls back to OCR for scanned pages."""
+        from languages.hindi import hindi_generator
+        
+        path = make_pdf(tmp_path / 'book.pdf', [None])
+        assert hindi_generator.extract_text_from_pdf(path) == "scanned page 1"
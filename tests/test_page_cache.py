@@ -0,0 +1,90 @@
+"""
+Tests for the per-page extraction cache.
+"""
+import pytest
+from page_cache import PageCache, fingerprint_pages
+
+fitz = pytest.importorskip('fitz')
+
+
+def make_pdf(path, texts):
+    """Write a PDF with one page per text."""
+    pdf = fitz.open()
+    for text in texts:
+        pdf.new_page().insert_text((72, 72), text)
+    pdf.save(str(path))
+    return str(path)
+
+
+class RecordingExtractor:
+    """Extractor stand-in that records which pages it was asked for."""
+    
+    def __init__(self):
+        self.calls = []
+    
+    def __call__(self, pdf_path, pages):
+        page_count, _ = fingerprint_pages(pdf_path)
+        self.calls.append(sorted(pages))
+        return [f"page {number}" if number in pages else "" for number in range(page_count)]
+
+
+class TestPageCache:
+    """Test fingerprinting and incremental extraction."""
+    
+    def test_fingerprints_follow_content(self, tmp_path):
+        """Test that equal pages share fingerprints across documents."""
+        first = make_pdf(tmp_path / 'v1.pdf', ["Chapter one.", "Chapter two.", "Chapter three."])
+        second = make_pdf(tmp_path / 'v2.pdf', ["Chapter one.", "Chapter two, revised.", "Chapter three."])
+        count, old = fingerprint_pages(first)
+        _, new = fingerprint_pages(second, [0, 1, 2])
+        assert count == 3
+        assert old[0] == new[0] and old[2] == new[2]
+        assert old[1] != new[1]
+    
+    def test_revision_extracts_changed_pages_only(self, tmp_path):
+        """Test that a new edition only extracts the pages that changed."""
+        cache = PageCache(root=str(tmp_path / 'pages'), enabled=True)
+        extractor = RecordingExtractor()
+        first = make_pdf(tmp_path / 'v1.pdf', ["Chapter one.", "Chapter two.", "Chapter three."])
+        second = make_pdf(tmp_path / 'v2.pdf', ["Chapter one.", "Chapter two, revised.", "Chapter three."])
+        
+        assert cache.extract(first, None, 'text', extractor) == ["page 0", "page 1", "page 2"]
+        texts = cache.extract(second, None, 'text', extractor)
+        assert extractor.calls == [[0, 1, 2], [1]]
+        assert texts == ["page 0", "page 1", "page 2"]
+    
+    def test_selection_and_methods(self, tmp_path):
+        """Test that only selected pages are looked at and methods do not mix."""
+        cache = PageCache(root=str(tmp_path / 'pages'), enabled=True)
+        extractor = RecordingExtractor()
+        path = make_pdf(tmp_path / 'book.pdf', ["One.", "Two.", "Three."])
+        
+        assert cache.extract(path, [2], 'text', extractor) == ["", "", "page 2"]
+        cache.extract(path, [1, 2], 'text', extractor)
+        cache.extract(path, [2], 'pymupdf', extractor)
+        assert extractor.calls == [[2], [1], [2]]
+    
+    def test_disabled(self, tmp_path):
+        """Test that a disabled cache always extracts."""
+        cache = PageCache(root=str(tmp_path / 'pages'), enabled=False)
+        extractor = RecordingExtractor()
+        path = make_pdf(tmp_path / 'book.pdf', ["One.", "Two."])
+        cache.extract(path, [0, 1], 'text', extractor)
+        cache.extract(path, [0, 1], 'text', extractor)
+        assert extractor.calls == [[0, 1], [0, 1]]
+        assert not (tmp_path / 'pages').exists()
+    
+    def test_prunes_least_recently_used(self, tmp_path):
+        """Test that pages not read for longest are pruned beyond the size limit."""
+        import os
+        
+        cache = PageCache(root=str(tmp_path / 'pages'), enabled=True, max_mb=0, max_age_days=0)
+        for number in range(3):
+            cache.put(f"page{number}", 'text', "x" * 100)
+            os.utime(cache._path(f"page{number}", 'text'), (1000 + number, 1000 + number))
+        assert cache.get("page0", 'text') == "x" * 100
+        
+        cache.max_mb = 200 / 1024 ** 2
+        assert cache.prune() == 1
+        assert cache.get("page0", 'text') and cache.get("page2", 'text')
+        assert cache.get("page1", 'text') is None
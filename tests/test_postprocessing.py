@@ -0,0 +1,67 @@
+"""
+Tests for batch post-processing of generated questions.
+"""
+from config import Config
+from postprocessing import postprocess_questions, script_ratio
+
+
+class TestScriptRatio:
+    """Test script detection."""
+    
+    def test_script_ratio(self):
+        """Test the share of letters in a script."""
+        assert script_ratio("What is DNA?", 'latin') == 1.0
+        assert script_ratio("What is DNA?", 'devanagari') == 0.0
+        assert script_ratio("DNA क्या है?", 'devanagari') == 0.5
+        assert script_ratio("123 ?", 'latin') == 0.0
+
+
+class TestPostProcessing:
+    """Test filtering and deduplication of a batch."""
+    
+    def test_filters_and_counts(self):
+        """Test that short, generic and duplicate questions are dropped."""
+        result = postprocess_questions([
+            "What is the capital of France?",
+            "",
+            "What?",
+            "what is",
+            "What is the capital of France? ",
+            "Which river flows through Paris?"
+        ], language='en')
+        
+        assert result.questions == ["What is the capital of France?", "Which river flows through Paris?"]
+        assert result.rejected == 3
+        assert result.duplicates == 1
+    
+    def test_script_validation(self, monkeypatch):
+        """Test that questions must be written in the language's script."""
+        questions = ["गंगा किस राज्य में बहती है?", "Where does the Ganga flow?"]
+        
+        hindi = postprocess_questions(questions, language='hi', min_length=10)
+        assert hindi.questions == questions[:1]
+        assert hindi.rejected == 1
+        assert postprocess_questions(questions, language='en', min_length=10).questions == questions[1:]
+        assert postprocess_questions(questions, min_length=10).questions == questions
+        
+        monkeypatch.setattr(Config, 'QUESTION_MIN_SCRIPT_RATIO', 0.0)
+        assert postprocess_questions(questions, language='hi', min_length=10).questions == questions
+    
+    def test_duplicates_across_batches(self):
+        """Test that a shared set drops questions kept by an earlier batch."""
+        seen = set()
+        first = postprocess_questions(["Which gas do plants release?"], language='en', seen=seen)
+        second = postprocess_questions(["Which gas do plants release?", "Where is chlorophyll found?"], language='en', seen=seen)
+        
+        assert first.questions == ["Which gas do plants release?"]
+        assert second.questions == ["Where is chlorophyll found?"]
+        assert second.duplicates == 1
+    
+    def test_hindi_rules(self):
+        """Test that the rule-based Hindi path uses the batch post-processor."""
+        from languages.hindi import HindiQuestionGenerator
+        
+        sentences = ["राम ने रावण को मारा।", "राम ने रावण को मारा।", "यह एक वाक्य है"]
+        questions = HindiQuestionGenerator().process_sentences(sentences)
+        
+        assert questions == ["किसने रावण को मारा?"]
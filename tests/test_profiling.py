@@ -0,0 +1,67 @@
+"""
+Tests for the opt-in request profiler.
+"""
+import os
+import json
+import pytest
+from config import Config
+from profiling import RequestProfiler, should_profile
+
+
+class TestShouldProfile:
+    """Test the profiling decision."""
+    
+    def test_admin_header(self, monkeypatch):
+        """Test that the admin token enables profiling."""
+        monkeypatch.setattr(Config, 'PROFILE_ADMIN_TOKEN', 'secret')
+        monkeypatch.setattr(Config, 'PROFILE_SAMPLE_RATE', 0.0)
+        assert should_profile({Config.PROFILE_HEADER: 'secret'}) is True
+        assert should_profile({Config.PROFILE_HEADER: 'wrong'}) is False
+        assert should_profile({}) is False
+    
+    def test_header_ignored_without_token(self, monkeypatch):
+        """Test that the header does nothing when no token is configured."""
+        monkeypatch.setattr(Config, 'PROFILE_ADMIN_TOKEN', None)
+        monkeypatch.setattr(Config, 'PROFILE_SAMPLE_RATE', 0.0)
+        assert should_profile({Config.PROFILE_HEADER: ''}) is False
+    
+    def test_sample_rate(self, monkeypatch):
+        """Test that a sample rate of 1 profiles every request."""
+        monkeypatch.setattr(Config, 'PROFILE_ADMIN_TOKEN', None)
+        monkeypatch.setattr(Config, 'PROFILE_SAMPLE_RATE', 1.0)
+        assert should_profile({}) is True
+
+
+class TestRequestProfiler:
+    """Test profile storage and retention."""
+    
+    def test_disabled_profiler_saves_nothing(self, tmp_path):
+        """Test that a disabled profiler is a no-op."""
+        profiler = RequestProfiler(enabled=False, profile_dir=str(tmp_path))
+        with profiler:
+            sum(range(100))
+        assert profiler.save(document_hash='abc') is None
+        assert os.listdir(tmp_path) == []
+    
+    def test_saves_profile_and_metadata(self, tmp_path):
+        """Test that the profile and its metadata are written."""
+        profiler = RequestProfiler(profile_dir=str(tmp_path))
+        with profiler:
+            sum(range(1000))
+        path = profiler.save(document_hash='abc', language='english')
+        assert path and os.path.exists(path)
+        with open(path[:-len('.prof')] + '.json', encoding='utf-8') as fh:
+            metadata = json.load(fh)
+        assert metadata['document_hash'] == 'abc'
+        assert metadata['elapsed_seconds'] >= 0
+    
+    def test_retention_limit(self, tmp_path):
+        """Test that only the newest profiles are kept."""
+        for _ in range(4):
+            profiler = RequestProfiler(profile_dir=str(tmp_path), max_retained=2)
+            with profiler:
+                sum(range(100))
+            profiler.save()
+        names = os.listdir(tmp_path)
+        assert len([n for n in names if n.endswith('.prof')]) == 2
+        assert len([n for n in names if n.endswith('.json')]) == 2
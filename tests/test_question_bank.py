@@ -0,0 +1,172 @@
+"""
+Tests for the persistent question bank.
+"""
+import io
+import os
+import csv
+import json
+import pytest
+from config import Config
+from chunk_store import ChunkStore
+from question_bank import (
+    QuestionBank,
+    prompt_similarity,
+    record_source,
+    recording_sources,
+    stream_csv,
+    stream_json
+)
+
+QUESTIONS = ["What is photosynthesis?", "Where does photosynthesis happen?", "Which gas do plants release?"]
+
+
+@pytest.fixture
+def bank(tmp_path):
+    """Question bank in a temporary database."""
+    return QuestionBank(path=str(tmp_path / 'bank.sqlite3'), enabled=True, similarity=0.75)
+
+
+class TestQuestionBank:
+    """Test storing and finding questions."""
+    
+    def test_exact_and_similar_prompts(self, bank):
+        """Test that equal and reworded prompts are served, others are not."""
+        bank.store('doc', 'english', 'Photosynthesis in green plants', QUESTIONS, version='v1')
+        
+        assert bank.find('doc', 'english', 'photosynthesis in green plants!', 3, version='v1') == QUESTIONS
+        assert bank.find('doc', 'english', 'green plants: photosynthesis in', 2, version='v1') == QUESTIONS[:2]
+        assert bank.find('doc', 'english', 'photosynthesis', 3, version='v1') is None
+        assert bank.find('doc', 'english', 'history of rome', 3, version='v1') is None
+    
+    def test_scope(self, bank):
+        """Test that document, language, pages, model version and size all matter."""
+        bank.store('doc', 'english', 'photosynthesis', QUESTIONS, pages=[0, 1], version='v1')
+        
+        assert bank.find('doc', 'english', 'photosynthesis', 3, pages=[0, 1], version='v1') == QUESTIONS
+        assert bank.find('other', 'english', 'photosynthesis', 3, pages=[0, 1], version='v1') is None
+        assert bank.find('doc', 'hindi', 'photosynthesis', 3, pages=[0, 1], version='v1') is None
+        assert bank.find('doc', 'english', 'photosynthesis', 3, version='v1') is None
+        assert bank.find('doc', 'english', 'photosynthesis', 3, pages=[0, 1], version='v2') is None
+        assert bank.find('doc', 'english', 'photosynthesis', 4, pages=[0, 1], version='v1') is None
+    
+    def test_normalization_version_invalidates(self, bank, monkeypatch):
+        """Test that questions stored under older normalization rules are not served."""
+        import question_bank
+        
+        bank.store('doc', 'hindi', 'photosynthesis', QUESTIONS)
+        assert bank.find('doc', 'hindi', 'photosynthesis', 3) == QUESTIONS
+        monkeypatch.setattr(question_bank, 'NORMALIZATION_VERSION', question_bank.NORMALIZATION_VERSION + 1)
+        assert bank.find('doc', 'hindi', 'photosynthesis', 3) is None
+    
+    def test_devanagari_prompts(self, bank):
+        """Test that Devanagari words keep their vowel signs."""
+        assert prompt_similarity("भारत की नदियाँ", "नदियाँ भारत की।") == 1.0
+        assert prompt_similarity("भारत की नदियाँ", "भारत के पर्वत") < 0.75
+        bank.store('doc', 'hindi', "भारत की नदियाँ", ["गंगा कहाँ बहती है?"], version='rules')
+        assert bank.find('doc', 'hindi', "नदियाँ भारत की", 1, version='rules') == ["गंगा कहाँ बहती है?"]
+    
+    def test_missing_database_is_not_created(self, bank):
+        """Test that lookups do not create the database."""
+        assert bank.find('doc', 'english', 'photosynthesis', 3, version='v1') is None
+        assert bank.generations('doc') == []
+        assert not os.path.exists(bank.path)
+    
+    def test_default_path_in_document_cache(self, tmp_path, monkeypatch):
+        """Test that the database defaults to the document cache, not the working directory."""
+        monkeypatch.setattr(Config, 'QUESTION_BANK_PATH', '')
+        monkeypatch.setattr(Config, 'DOCUMENT_CACHE_DIR', str(tmp_path / 'cache'))
+        assert QuestionBank().path == str(tmp_path / 'cache' / 'question_bank.sqlite3')
+        monkeypatch.setattr(Config, 'QUESTION_BANK_PATH', str(tmp_path / 'bank.sqlite3'))
+        assert QuestionBank().path == str(tmp_path / 'bank.sqlite3')
+    
+    def test_recorded_offsets(self, bank):
+        """Test that recorded sources carry the chunk offsets and pages of a ChunkStore."""
+        store = ChunkStore.from_pages(["Plants make food from light.", "Animals eat plants."], chunk_size=20)
+        chunks = store.select([len(store) - 1, 0])
+        with recording_sources() as sources:
+            record_source([QUESTIONS[0]], chunks, 1)
+            record_source([QUESTIONS[2]], chunks, 0)
+            record_source([QUESTIONS[1]], [store[1]], 0)
+        record_source([QUESTIONS[1]], chunks, 0)
+        
+        assert set(sources) == {QUESTIONS[0], QUESTIONS[2]}
+        start, end, page = sources[QUESTIONS[2]]
+        assert store.text[start:end] == store[-1]
+        assert page == 1
+        
+        bank.store('doc', 'english', 'plants', QUESTIONS, version='v1', offsets=sources)
+        rows = list(bank.iter_questions(document_hash='doc'))
+        assert [row['chunk_start'] for row in rows] == [sources[QUESTIONS[0]][0], None, start]
+
+
+class TestExport:
+    """Test streaming exports."""
+    
+    def test_stream_formats(self, bank):
+        """Test JSON and CSV renderings of stored questions."""
+        bank.store('doc', 'english', 'photosynthesis', QUESTIONS, version='v1')
+        bank.store('doc', 'hindi', 'नदियाँ', ["गंगा कहाँ बहती है?"], version='rules')
+        
+        rows = json.loads(''.join(stream_json(bank.iter_questions(document_hash='doc'))))
+        assert [row['question'] for row in rows] == QUESTIONS + ["गंगा कहाँ बहती है?"]
+        records = list(csv.DictReader(io.StringIO(''.join(stream_csv(bank.iter_questions(language='hindi'))))))
+        assert [record['question'] for record in records] == ["गंगा कहाँ बहती है?"]
+        assert json.loads(''.join(stream_json([]))) == []
+    
+    def test_export_route(self, bank, monkeypatch):
+        """Test the streaming export endpoint and its admin token."""
+        import app as app_module
+        
+        monkeypatch.setattr(app_module, 'question_bank', bank)
+        monkeypatch.setitem(app_module.app.config, 'ADMIN_TOKEN', 'secret')
+        bank.store('doc', 'english', 'photosynthesis', QUESTIONS, version='v1')
+        client = app_module.app.test_client()
+        headers = {Config.ADMIN_HEADER: 'secret'}
+        
+        response = client.get('/bank/export?format=csv&document=doc', headers=headers)
+        assert response.status_code == 200
+        assert response.is_streamed
+        assert response.headers['Content-Disposition'] == 'attachment; filename=questions.csv'
+        assert len(list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))) == 3
+        assert client.get('/bank/export?format=xml', headers=headers).status_code == 400
+        assert client.get('/bank/documents/doc', headers=headers).get_json()['generations'][0]['question_count'] == 3
+        
+        assert client.get('/bank/export').status_code == 403
+        assert client.get('/bank/documents/doc', headers={Config.ADMIN_HEADER: 'wrong'}).status_code == 403
+
+
+class TestServing:
+    """Test that /process answers from the bank."""
+    
+    def test_process_served_from_bank(self, bank, tmp_path, monkeypatch):
+        """Test that a repeated request does not generate again."""
+        fitz = pytest.importorskip('fitz')
+        import app as app_module
+        from utils import file_sha256
+        
+        monkeypatch.setattr(Config, 'UPLOAD_FOLDER', str(tmp_path / 'uploads'))
+        monkeypatch.setattr(app_module, 'question_bank', bank)
+        
+        def generate(*args, **kwargs):
+            raise AssertionError("generation should not run")
+        
+        monkeypatch.setattr(app_module, 'generate_questions_for_language', generate)
+        
+        pdf = fitz.open()
+        pdf.new_page().insert_text((72, 72), "Photosynthesis converts light into energy.")
+        path = tmp_path / 'lecture.pdf'
+        pdf.save(str(path))
+        bank.store(file_sha256(str(path)), 'hindi', 'photosynthesis', QUESTIONS)
+        
+        client = app_module.app.test_client()
+        with client.session_transaction() as session:
+            session['language'] = 'hindi'
+        response = client.post('/process', data={
+            'prompt': 'Photosynthesis',
+            'total_questions': '2',
+            'file': (io.BytesIO(path.read_bytes()), 'lecture.pdf')
+        }, content_type='multipart/form-data')
+        
+        assert response.status_code == 200
+        page = response.get_data(as_text=True)
+        assert QUESTIONS[0] in page and QUESTIONS[1] in page and QUESTIONS[2] not in page
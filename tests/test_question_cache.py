@@ -0,0 +1,127 @@
+"""
+Tests for the per-chunk question cache.
+"""
+import pytest
+from question_cache import QuestionCache, decoding_profile
+from question_generator import QuestionGenerator
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return QuestionCache(root=str(tmp_path / 'chunk_questions'), enabled=True)
+
+
+class TestQuestionCache:
+    """Test storing and reusing questions per chunk."""
+    
+    def test_decoding_profile_is_stable(self):
+        """Test that the profile depends on every parameter but not their order."""
+        assert decoding_profile(model='m', num_beams=5) == decoding_profile(num_beams=5, model='m')
+        assert decoding_profile(model='m', num_beams=5) != decoding_profile(model='m', num_beams=4)
+        assert decoding_profile(model='m', num_beams=5) != decoding_profile(model='n', num_beams=5)
+    
+    def test_profile_includes_normalization_version(self, monkeypatch):
+        """Test that a normalization change gives generated questions a new profile."""
+        import question_generator
+        
+        generator = QuestionGenerator(model_name='test/model')
+        profile = generator.decoding_profile(num_beams=5)
+        monkeypatch.setattr(question_generator, 'NORMALIZATION_VERSION', question_generator.NORMALIZATION_VERSION + 1)
+        assert generator.decoding_profile(num_beams=5) != profile
+    
+    def test_round_trip(self, cache):
+        """Test that stored questions are returned for the same chunk and profile."""
+        cache.put("chunk text", "p1", 3, ["Q1?", "Q2?"])
+        assert cache.get("chunk text", "p1", 3) == ["Q1?", "Q2?"]
+        assert cache.get("chunk text", "p1", 1) == ["Q1?"]
+        assert cache.get("chunk text", "p2", 3) is None
+        assert cache.get("other text", "p1", 3) is None
+    
+    def test_larger_requests_miss(self, cache):
+        """Test that an entry does not answer a request for more sequences."""
+        cache.put("chunk text", "p1", 2, ["Q1?", "Q2?"])
+        assert cache.get("chunk text", "p1", 3) is None
+    
+    def test_disabled_cache_stores_nothing(self, tmp_path):
+        """Test that a disabled cache never hits."""
+        cache = QuestionCache(root=str(tmp_path), enabled=False)
+        cache.put("chunk text", "p1", 3, ["Q1?"])
+        assert cache.get("chunk text", "p1", 3) is None
+    
+    def test_prunes_least_recently_used(self, tmp_path):
+        """Test that the entries used longest ago go first once the size limit is hit."""
+        import os
+        
+        cache = QuestionCache(root=str(tmp_path), enabled=True, max_mb=0, max_age_days=0)
+        for number in range(3):
+            cache.put(f"chunk {number}", "p1", 1, ["Q" * 100])
+            os.utime(cache._path(f"chunk {number}", "p1"), (1000 + number, 1000 + number))
+        assert cache.get("chunk 0", "p1", 1)
+        
+        cache.max_mb = 300 / 1024 ** 2
+        assert cache.prune() == 1
+        assert cache.get("chunk 0", "p1", 1)
+        assert cache.get("chunk 1", "p1", 1) is None
+        assert cache.get("chunk 2", "p1", 1)
+    
+    def test_prunes_expired_entries(self, tmp_path):
+        """Test that entries unused beyond the age limit are deleted."""
+        import os
+        
+        cache = QuestionCache(root=str(tmp_path), enabled=True, max_mb=0, max_age_days=1)
+        cache.put("old chunk", "p1", 1, ["Q1?"])
+        cache.put("new chunk", "p1", 1, ["Q2?"])
+        os.utime(cache._path("old chunk", "p1"), (1000, 1000))
+        assert cache.prune() == 1
+        assert cache.get("old chunk", "p1", 1) is None
+        assert cache.get("new chunk", "p1", 1) == ["Q2?"]
+
+
+class TestGeneratorCaching:
+    """Test that the generator reuses cached questions across prompts."""
+    
+    def test_seen_chunks_skip_the_model(self, cache):
+        """Test that a chunk generated once, e.g. by pre-generation, is served from the cache."""
+        calls = []
+        
+        def fake_pipeline(text, num_return_sequences=1, **kwargs):
+            calls.append(num_return_sequences)
+            return [{'generated_text': f"Question {i} about {text[-20:]}?"} for i in range(num_return_sequences)]
+        
+        generator = QuestionGenerator(model_name='test/model')
+        generator._pipeline = fake_pipeline
+        generator.question_cache = cache
+        chunks = ["The monsoon brings rain.", "Akbar ruled the Mughal empire."]
+        
+        assert generator.pregenerate(chunks, num_questions=4) == 2
+        assert calls == [4, 4]
+        
+        first = generator.generate_questions_from_text(chunks[0], num_questions=2)
+        assert len(first) == 2
+        assert calls == [4, 4]
+        
+        generator.generate_questions_from_text(chunks[1], num_questions=5)
+        assert calls == [4, 4, 5]
+    
+    def test_one_lookup_per_uncached_chunk(self, cache):
+        """Test that a miss during generation is looked up and counted once."""
+        from prometheus_client import REGISTRY
+        
+        def misses():
+            return REGISTRY.get_sample_value('qg_question_cache_requests_total', {'outcome': 'miss'}) or 0.0
+        
+        generator = QuestionGenerator(model_name='test/model')
+        generator._pipeline = lambda text, num_return_sequences=1, **kwargs: [
+            {'generated_text': f"Question {i} about {text[-20:]}?"} for i in range(num_return_sequences)
+        ]
+        generator.question_cache = cache
+        chunks = ["The monsoon brings rain.", "Akbar ruled the Mughal empire."]
+        
+        before = misses()
+        questions = generator.generate_questions_from_chunks(chunks, total_questions=4, questions_per_chunk=2)
+        assert questions
+        assert misses() - before == len(chunks)
+        
+        before = misses()
+        generator.generate_questions_from_text(chunks[0], num_questions=1)
+        assert misses() == before
@@ -0,0 +1,167 @@
+"""
+Tests for the retrieval backends.
+"""
+import os
+import numpy as np
+import pytest
+from document_cache import DocumentCache
+from retrieval import (
+    BM25Retriever,
+    DenseRetriever,
+    SparseIndex,
+    TfidfRetriever,
+    get_retriever,
+    tokenize,
+    top_k_indices
+)
+
+CHUNKS = [
+    "The monsoon brings heavy rainfall to India between June and September.",
+    "Photosynthesis converts sunlight, water and carbon dioxide into glucose.",
+    "The Mughal emperor Akbar expanded the empire across northern India.",
+    "Rivers such as the Ganga depend on monsoon rains and Himalayan snow."
+]
+
+
+class WordHashEmbedder:
+    """Deterministic stand-in for a sentence embedding model."""
+    
+    model_name = 'test/word-hash'
+    
+    def __init__(self):
+        self.calls = 0
+    
+    def __call__(self, texts):
+        self.calls += 1
+        matrix = np.zeros((len(texts), 64), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.lower().replace(',', ' ').replace('.', ' ').split():
+                matrix[row, sum(map(ord, word)) % 64] += 1.0
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.maximum(norms, 1e-9)
+
+
+class TestTopK:
+    """Test vectorized top-k selection."""
+    
+    def test_orders_best_first(self):
+        """Test that indices come back in descending score order."""
+        scores = np.array([0.1, 0.9, 0.5, 0.7], dtype=np.float32)
+        assert top_k_indices(scores, 3) == [1, 3, 2]
+    
+    def test_top_n_larger_than_scores(self):
+        """Test that asking for more than available returns everything."""
+        assert sorted(top_k_indices(np.array([0.2, 0.1]), 5)) == [0, 1]
+        assert top_k_indices(np.array([]), 3) == []
+
+
+class TestTfidfRetriever:
+    """Test the TF-IDF backend."""
+    
+    def test_ranks_matching_chunk_first(self):
+        """Test that the chunk sharing the prompt's words ranks first."""
+        assert TfidfRetriever().rank("photosynthesis glucose", CHUNKS, 2)[0] == 1
+
+
+class TestDenseRetriever:
+    """Test the embedding backend and its per-document cache."""
+    
+    def test_ranks_without_cache(self):
+        """Test ranking when no document id is given."""
+        retriever = DenseRetriever(embedder=WordHashEmbedder(), cache=DocumentCache('/nonexistent'))
+        assert retriever.rank("monsoon rainfall india", CHUNKS, 1)[0] == 0
+    
+    def test_chunk_matrix_is_cached_as_float16_memmap(self, tmp_path):
+        """Test that chunk vectors are stored once and memory-mapped afterwards."""
+        embedder = WordHashEmbedder()
+        retriever = DenseRetriever(embedder=embedder, cache=DocumentCache(str(tmp_path)))
+        
+        first = retriever.chunk_matrix(CHUNKS, document_id='doc1')
+        second = retriever.chunk_matrix(CHUNKS, document_id='doc1')
+        assert embedder.calls == 1
+        assert first.dtype == np.float16
+        assert isinstance(second, np.memmap)
+        assert second.shape == (len(CHUNKS), 64)
+        assert len(os.listdir(tmp_path / 'doc1')) == 1
+    
+    def test_changed_chunks_invalidate_cache(self, tmp_path):
+        """Test that different chunking of the same document is embedded again."""
+        embedder = WordHashEmbedder()
+        retriever = DenseRetriever(embedder=embedder, cache=DocumentCache(str(tmp_path)))
+        retriever.chunk_matrix(CHUNKS, document_id='doc1')
+        retriever.chunk_matrix(CHUNKS[:2], document_id='doc1')
+        assert embedder.calls == 2
+    
+    def test_scores_in_float32_blocks(self, tmp_path, monkeypatch):
+        """Test that block-wise scoring of the memory-mapped matrix keeps the ranking."""
+        retriever = DenseRetriever(embedder=WordHashEmbedder(), cache=DocumentCache(str(tmp_path)))
+        ranking = retriever.rank("monsoon rains ganga", CHUNKS, 4, document_id='doc1')
+        monkeypatch.setattr(DenseRetriever, 'BLOCK_ROWS', 1)
+        assert retriever.rank("monsoon rains ganga", CHUNKS, 4, document_id='doc1') == ranking
+    
+    def test_base_class_is_abstract(self):
+        """Test that a backend must implement rank."""
+        from retrieval import Retriever
+        
+        with pytest.raises(TypeError):
+            Retriever()
+
+
+class TestBM25Retriever:
+    """Test the sparse inverted index and hybrid scoring."""
+    
+    def test_tokenize_keeps_devanagari_words_whole(self):
+        """Test that vowel signs stay in the word and dandas split words."""
+        assert tokenize("राम ने पुस्तक पढ़ी।सीता") == ['राम', 'ने', 'पुस्तक', 'पढ़ी', 'सीता']
+    
+    def test_only_matching_chunks_are_scored(self):
+        """Test that chunks without prompt terms are not candidates."""
+        index = SparseIndex.build(CHUNKS)
+        candidates, scores = index.score("monsoon")
+        assert sorted(candidates.tolist()) == [0, 3]
+        assert len(scores) == 2
+    
+    def test_tfidf_component_matches_cosine(self):
+        """Test that the TF-IDF part equals scikit-learn's cosine similarity."""
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        from sklearn.metrics.pairwise import cosine_similarity
+        
+        prompt = "monsoon rains in india"
+        vectorizer = TfidfVectorizer().fit(CHUNKS)
+        expected = cosine_similarity(vectorizer.transform([prompt]), vectorizer.transform(CHUNKS)).ravel()
+        candidates, scores = SparseIndex.build(CHUNKS).score(prompt, bm25_weight=0.0)
+        np.testing.assert_allclose(scores, expected[candidates], rtol=1e-5)
+    
+    def test_ranks_and_pads(self, tmp_path):
+        """Test ranking and padding with unmatched chunks."""
+        retriever = BM25Retriever(cache=DocumentCache(str(tmp_path)))
+        ranked = retriever.rank("photosynthesis glucose", CHUNKS, 3)
+        assert ranked[0] == 1
+        assert len(ranked) == 3
+        assert len(set(ranked)) == 3
+    
+    def test_index_is_persisted_and_reloaded(self, tmp_path):
+        """Test that a saved index scores like the original."""
+        retriever = BM25Retriever(cache=DocumentCache(str(tmp_path)))
+        built = retriever.get_index(CHUNKS, document_id='doc1')
+        files = os.listdir(tmp_path / 'doc1')
+        assert len(files) == 1
+        
+        loaded = SparseIndex.load(str(tmp_path / 'doc1' / files[0]))
+        for prompt in ("monsoon india", "akbar empire"):
+            np.testing.assert_allclose(built.score(prompt)[1], loaded.score(prompt)[1])
+
+
+class TestRetrieverFactory:
+    """Test backend selection."""
+    
+    def test_known_backends(self):
+        """Test that configured names map to backends."""
+        assert isinstance(get_retriever('tfidf'), TfidfRetriever)
+        assert isinstance(get_retriever('DENSE'), DenseRetriever)
+        assert isinstance(get_retriever('bm25'), BM25Retriever)
+    
+    def test_unknown_backend(self):
+        """Test that an unknown backend is rejected."""
+        with pytest.raises(ValueError):
+            get_retriever('nope')
@@ -0,0 +1,29 @@
+"""
+Tests for the translation clients.
+"""
+import pytest
+from config import Config
+from translation import LibreTranslateTranslator, create_translator
+from benchmarks.load_test import FakeTranslationServer
+
+
+class TestLibreTranslate:
+    """Test the LibreTranslate client against the load-test fake server."""
+    
+    def test_translate(self):
+        """Test a round trip through the fake server."""
+        with FakeTranslationServer(latency_ms=0) as server:
+            translator = LibreTranslateTranslator(url=server.url, timeout=5)
+            assert translator.translate("धर्मो रक्षति रक्षितः", src='sa', dest='en').text == "धर्मो रक्षति रक्षितः"
+    
+    def test_server_error(self):
+        """Test that HTTP errors are raised for the caller to handle."""
+        with FakeTranslationServer(latency_ms=0) as server:
+            translator = LibreTranslateTranslator(url=f"{server.url}/missing", timeout=5)
+            with pytest.raises(OSError):
+                translator.translate("text", src='sa', dest='en')
+    
+    def test_backend_selection(self, monkeypatch):
+        """Test that the configured backend is created."""
+        monkeypatch.setattr(Config, 'TRANSLATION_BACKEND', 'libretranslate')
+        assert isinstance(create_translator(), LibreTranslateTranslator)
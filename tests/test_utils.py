@@ -8,7 +8,9 @@ from utils import (
     validate_language, 
     get_language_code,
     remove_duplicates_preserve_order,
-    sanitize_question
+    sanitize_question,
+    file_sha256,
+    parse_page_ranges
 )
 
 
@@ -29,6 +31,13 @@ class TestFileValidation:
     def test_allowed_file_no_extension(self):
         """Test files without extensions."""
         assert allowed_file("document") is False
+    
+    def test_file_sha256(self, tmp_path):
+        """Test document hashing."""
+        path = tmp_path / "doc.pdf"
+        path.write_bytes(b"abc")
+        expected = "ba7816bf8f01cfea414140de5dae2223b00361a396177a9cb410ff61f20015ad"
+        assert file_sha256(str(path), block_size=2) == expected
 
 
 class TestTextProcessing:
@@ -116,4 +125,20 @@ class TestDuplicateRemoval:
     def test_remove_duplicates_empty(self):
         """Test empty list."""
         result = remove_duplicates_preserve_order([])
-        assert result == [] 
\ No newline at end of file
+        assert result == [] 
+
+
+class TestPageRanges:
+    """Test parsing of page selections."""
+    
+    def test_parse_page_ranges(self):
+        """Test single pages, ranges and open ranges."""
+        assert parse_page_ranges("3-5, 1", 10) == [0, 2, 3, 4]
+        assert parse_page_ranges("8-", 10) == [7, 8, 9]
+        assert parse_page_ranges("2,2-3", 10) == [1, 2]
+    
+    def test_parse_page_ranges_invalid(self):
+        """Test that malformed or out-of-range selections are rejected."""
+        for spec in ("0", "5-3", "11", "a-b", "", "3-12"):
+            with pytest.raises(ValueError):
+                parse_page_ranges(spec, 10)
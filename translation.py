@@ -0,0 +1,83 @@
+"""
+Translation clients used for Sanskrit question generation.
+
+``TRANSLATION_BACKEND`` selects googletrans (the default) or a
+LibreTranslate-compatible HTTP server at ``TRANSLATION_URL``, such as a
+self-hosted LibreTranslate or the fake server of the load-test harness.
+"""
+import json
+import logging
+import urllib.request
+from typing import Any, NamedTuple
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class TranslationResult(NamedTuple):
+    """Translated text, shaped like googletrans' result."""
+    text: str
+
+
+class LibreTranslateTranslator:
+    """Client for the LibreTranslate ``/translate`` API."""
+    
+    def __init__(self, url: str = None, timeout: float = None, api_key: str = None):
+        """
+        Initialize the client.
+        
+        Args:
+            url: Server base URL (defaults to Config.TRANSLATION_URL)
+            timeout: Request timeout in seconds (defaults to Config.TRANSLATION_TIMEOUT)
+            api_key: API key sent with each request (defaults to Config.TRANSLATION_API_KEY)
+        """
+        self.url = (url or Config.TRANSLATION_URL).rstrip('/')
+        self.timeout = timeout or Config.TRANSLATION_TIMEOUT
+        self.api_key = api_key if api_key is not None else Config.TRANSLATION_API_KEY
+    
+    def translate(self, text: str, src: str = 'auto', dest: str = 'en') -> TranslationResult:
+        """
+        Translate text.
+        
+        Args:
+            text: Text to translate
+            src: Source language code
+            dest: Destination language code
+        
+        Returns:
+            TranslationResult: The translation
+        
+        Raises:
+            OSError: If the server cannot be reached or answers with an error
+            ValueError: If the response is not a translation
+        """
+        payload = {'q': text, 'source': src, 'target': dest, 'format': 'text'}
+        if self.api_key:
+            payload['api_key'] = self.api_key
+        request = urllib.request.Request(
+            f"{self.url}/translate",
+            data=json.dumps(payload).encode('utf-8'),
+            headers={'Content-Type': 'application/json'}
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            body = json.loads(response.read().decode('utf-8'))
+        if 'translatedText' not in body:
+            raise ValueError(f"Unexpected translation response: {body}")
+        return TranslationResult(body['translatedText'])
+
+
+def create_translator() -> Any:
+    """
+    Create the translator selected by Config.TRANSLATION_BACKEND.
+    
+    Returns:
+        Any: Object with ``translate(text, src=..., dest=...)`` returning a
+        result with a ``text`` attribute
+    """
+    if Config.TRANSLATION_BACKEND == 'libretranslate':
+        logger.info(f"Using LibreTranslate at {Config.TRANSLATION_URL}")
+        return LibreTranslateTranslator()
+    
+    from googletrans import Translator
+    return Translator()
@@ -3,10 +3,13 @@ Utility functions for the Multi-Lingual Question Generation application.
 """
 import os
 import re
+import time
+import hashlib
 import logging
 from typing import List, Optional, Set
 from werkzeug.utils import secure_filename
 from config import Config
+from normalization import normalize_text
 
 # Set up logging
 logging.basicConfig(
@@ -56,29 +59,80 @@ def secure_file_upload(file) -> Optional[str]:
         logger.error(f"Error during file upload: {str(e)}")
         return None
 
-def clean_text(text: str) -> str:
+def file_sha256(file_path: str, block_size: int = 1024 * 1024) -> str:
     """
-    Clean and normalize text by removing unwanted patterns and extra whitespace.
+    Compute the SHA-256 hex digest of a file's contents.
     
     Args:
-        text: Raw text to clean
+        file_path: Path to the file
+        block_size: Number of bytes read at a time
         
     Returns:
-        str: Cleaned text
+        str: Hex digest identifying the document
     """
-    if not text:
-        return ""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as fh:
+        for block in iter(lambda: fh.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def prune_directory(root: str, max_bytes: int = 0, max_age: float = 0) -> int:
+    """
+    Delete the least recently used files under a cache directory.
     
-    # Remove URLs and file paths
-    text = re.sub(r'http\S+|www\S+|file:\S+|\S+\.html', '', text)
+    Caches touch an entry when they read it, so a file's modification time is
+    its last use. Files unused for longer than ``max_age`` are deleted, then the
+    oldest files until the directory holds at most ``max_bytes``.
     
-    # Remove extra whitespace
-    text = re.sub(r'\s+', ' ', text)
+    Args:
+        root: Directory to prune
+        max_bytes: Size limit in bytes (0 = no limit)
+        max_age: Age limit in seconds (0 = no limit)
+        
+    Returns:
+        int: Number of files deleted
+    """
+    now = time.time()
+    files = []
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+    files.sort()
     
-    # Remove special characters that might cause issues
-    text = re.sub(r'[^\w\s\.\,\!\?\;\:\-\(\)\[\]\{\}]', '', text)
+    total = sum(size for _, size, _ in files)
+    removed = 0
+    for mtime, size, path in files:
+        expired = max_age and now - mtime > max_age
+        if not expired and (not max_bytes or total <= max_bytes):
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+        removed += 1
+    if removed:
+        logger.info(f"Pruned {removed} files from {root}")
+    return removed
+
+def clean_text(text: str, language: str = None) -> str:
+    """
+    Clean and normalize text by removing unwanted patterns and extra whitespace.
     
-    return text.strip()
+    Args:
+        text: Raw text to clean
+        language: Language code selecting the script's whitelist (defaults to
+            keeping the characters of every supported script)
+        
+    Returns:
+        str: Cleaned text
+    """
+    return normalize_text(text, language)
 
 def split_text_into_chunks(text: str, chunk_size: int = None) -> List[str]:
     """
@@ -115,7 +169,8 @@ def validate_language(language: str) -> bool:
     Returns:
         bool: True if language is supported, False otherwise
     """
-    return language.lower() in Config.SUPPORTED_LANGUAGES
+    from languages.registry import get_language_spec
+    return get_language_spec(language) is not None
 
 def get_language_code(language: str) -> Optional[str]:
     """
@@ -127,7 +182,9 @@ def get_language_code(language: str) -> Optional[str]:
     Returns:
         Optional[str]: Language code or None if not supported
     """
-    return Config.SUPPORTED_LANGUAGES.get(language.lower())
+    from languages.registry import get_language_spec
+    spec = get_language_spec(language)
+    return spec.code if spec else None
 
 def remove_duplicates_preserve_order(items: List[str]) -> List[str]:
     """
@@ -151,7 +208,11 @@ def remove_duplicates_preserve_order(items: List[str]) -> List[str]:
 
 def sanitize_question(question: str, min_length: int = 15) -> Optional[str]:
     """
-    Sanitize and validate a generated question.
+    Sanitize and validate a single generated question.
+    
+    Generators post-process whole batches with
+    ``postprocessing.postprocess_questions``; this applies the same rules to
+    one question.
     
     Args:
         question: Raw question text
@@ -160,27 +221,41 @@ def sanitize_question(question: str, min_length: int = 15) -> Optional[str]:
     Returns:
         Optional[str]: Sanitized question or None if invalid
     """
-    if not question:
-        return None
-    
-    # Clean the question
-    cleaned = clean_text(question)
+    from postprocessing import postprocess_questions
     
-    # Check minimum length
-    if len(cleaned) < min_length:
-        return None
+    kept = postprocess_questions([question], min_length=min_length).questions
+    return kept[0] if kept else None
+
+def parse_page_ranges(spec: str, page_count: int) -> List[int]:
+    """
+    Parse a page selection such as ``"3-7, 10, 12-"``.
     
-    # Remove questions that are too generic
-    generic_patterns = [
-        r'^what is$',
-        r'^who is$',
-        r'^where is$',
-        r'^when is$',
-        r'^how is$'
-    ]
-    
-    for pattern in generic_patterns:
-        if re.match(pattern, cleaned.lower()):
-            return None
+    Pages are numbered from 1 as printed by PDF viewers; an open range runs to
+    the last page.
     
-    return cleaned 
\ No newline at end of file
+    Args:
+        spec: Comma-separated pages and ranges
+        page_count: Number of pages in the document
+        
+    Returns:
+        List[int]: Sorted zero-based page numbers
+        
+    Raises:
+        ValueError: If the selection is malformed, empty or outside the document
+    """
+    pages: Set[int] = set()
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        match = re.fullmatch(r'(\d+)\s*(?:(-)\s*(\d*))?', part)
+        if not match:
+            raise ValueError(f"Invalid page range: {part}")
+        first = int(match.group(1))
+        last = first if not match.group(2) else int(match.group(3) or page_count)
+        if first < 1 or last > page_count or first > last:
+            raise ValueError(f"Page range {part} is outside pages 1-{page_count}")
+        pages.update(range(first - 1, last))
+    if not pages:
+        raise ValueError("No pages selected")
+    return sorted(pages)